@@ -25,6 +25,7 @@ import numpy as np
 import pandas as pd
 import statsmodels.formula.api as smf
 import statsmodels.api as sm
+from scipy.linalg.blas import dsyrk
 from scipy.stats import norm, chi2, f as f_dist
 
 from .iv_helpers import (
@@ -378,30 +379,41 @@ def _build_matrices(
     """
     Y = df[outcome_var].to_numpy(dtype=float)
 
-    endogenous = df[endogenous_vars].to_numpy(dtype=float)
-    if endogenous.ndim == 1:
-        endogenous = endogenous.reshape(-1, 1)
-
-    controls = (
-        df[control_vars].to_numpy(dtype=float)
-        if control_vars
-        else np.empty((len(df), 0))
-    )
-    instruments = df[instrument_vars].to_numpy(dtype=float)
-    if instruments.ndim == 1:
-        instruments = instruments.reshape(-1, 1)
-
-    ones = np.ones((len(df), 1))
+    n = len(df)
+    n_endog, n_inst, n_ctrl = len(endogenous_vars), len(instrument_vars), len(control_vars)
 
+    # Preallocate both designs as float64 and write each block in place,
+    # rather than materialising every block and copying again via hstack.
     # X: [intercept, endogenous vars, controls]
-    X = np.hstack([ones, endogenous, controls])
+    X = np.empty((n, 1 + n_endog + n_ctrl), dtype=float)
+    X[:, 0] = 1.0
+    X[:, 1:1 + n_endog] = df[endogenous_vars].to_numpy(dtype=float, copy=False)
 
     # Z: [intercept, excluded instruments, controls]
-    Z = np.hstack([ones, instruments, controls])
+    Z = np.empty((n, 1 + n_inst + n_ctrl), dtype=float)
+    Z[:, 0] = 1.0
+    Z[:, 1:1 + n_inst] = df[instrument_vars].to_numpy(dtype=float, copy=False)
+
+    if n_ctrl:
+        controls = df[control_vars].to_numpy(dtype=float, copy=False)
+        X[:, 1 + n_endog:] = controls
+        Z[:, 1 + n_inst:] = controls
 
     return Y, X, Z
 
 
+def _gram(A: np.ndarray) -> np.ndarray:
+    """
+    Symmetric Gram matrix A'A via BLAS ``dsyrk``.
+
+    ``A.T @ A`` dispatches to ``dgemm`` (2nk² flops); ``dsyrk`` only fills
+    one triangle (nk² flops), which is mirrored afterwards. ``A.T`` is passed
+    with ``trans=0`` so a C-ordered ``A`` reaches BLAS without a copy.
+    """
+    lower = dsyrk(1.0, np.asarray(A, dtype=float).T, trans=0, lower=1)
+    return lower + np.tril(lower, -1).T
+
+
 def _tsls(
     Y: np.ndarray,
     X: np.ndarray,
@@ -422,7 +434,7 @@ def _tsls(
 
     # First-stage projection matrix P_Z = Z(Z'Z)^{-1}Z'
     try:
-        ZtZ = Z.T @ Z
+        ZtZ = _gram(Z)
         ZtZ_inv = np.linalg.inv(ZtZ)
     except np.linalg.LinAlgError:
         raise ValueError(
@@ -456,7 +468,7 @@ def _tsls(
         )
     sigma2 = float(resid @ resid) / dof
 
-    XhXh = X_hat.T @ X_hat
+    XhXh = _gram(X_hat)
     try:
         Var = sigma2 * np.linalg.inv(XhXh)
     except np.linalg.LinAlgError:
@@ -5,13 +5,18 @@ Phase 0: scaffolding only.
 
 Planned:
 - Sharp RD local polynomial estimation with triangular kernel weights
-- HC2 robust standard errors via statsmodels WLS
+- HC2 robust standard errors via a WLS kernel (see rd_kernels.py)
 - IK bandwidth selection + sensitivity analysis
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
@@ -21,11 +26,16 @@ from scipy.stats import norm
 from .rd_helpers import (
     bandwidth_sanity_warnings,
     compute_running_var_range,
-    create_polynomial_features,
     triangular_kernel,
     validate_polynomial_order,
 )
 from .rd_bandwidth import imbens_kalyanaraman_bandwidth
+from .rd_kernels import local_polynomial_design, sharp_rd_fit_sorted, wls_hc2
+
+# Worker pool for bandwidth sweeps, created on first parallel use. "spawn"
+# avoids forking a multi-threaded web worker.
+_SENSITIVITY_POOL: Optional[ProcessPoolExecutor] = None
+_SENSITIVITY_POOL_LOCK = threading.Lock()
 
 
 class RDEstimator:
@@ -82,7 +92,7 @@ class RDEstimator:
         - Keep observations within |X| <= bandwidth
         - Fit separate local polynomial regressions on each side
         - Use triangular kernel weights
-        - Use statsmodels WLS with HC2 robust standard errors
+        - Use WLS with HC2 robust standard errors (rd_kernels.wls_hc2)
         - Treatment effect is the difference in intercepts at cutoff
 
         Returns a dict with treatment_effect, standard error, CI, p-value,
@@ -187,21 +197,19 @@ class RDEstimator:
             )
 
         # ---- Design matrices ----
-        X_t = create_polynomial_features(treated_df["X_centered"], order=order)
-        X_c = create_polynomial_features(control_df["X_centered"], order=order)
-        X_t = sm.add_constant(X_t, has_constant="add")
-        X_c = sm.add_constant(X_c, has_constant="add")
+        X_t = local_polynomial_design(treated_df["X_centered"], order)
+        X_c = local_polynomial_design(control_df["X_centered"], order)
 
         y_t = treated_df[self.outcome_var].to_numpy(dtype=float)
         y_c = control_df[self.outcome_var].to_numpy(dtype=float)
 
         # ---- Fit WLS with HC2 robust covariance ----
-        model_t = sm.WLS(y_t, X_t, weights=w_t).fit(cov_type="HC2")
-        model_c = sm.WLS(y_c, X_c, weights=w_c).fit(cov_type="HC2")
+        params_t, bse_t = wls_hc2(X_t, y_t, w_t)
+        params_c, bse_c = wls_hc2(X_c, y_c, w_c)
 
         # Intercept is constant term (index 0)
-        tau = float(model_t.params[0] - model_c.params[0])
-        se_tau = float(np.sqrt((model_t.bse[0] ** 2) + (model_c.bse[0] ** 2)))
+        tau = float(params_t[0] - params_c[0])
+        se_tau = float(np.sqrt((bse_t[0] ** 2) + (bse_c[0] ** 2)))
 
         if not np.isfinite(se_tau) or se_tau <= 0:
             raise ValueError(
@@ -336,32 +344,26 @@ class RDEstimator:
         w_a = triangular_kernel(asgn_df["X_centered"], h)
         w_c = triangular_kernel(ctrl_df["X_centered"], h)
 
-        X_a = sm.add_constant(
-            create_polynomial_features(asgn_df["X_centered"], order=order),
-            has_constant="add",
-        )
-        X_c = sm.add_constant(
-            create_polynomial_features(ctrl_df["X_centered"], order=order),
-            has_constant="add",
-        )
+        X_a = local_polynomial_design(asgn_df["X_centered"], order)
+        X_c = local_polynomial_design(ctrl_df["X_centered"], order)
 
         # ---- Reduced form: Sharp RD on outcome Y ----
         y_a = asgn_df[self.outcome_var].to_numpy(dtype=float)
         y_c = ctrl_df[self.outcome_var].to_numpy(dtype=float)
-        m_a_Y = sm.WLS(y_a, X_a, weights=w_a).fit(cov_type="HC2")
-        m_c_Y = sm.WLS(y_c, X_c, weights=w_c).fit(cov_type="HC2")
+        params_a_Y, bse_a_Y = wls_hc2(X_a, y_a, w_a)
+        params_c_Y, bse_c_Y = wls_hc2(X_c, y_c, w_c)
 
-        tau_Y = float(m_a_Y.params[0] - m_c_Y.params[0])
-        se_Y = float(np.sqrt(m_a_Y.bse[0] ** 2 + m_c_Y.bse[0] ** 2))
+        tau_Y = float(params_a_Y[0] - params_c_Y[0])
+        se_Y = float(np.sqrt(bse_a_Y[0] ** 2 + bse_c_Y[0] ** 2))
 
         # ---- First stage: Sharp RD on treatment receipt D ----
         d_a = asgn_df[treatment_var].to_numpy(dtype=float)
         d_c = ctrl_df[treatment_var].to_numpy(dtype=float)
-        m_a_D = sm.WLS(d_a, X_a, weights=w_a).fit(cov_type="HC2")
-        m_c_D = sm.WLS(d_c, X_c, weights=w_c).fit(cov_type="HC2")
+        params_a_D, bse_a_D = wls_hc2(X_a, d_a, w_a)
+        params_c_D, bse_c_D = wls_hc2(X_c, d_c, w_c)
 
-        tau_D = float(m_a_D.params[0] - m_c_D.params[0])
-        se_D = float(np.sqrt(m_a_D.bse[0] ** 2 + m_c_D.bse[0] ** 2))
+        tau_D = float(params_a_D[0] - params_c_D[0])
+        se_D = float(np.sqrt(bse_a_D[0] ** 2 + bse_c_D[0] ** 2))
 
         if abs(tau_D) < 1e-10:
             raise ValueError(
@@ -431,7 +433,12 @@ class RDEstimator:
             },
         }
 
-    def sensitivity_analysis(self, n_bandwidths: int = 20) -> Dict[str, Any]:
+    def sensitivity_analysis(
+        self,
+        n_bandwidths: int = 20,
+        parallel: bool = False,
+        optimal_bandwidth: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
         """
         Sensitivity analysis over a bandwidth grid.
 
@@ -439,62 +446,130 @@ class RDEstimator:
           0.3*h_opt .. 2.5*h_opt  (n_bandwidths points)
 
         For each bandwidth, runs estimate() and returns results suitable for
-        plotting.
+        plotting. With ``parallel=True`` the independent fits are spread over
+        a shared process pool (falls back to in-process if the pool fails).
+        ``optimal_bandwidth`` may carry a precomputed
+        calculate_optimal_bandwidth() result to avoid recomputing it.
         """
-        if n_bandwidths is None or int(n_bandwidths) < 5:
-            raise ValueError("n_bandwidths must be at least 5.")
-
-        opt = self.calculate_optimal_bandwidth()
-        h_opt = float(opt["bandwidth"])
+        opt, hs, arrays = self._sensitivity_setup(n_bandwidths, optimal_bandwidth)
+        x_centered, y_sorted, design = arrays
 
-        hs = np.linspace(0.3 * h_opt, 2.5 * h_opt, int(n_bandwidths))
-
-        results: list[Dict[str, Any]] = []
-        effects: list[float] = []
-
-        for h in hs:
+        fits: Optional[list[Dict[str, Any]]] = None
+        if parallel:
+            # One chunk per worker: pickle memoizes the arrays within a chunk.
+            chunksize = max(1, -(-len(hs) // _sensitivity_workers()))
             try:
-                est = self.estimate(bandwidth=float(h), polynomial_order=1)
-                results.append(
-                    {
-                        "bandwidth": float(h),
-                        "treatment_effect": est["treatment_effect"],
-                        "ci_lower": est["ci_lower"],
-                        "ci_upper": est["ci_upper"],
-                        "se": est["se"],
-                        "p_value": est["p_value"],
-                        "n_total": est["n_total"],
-                    }
-                )
-                effects.append(float(est["treatment_effect"]))
-            except Exception as e:
-                results.append(
-                    {
-                        "bandwidth": float(h),
-                        "treatment_effect": None,
-                        "ci_lower": None,
-                        "ci_upper": None,
-                        "se": None,
-                        "p_value": None,
-                        "n_total": None,
-                        "error": str(e),
-                    }
-                )
+                fits = list(_get_sensitivity_pool().map(
+                    _fit_sensitivity_bandwidth,
+                    [x_centered] * len(hs),
+                    [y_sorted] * len(hs),
+                    [self.treatment_side] * len(hs),
+                    hs,
+                    [design] * len(hs),
+                    chunksize=chunksize,
+                ))
+            except BrokenProcessPool:
+                _reset_sensitivity_pool()
+        if fits is None:
+            fits = [
+                _fit_sensitivity_bandwidth(x_centered, y_sorted, self.treatment_side, h, design)
+                for h in hs
+            ]
+
+        return self.summarize_sensitivity(_sensitivity_rows(fits), opt)
+
+    def iter_sensitivity(
+        self,
+        n_bandwidths: int = 20,
+        parallel: bool = False,
+        optimal_bandwidth: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of sensitivity_analysis(): yields one result row
+        per bandwidth as soon as its fit finishes.
 
+        With ``parallel=True`` rows arrive in completion order, not grid
+        order. Pass the collected rows to summarize_sensitivity() for the
+        stability summary.
+        """
+        opt, hs, arrays = self._sensitivity_setup(n_bandwidths, optimal_bandwidth)
+        x_centered, y_sorted, design = arrays
+
+        remaining = list(hs)
+        if parallel:
+            # Several small chunks per worker so early rows are not held back
+            # behind a worker's whole share of the grid.
+            size = max(1, len(hs) // (_sensitivity_workers() * 4))
+            chunks = [hs[i:i + size] for i in range(0, len(hs), size)]
+            try:
+                pool = _get_sensitivity_pool()
+                futures = {
+                    pool.submit(
+                        _fit_sensitivity_chunk,
+                        x_centered, y_sorted, self.treatment_side, chunk, design,
+                    ): chunk
+                    for chunk in chunks
+                }
+                for future in as_completed(futures):
+                    for fit in future.result():
+                        remaining.remove(fit["bandwidth"])
+                        yield _sensitivity_rows([fit])[0]
+            except BrokenProcessPool:
+                _reset_sensitivity_pool()
+        for h in remaining:
+            fit = _fit_sensitivity_bandwidth(x_centered, y_sorted, self.treatment_side, h, design)
+            yield _sensitivity_rows([fit])[0]
+
+    @staticmethod
+    def summarize_sensitivity(
+        results: list[Dict[str, Any]],
+        optimal_bandwidth: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Assemble the sensitivity_analysis() payload from finished result rows."""
+        effects = np.array(
+            [r["treatment_effect"] for r in results if r["treatment_effect"] is not None],
+            dtype=float,
+        )
         stability = _stability_from_effects(effects)
 
         return {
             "results": results,
-            "optimal_bandwidth": h_opt,
+            "optimal_bandwidth": float(optimal_bandwidth["bandwidth"]),
             "stability_coefficient": stability["cv"],  # Deprecated, kept for API compatibility
             "stability_std": stability["std"],
             "stability_range": stability["range"],
             "stability_mean": stability["mean"],
             "interpretation": stability["interpretation"],
-            "bandwidth_method": opt.get("method"),
-            "bandwidth_warnings": opt.get("warnings", []),
+            "bandwidth_method": optimal_bandwidth.get("method"),
+            "bandwidth_warnings": optimal_bandwidth.get("warnings", []),
         }
 
+    def _sensitivity_setup(
+        self,
+        n_bandwidths: int,
+        optimal_bandwidth: Optional[Dict[str, Any]],
+    ) -> Tuple[Dict[str, Any], list[float], Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Bandwidth grid plus the sorted (x_centered, y, design) arrays every fit slices."""
+        if n_bandwidths is None or int(n_bandwidths) < 5:
+            raise ValueError("n_bandwidths must be at least 5.")
+
+        opt = optimal_bandwidth or self.calculate_optimal_bandwidth()
+        h_opt = float(opt["bandwidth"])
+
+        hs = [float(h) for h in np.linspace(0.3 * h_opt, 2.5 * h_opt, int(n_bandwidths))]
+
+        # Clean and sort once: each bandwidth is then a contiguous slice of
+        # the same two arrays, and only these are shipped to workers.
+        xy = self.data[[self.running_var, self.outcome_var]].apply(
+            pd.to_numeric, errors="coerce"
+        ).dropna().to_numpy(dtype=float)
+        sort_idx = np.argsort(xy[:, 0], kind="stable")
+        x_centered = np.ascontiguousarray(xy[sort_idx, 0] - self.cutoff)
+        y_sorted = np.ascontiguousarray(xy[sort_idx, 1])
+        # Polynomial columns are bandwidth-independent: build them once
+        design = local_polynomial_design(x_centered, 1)
+        return opt, hs, (x_centered, y_sorted, design)
+
 
     # ------------------------------------------------------------------
     # Placebo Cutoff Test
@@ -837,6 +912,118 @@ class RDEstimator:
         }
 
 
+def _sensitivity_workers() -> int:
+    return max(1, int(os.environ.get("RD_SENSITIVITY_WORKERS", os.cpu_count() or 1)))
+
+
+def _get_sensitivity_pool() -> ProcessPoolExecutor:
+    global _SENSITIVITY_POOL
+    with _SENSITIVITY_POOL_LOCK:
+        if _SENSITIVITY_POOL is None:
+            _SENSITIVITY_POOL = ProcessPoolExecutor(
+                max_workers=_sensitivity_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _SENSITIVITY_POOL
+
+
+def _reset_sensitivity_pool() -> None:
+    global _SENSITIVITY_POOL
+    with _SENSITIVITY_POOL_LOCK:
+        if _SENSITIVITY_POOL is not None:
+            _SENSITIVITY_POOL.shutdown(wait=False, cancel_futures=True)
+        _SENSITIVITY_POOL = None
+
+
+def _fit_sensitivity_bandwidth(
+    x_centered: np.ndarray,
+    y: np.ndarray,
+    treatment_side: str,
+    bandwidth: float,
+    design: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Fit one sensitivity-grid bandwidth (module-level so it can be pickled).
+
+    ``x_centered``/``y`` are the cleaned running and outcome values, centered
+    at the cutoff and sorted by running value; ``design`` is the matching
+    order-1 design shared by every bandwidth. Returns the raw fit
+    (bandwidth, effect, se, n_total); CIs and p-values are added for the
+    whole grid by _sensitivity_rows(). Failures are reported in the fit
+    rather than raised, so one bad bandwidth does not abort the sweep.
+    """
+    try:
+        tau, se, _, _, n_total = sharp_rd_fit_sorted(
+            x_centered, y, bandwidth, order=1, treatment_side=treatment_side,
+            design=design,
+        )
+        if not np.isfinite(se) or se <= 0:
+            raise ValueError(
+                "Standard error could not be computed reliably. "
+                "Try a different bandwidth."
+            )
+        return {"bandwidth": bandwidth, "treatment_effect": tau, "se": se, "n_total": n_total}
+    except Exception as e:
+        return {"bandwidth": bandwidth, "error": str(e)}
+
+
+def _fit_sensitivity_chunk(
+    x_centered: np.ndarray,
+    y: np.ndarray,
+    treatment_side: str,
+    bandwidths: list[float],
+    design: Optional[np.ndarray] = None,
+) -> list[Dict[str, Any]]:
+    """Fit several grid bandwidths in one task (arrays are pickled once per chunk)."""
+    return [
+        _fit_sensitivity_bandwidth(x_centered, y, treatment_side, h, design)
+        for h in bandwidths
+    ]
+
+
+def _sensitivity_rows(fits: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    """
+    Turn raw sweep fits into response rows.
+
+    Normal-approximation CIs and p-values are computed for the whole grid in
+    one vectorized pass.
+    """
+    ok = np.array(["error" not in f for f in fits], dtype=bool)
+    te = np.array([f.get("treatment_effect", np.nan) for f in fits], dtype=float)
+    se = np.array([f.get("se", np.nan) for f in fits], dtype=float)
+
+    z_crit = float(norm.ppf(0.975))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ci_lower = te - z_crit * se
+        ci_upper = te + z_crit * se
+        p_values = 2.0 * norm.sf(np.abs(te / se))
+
+    rows: list[Dict[str, Any]] = []
+    for i, fit in enumerate(fits):
+        if not ok[i]:
+            rows.append({
+                "bandwidth": fit["bandwidth"],
+                "treatment_effect": None,
+                "ci_lower": None,
+                "ci_upper": None,
+                "se": None,
+                "p_value": None,
+                "n_total": None,
+                "error": fit["error"],
+            })
+            continue
+        rows.append({
+            "bandwidth": fit["bandwidth"],
+            "treatment_effect": float(te[i]),
+            "ci_lower": float(ci_lower[i]),
+            "ci_upper": float(ci_upper[i]),
+            "se": float(se[i]),
+            "p_value": float(p_values[i]),
+            "n_total": fit["n_total"],
+        })
+    return rows
+
+
 def _empty_placebo_cutoff_result(message: str) -> Dict[str, Any]:
     return {
         "placebo_estimates":   [],
@@ -866,7 +1053,7 @@ def _empty_density_result(message: str) -> Dict[str, Any]:
     }
 
 
-def _stability_from_effects(effects: list[float]) -> Dict[str, Any]:
+def _stability_from_effects(effects: Sequence[float]) -> Dict[str, Any]:
     """
     Assess stability of treatment effects across bandwidth choices.
 
@@ -1,6 +1,5 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
 from werkzeug.routing import IntegerConverter
 from datetime import timedelta
 import os
@@ -10,6 +9,9 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+# INFO in production; set LOG_LEVEL=DEBUG to see per-request analysis traces
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+
 app = Flask(__name__)
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,11 @@ class SignedIntConverter(IntegerConverter):
 
 app.url_map.converters['int'] = SignedIntConverter
 
+# --- JSON ---
+# Serialize every jsonify() response (and parse request bodies) with orjson
+from utils.json_provider import ORJSONProvider  # noqa: E402
+app.json = ORJSONProvider(app)
+
 # --- CORS Configuration ---
 allowed_origins = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000')
 # Split by comma and strip whitespace from each origin
@@ -55,8 +62,9 @@ if not JWT_REFRESH_TOKEN_EXPIRES:
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(seconds=int(JWT_ACCESS_TOKEN_EXPIRES))
 app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(seconds=int(JWT_REFRESH_TOKEN_EXPIRES))
 
-# Initialize JWT
-jwt = JWTManager(app)
+# Initialize JWT (verified claims are cached briefly per process, see utils/jwt_cache.py)
+from utils.jwt_cache import CachingJWTManager  # noqa: E402
+jwt = CachingJWTManager(app)
 
 # --- Database Configuration ---
 # Supabase: Project Settings → Database → Connection string (URI)
@@ -75,6 +83,10 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_recycle': 300,     # Recycle connections every 5 min
 }
 
+# --- Uploads ---
+# Reject oversize request bodies before any handler buffers them (CSV uploads are capped at 10MB)
+app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
+
 # Import db from models and initialize it
 from models import db  # noqa: E402
 db.init_app(app)
@@ -121,6 +133,12 @@ def handle_rate_limit(error):
     return response
 
 
+@app.errorhandler(413)
+def handle_request_too_large(error):
+    """Return a JSON error when a request body exceeds MAX_CONTENT_LENGTH."""
+    return jsonify({"error": "File size too large. Maximum size is 10MB"}), 413
+
+
 @app.errorhandler(500)
 def handle_500(error):
     """Avoid leaking internal error details in production."""
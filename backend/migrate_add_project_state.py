@@ -67,6 +67,16 @@ def run_migration():
                 "ALTER TABLE projects ADD COLUMN updated_at TIMESTAMP"
             )
         
+        if 'analysis_config_hash' not in columns:
+            migrations_needed.append(
+                "ALTER TABLE projects ADD COLUMN analysis_config_hash VARCHAR(32)"
+            )
+        
+        if 'last_results_hash' not in columns:
+            migrations_needed.append(
+                "ALTER TABLE projects ADD COLUMN last_results_hash VARCHAR(32)"
+            )
+        
         if not migrations_needed:
             print("✓ All columns already exist. No migration needed.")
             return
@@ -16,6 +16,13 @@ ALTER TABLE projects ADD COLUMN IF NOT EXISTS last_results JSONB;
 -- Add updated_at column (tracks when project was last modified)
 ALTER TABLE projects ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
 
+-- Add fingerprints of analysis_config / last_results (autosave skips unchanged writes)
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS analysis_config_hash VARCHAR(32);
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS last_results_hash VARCHAR(32);
+
 -- Optional: Create an index on updated_at for faster sorting
 CREATE INDEX IF NOT EXISTS idx_projects_updated_at ON projects(updated_at DESC NULLS LAST);
 
+
+-- Composite index for owner-scoped project lookups (WHERE id = ? AND user_id = ?)
+CREATE INDEX IF NOT EXISTS idx_projects_id_user_id ON projects(id, user_id);
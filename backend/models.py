@@ -1,10 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, select, union
+from sqlalchemy.dialects.postgresql import JSONB
 from werkzeug.security import check_password_hash
 from datetime import datetime, date
 
 # Initialize db here to avoid circular imports
 db = SQLAlchemy()
 
+# JSONB on PostgreSQL (matches migration_manual.sql), plain JSON elsewhere (tests use SQLite)
+JSONVariant = db.JSON().with_variant(JSONB(), 'postgresql')
+
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -27,9 +32,7 @@ class User(db.Model):
             'id': self.id,
             'username': self.username,
             'email': self.email,
-            'created_at': (
-                self.created_at.isoformat() if self.created_at else None
-            )
+            'created_at': self.created_at
         }
 
     def __repr__(self):
@@ -55,22 +58,45 @@ class Project(db.Model):
     # Progress tracking fields
     current_step = db.Column(db.String(50), nullable=True, default='projects')  # projects, method, variables, results
     selected_method = db.Column(db.String(50), nullable=True)  # did, rdd, iv
-    analysis_config = db.Column(db.JSON, nullable=True)  # Stores variable selections, time periods, etc.
-    last_results = db.Column(db.JSON, nullable=True)  # Stores last analysis results
+    analysis_config = db.Column(JSONVariant, nullable=True)  # Stores variable selections, time periods, etc.
+    last_results = db.Column(JSONVariant, nullable=True)  # Stores last analysis results
+    # Fingerprints of the two JSON columns, so autosave can skip unchanged writes
+    analysis_config_hash = db.Column(db.String(32), nullable=True)
+    last_results_hash = db.Column(db.String(32), nullable=True)
     updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Many-to-many relationship with datasets through junction table
-    datasets = db.relationship('Dataset', secondary=project_datasets, lazy='subquery', backref=db.backref('projects', lazy=True))
+    # (selectin: one batched IN query for all loaded projects, no re-run of the parent query)
+    datasets = db.relationship('Dataset', secondary=project_datasets, lazy='selectin', backref=db.backref('projects', lazy=True))
     # Keep backward compatibility with old project_id relationship
     _legacy_datasets = db.relationship('Dataset', backref='project', lazy=True, foreign_keys='[Dataset.project_id]')
     analyses = db.relationship('Analysis', backref='project', lazy=True)
     
+    __table_args__ = (
+        # Owner-scoped lookups: WHERE id = :id AND user_id = :uid
+        db.Index('idx_projects_id_user_id', 'id', 'user_id'),
+    )
+    
+    def counts(self):
+        """
+        (datasets_count, analyses_count) in one aggregate query.
+
+        Datasets linked through the junction table and the legacy project_id
+        column are counted once (UNION); no collection is loaded.
+        """
+        dataset_ids = union(
+            select(project_datasets.c.dataset_id).where(project_datasets.c.project_id == self.id),
+            select(Dataset.id).where(Dataset.project_id == self.id),
+        ).subquery()
+        datasets_count = select(func.count()).select_from(dataset_ids).scalar_subquery()
+        analyses_count = (
+            select(func.count(Analysis.id)).where(Analysis.project_id == self.id).scalar_subquery()
+        )
+        return tuple(db.session.execute(select(datasets_count, analyses_count)).one())
+
     def to_dict(self):
         """Convert project to dictionary for JSON serialization"""
-        # Combine datasets from many-to-many relationship and legacy project_id relationship
-        datasets_from_m2m = {ds.id for ds in self.datasets}
-        legacy_dataset_ids = {ds.id for ds in self._legacy_datasets}
-        all_dataset_ids = datasets_from_m2m | legacy_dataset_ids
+        datasets_count, analyses_count = self.counts()
         
         return {
             'id': self.id,
@@ -81,9 +107,9 @@ class Project(db.Model):
             'selected_method': self.selected_method,
             'analysis_config': self.analysis_config,
             'last_results': self.last_results,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'datasets_count': len(all_dataset_ids),
-            'analyses_count': len(self.analyses)
+            'updated_at': self.updated_at,
+            'datasets_count': datasets_count,
+            'analyses_count': analyses_count
         }
 
 
@@ -117,7 +143,23 @@ class Dataset(db.Model):
             'file_name': self.file_name,
             's3_key': self.s3_key,
             'schema_info': self.schema_info,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at
+        }
+
+    def to_summary_dict(self):
+        """
+        to_dict for list views, which defer schema_info: the key is kept
+        (as None) so the shape matches, without loading the JSON column.
+        """
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'project_id': self.project_id,
+            'name': self.name,
+            'file_name': self.file_name,
+            's3_key': self.s3_key,
+            'schema_info': None,
+            'created_at': self.created_at
         }
 
 
@@ -136,6 +178,19 @@ class Analysis(db.Model):
     results = db.Column(db.JSON, nullable=True)
     ai_summary = db.Column(db.Text, nullable=True)
 
+    def to_dict(self):
+        """Convert analysis to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'dataset_id': self.dataset_id,
+            'method': self.method,
+            'status': self.status,
+            'config': self.config,
+            'results': self.results,
+            'ai_summary': self.ai_summary
+        }
+
 
 class AIUsageLog(db.Model):
     """Tracks daily AI API calls per user for usage-limit enforcement."""
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Pre-fill the AI assistant's response cache for common concept explanations
+through the Gemini Batch API (half price). Run nightly, e.g. from cron:
+
+    0 3 * * * cd /app/backend && python prewarm_ai_cache.py
+
+Needs REDIS_URL so the web workers see the cached answers; without it the
+cache only lives in this process and the run is wasted.
+"""
+
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.ai_assistant import get_ai_assistant  # noqa: E402
+
+if not os.environ.get('REDIS_URL'):
+    print("REDIS_URL is not set; nothing would be shared with the web workers.")
+    sys.exit(1)
+
+level = sys.argv[1] if len(sys.argv) > 1 else 'beginner'
+cached = get_ai_assistant().prewarm_concepts(user_level=level)
+print(f"✓ {cached} concept explanations cached for level '{level}'")
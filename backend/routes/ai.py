@@ -6,7 +6,8 @@ Focused on results interpretation
 import os
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request
+import orjson
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from models import db, AIUsageLog
@@ -508,6 +509,49 @@ def data_quality_check():
         return jsonify({"error": f"AI data quality check failed: {str(e)}"}), 500
 
 
+# Longest chat reply returned to the client, in characters
+CHAT_MAX_RESPONSE_LENGTH = 4000
+_CHAT_TRUNCATION_NOTE = "...\n\n[Response truncated due to length limit]"
+
+
+def _truncate_chat_response(text: str) -> str:
+    if len(text) > CHAT_MAX_RESPONSE_LENGTH:
+        return text[:CHAT_MAX_RESPONSE_LENGTH] + _CHAT_TRUNCATION_NOTE
+    return text
+
+
+def _stream_chat(events, now):
+    """
+    NDJSON body for a streamed chat reply.
+
+    Emits {"type": "delta", "text": ...} lines as the reply is generated
+    (cut off at CHAT_MAX_RESPONSE_LENGTH), then one {"type": "done", ...} line
+    with the same fields as the JSON response. Failures after the stream has
+    started are reported as a final {"type": "error"} line.
+    """
+    def line(obj):
+        return orjson.dumps(obj) + b'\n'
+
+    sent = 0
+    try:
+        for event in events:
+            if event["type"] == "delta":
+                text = event["text"][:max(0, CHAT_MAX_RESPONSE_LENGTH - sent)]
+                if text:
+                    sent += len(text)
+                    yield line({"type": "delta", "text": text})
+            else:
+                yield line({
+                    "type": "done",
+                    "response": _truncate_chat_response(event.get("response", "")),
+                    "followup_questions": event.get("followup_questions", []),
+                    "timestamp": now.isoformat()
+                })
+    except Exception as e:
+        print(f"ERROR: Chat failed: {str(e)}")
+        yield line({"type": "error", "error": f"Chat failed: {str(e)}"})
+
+
 @ai_bp.route('/chat', methods=['POST'])
 @jwt_required()
 @limiter.limit("20 per minute; 200 per hour")
@@ -528,6 +572,9 @@ def chat():
         }
     }
 
+    With "Accept: application/x-ndjson" the reply is streamed as it is
+    generated (see _stream_chat).
+
     Rate limit: 20 requests per minute (via flask-limiter) +
                 AI_DAILY_LIMIT_CHAT requests per day (via db usage log).
     """
@@ -590,6 +637,24 @@ def chat():
         except Exception as e:
             return jsonify({"error": f"AI service error: {str(e)}"}), 500
         
+        # Clients that ask for NDJSON get the reply as it is generated
+        wants_stream = request.accept_mimetypes.best_match(
+            ['application/json', 'application/x-ndjson']
+        ) == 'application/x-ndjson'
+        if wants_stream:
+            return Response(
+                stream_with_context(_stream_chat(
+                    assistant.chat_stream(
+                        user_message=message,
+                        conversation_history=conversation_history,
+                        analysis_context=analysis_context,
+                        dataset_info=dataset_info
+                    ),
+                    now
+                )),
+                mimetype='application/x-ndjson'
+            )
+
         # Call chat method
         try:
             result = assistant.chat(
@@ -599,14 +664,8 @@ def chat():
                 dataset_info=dataset_info
             )
             
-            # Limit response length (max 4000 characters)
-            MAX_RESPONSE_LENGTH = 4000
-            response_text = result.get('response', '')
-            if len(response_text) > MAX_RESPONSE_LENGTH:
-                response_text = response_text[:MAX_RESPONSE_LENGTH] + "...\n\n[Response truncated due to length limit]"
-            
             return jsonify({
-                "response": response_text,
+                "response": _truncate_chat_response(result.get('response', '')),
                 "followup_questions": result.get('followup_questions', []),
                 "timestamp": now.isoformat()
             }), 200
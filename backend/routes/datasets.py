@@ -3,24 +3,38 @@ Dataset-specific routes.
 Handles dataset schema and analysis endpoints.
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import logging
 import os
-import boto3
+from botocore.exceptions import ClientError
 import pandas as pd
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import base64
+import functools
+import hashlib
 from io import BytesIO
 from scipy.stats import t, norm
 import math
+import zlib
+import orjson
+from sqlalchemy.orm import joinedload
 from models import Dataset
 from utils.did_analysis import check_parallel_trends, run_placebo_test
 from analysis.rd_analysis import RDEstimator
+from analysis.rd_bandwidth import imbens_kalyanaraman_bandwidth
 from analysis.iv_analysis import IVEstimator
 from sample_data_utils import get_sample_dataset_by_id, get_sample_file_path
+from utils.dataset_cache import dataset_cache
+from utils import response_cache
+from utils.s3 import S3_BUCKET_NAME, dataset_results_prefix, s3_client
+from utils.json_provider import DUMPS_OPTIONS, orjson_default
+from utils.request_schemas import RDParams, RDSensitivityParams, parse_body
+
+logger = logging.getLogger(__name__)
 
 # Create blueprint
 datasets_bp = Blueprint('datasets', __name__, url_prefix='/api/datasets')
@@ -48,6 +62,21 @@ def sanitize_for_json(obj):
         return obj
 
 
+def _json_response(data, status=200):
+    """
+    Serialize a response body with orjson in a single pass.
+
+    Replaces sanitize_for_json + jsonify: orjson already emits NaN/Inf as
+    null and serializes numpy scalars and arrays.
+    """
+    body = orjson.dumps(
+        data,
+        default=orjson_default,
+        option=DUMPS_OPTIONS,
+    )
+    return Response(body, status=status, mimetype='application/json')
+
+
 def create_did_chart(df, outcome_var, time_var, treatment_start, start_period, end_period, unit_var, treatment_units, control_units):
     """Create a matplotlib chart for DiD analysis using unit-based assignment.
     Returns both PNG (base64) and structured data for interactive charts."""
@@ -64,8 +93,9 @@ def create_did_chart(df, outcome_var, time_var, treatment_start, start_period, e
         
         # Filter data to analysis period
         df_filtered = df[(df[time_var] >= start_period) & (df[time_var] <= end_period)].copy()
-        print(f"Chart: Filtered data from {start_period} to {end_period}, rows: {len(df_filtered)}")
-        print(f"Chart: Unique time periods: {sorted(df_filtered[time_var].unique())}")
+        logger.debug("Chart: Filtered data from %s to %s, rows: %s", start_period, end_period, len(df_filtered))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Chart: Unique time periods: %s", sorted(df_filtered[time_var].unique()))
         
         # Use unit-based treatment assignment (same as main analysis)
         if treatment_units and control_units:
@@ -73,7 +103,7 @@ def create_did_chart(df, outcome_var, time_var, treatment_start, start_period, e
             df_filtered = df_filtered[df_filtered[unit_var].isin(treatment_units + control_units)]
             # Create treatment indicator based on selected units
             df_filtered['is_treated'] = df_filtered[unit_var].isin(treatment_units).astype(int)
-            print(f"Chart: After unit filtering, rows: {len(df_filtered)}")
+            logger.debug("Chart: After unit filtering, rows: %s", len(df_filtered))
         else:
             # Fallback: if units not specified, assume 'is_treated' is already correctly set in df
             # (it is set in run_did_analysis)
@@ -84,8 +114,9 @@ def create_did_chart(df, outcome_var, time_var, treatment_start, start_period, e
         
         # Calculate means by group and time period
         time_series_data = df_filtered.groupby([time_var, 'is_treated'])[outcome_var].mean().reset_index()
-        print(f"Chart: Time series data shape: {time_series_data.shape}")
-        print(f"Chart: Time series unique periods: {sorted(time_series_data[time_var].unique())}")
+        logger.debug("Chart: Time series data shape: %s", time_series_data.shape)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Chart: Time series unique periods: %s", sorted(time_series_data[time_var].unique()))
         
         # Separate treated and control groups
         treated_data = time_series_data[time_series_data['is_treated'] == 1].sort_values(time_var)
@@ -200,7 +231,7 @@ def create_did_chart(df, outcome_var, time_var, treatment_start, start_period, e
         chart_base64 = base64.b64encode(buffer.getvalue()).decode()
         plt.close()
         
-        print(f"Chart created successfully, size: {len(chart_base64)} characters")
+        logger.debug("Chart created successfully, size: %s characters", len(chart_base64))
         # Sanitize chart_data to ensure all numpy types are converted to native Python types
         if chart_data:
             chart_data = sanitize_for_json(chart_data)
@@ -210,9 +241,7 @@ def create_did_chart(df, outcome_var, time_var, treatment_start, start_period, e
         }
         
     except Exception as e:
-        print(f"Error creating chart: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating chart: %s", e)
         return None
 
 
@@ -311,27 +340,255 @@ def create_pretreatment_trends_chart(df, outcome_var, time_var, treatment_var,
         chart_base64 = base64.b64encode(buffer.getvalue()).decode()
         plt.close()
         
-        print(f"Pre-treatment trends chart created, size: {len(chart_base64)} characters")
+        logger.debug("Pre-treatment trends chart created, size: %s characters", len(chart_base64))
         return chart_base64
         
     except Exception as e:
-        print(f"Error creating pre-treatment trends chart: {str(e)}")
+        logger.warning("Error creating pre-treatment trends chart: %s", e)
         return None
 
 
-# Get S3 configuration from environment
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
-S3_BUCKET_NAME = os.environ.get('AWS_S3_BUCKET_NAME')
+def _shrink_dtypes(df):
+    """
+    Downcast numeric columns to the narrowest dtype that holds them exactly.
+
+    Integers go to the smallest fitting int type; floats go to float32 only
+    when every value round-trips unchanged, so estimates are unaffected.
+    Object columns are left alone because the estimators coerce them with
+    pd.to_numeric.
+    """
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+            narrowed = series.astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+                df[col] = narrowed
+    return df
+
+
+def _dataset_etag(s3_key):
+    """ETag of the stored object; identifies one version of an upload."""
+    return s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=s3_key)['ETag']
+
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _csv_compression(head):
+    """
+    pandas ``compression`` for an object whose bytes start with ``head``.
+
+    Uploads are stored gzip-encoded; presigned uploads, sample copies and
+    older objects are plain CSV, so the format is sniffed, not assumed.
+    """
+    return 'gzip' if head[:2] == _GZIP_MAGIC else None
+
+
+def _read_local_csv(path):
+    """pd.read_csv for a downloaded dataset file, plain or gzip-encoded."""
+    with open(path, 'rb') as f:
+        head = f.read(2)
+    return pd.read_csv(path, compression=_csv_compression(head))
 
-# Configure S3 client
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
+
+def _load_dataset(s3_key, columns=None, etag=None):
+    """
+    Load a dataset CSV from S3 as a DataFrame.
+
+    The parsed frame is cached per (s3_key, ETag, columns), so repeated
+    analyses of the same upload skip the download and parse. A cheap HEAD
+    request keeps the cache honest if the object is ever replaced. Callers
+    receive a shallow copy and must not mutate column values in place.
+
+    When ``columns`` is given only those columns are parsed; any that are
+    absent from the file are simply missing from the result, so callers keep
+    validating against ``df.columns`` as before. Pass ``etag`` when the
+    caller already has it to skip the HEAD request.
+    """
+    if etag is None:
+        etag = _dataset_etag(s3_key)
+    wanted = frozenset(columns) if columns else None
+    cache_key = (s3_key, etag, wanted)
+    df = dataset_cache.get(cache_key)
+    if df is not None:
+        return df
+
+    # Pull the whole object in one bulk read (socket I/O runs without the
+    # GIL) and parse from memory, rather than letting the parser pull small
+    # chunks through botocore's Python stream; uploads are capped at 10MB.
+    obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+    with obj['Body'] as body:
+        data = body.read()
+    raw = BytesIO(data)
+    compression = _csv_compression(data)
+    if wanted is None:
+        df = pd.read_csv(raw, compression=compression)
+    else:
+        df = pd.read_csv(raw, compression=compression, usecols=lambda col: col in wanted)
+
+    df = _shrink_dtypes(df)
+    dataset_cache.put(cache_key, df)
+    return df.copy(deep=False)
+
+
+_HEADER_RANGE_BYTES = 64 * 1024
+
+
+@functools.lru_cache(maxsize=1024)
+def _dataset_columns(s3_key, etag):
+    """
+    Column names of one dataset version, read from the start of the object.
+
+    Only the first 64KB are fetched (ranged GET), so endpoints can reject a
+    misspelled column before downloading and parsing the whole file. Names
+    are parsed by pandas and therefore match what _load_dataset produces.
+    Memoized per ETag.
+    """
+    obj = s3_client.get_object(
+        Bucket=S3_BUCKET_NAME, Key=s3_key, Range=f'bytes=0-{_HEADER_RANGE_BYTES - 1}'
+    )
+    with obj['Body'] as body:
+        head = body.read()
+    compression = _csv_compression(head)
+    full_range = len(head) >= _HEADER_RANGE_BYTES
+    if compression:
+        # A prefix of a gzip stream still inflates to a prefix of the CSV
+        head = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16).decompress(head)
+    if b'\n' not in head and full_range:
+        # Header row is longer than the range: stream until it ends instead
+        obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+        with obj['Body'] as body:
+            return tuple(pd.read_csv(body, nrows=0, compression=compression).columns)
+    return tuple(pd.read_csv(BytesIO(head), nrows=0).columns)
+
+
+BANDWIDTH_CACHE_TTL = 30 * 24 * 3600  # seconds; keys embed the ETag, so never stale
+
+
+@functools.lru_cache(maxsize=1024)
+def _optimal_bandwidth(s3_key, etag, running_var, outcome_var, cutoff):
+    """
+    Imbens-Kalyanaraman bandwidth for one dataset version and RD spec.
+
+    The IK bandwidth depends only on the data and (running_var, outcome_var,
+    cutoff), so it is memoized per ETag: in-process, and in the shared Redis
+    response cache when REDIS_URL is set, so other workers and restarted
+    processes skip both the download and the solve. Failures are not cached.
+    Callers must treat the returned dict as read-only.
+    """
+    shared_key = None
+    if response_cache.enabled():
+        spec = orjson.dumps([s3_key, etag, running_var, outcome_var, cutoff])
+        shared_key = f"rd_bw:{hashlib.sha256(spec).hexdigest()[:32]}"
+        cached = response_cache.get(shared_key)
+        if cached is not None:
+            return orjson.loads(cached)
+
+    df = _load_dataset(s3_key, columns=[running_var, outcome_var], etag=etag)
+    result = imbens_kalyanaraman_bandwidth(
+        data=df,
+        running_var=running_var,
+        outcome_var=outcome_var,
+        cutoff=cutoff,
+    )
+    response_cache.put(
+        shared_key,
+        orjson.dumps(result, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY).decode(),
+        ttl=BANDWIDTH_CACHE_TTL,
+    )
+    return result
+
+
+def _sensitivity_result_key(s3_key, etag, running_var, outcome_var, cutoff, n_bandwidths, treatment_side):
+    """S3 key for a persisted sensitivity result of one dataset version and spec."""
+    spec = orjson.dumps([running_var, outcome_var, cutoff, n_bandwidths, treatment_side])
+    digest = hashlib.sha256(spec).hexdigest()[:32]
+    version = etag.strip('"')
+    return f"{dataset_results_prefix(s3_key)}{version}_{digest}.json"
+
+
+def _load_sensitivity_result(result_key):
+    """Return a previously persisted sensitivity result, or None if absent."""
+    try:
+        obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=result_key)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+            return None
+        raise
+    with obj['Body'] as body:
+        return orjson.loads(body.read())
+
+
+def _store_sensitivity_result(result_key, result):
+    """Persist a sensitivity result; failures only cost a recompute next time."""
+    try:
+        s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=result_key,
+            Body=orjson.dumps(result, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY),
+            ContentType='application/json'
+        )
+    except Exception as e:
+        logger.warning("Failed to persist sensitivity result: %s", e)
+
+
+def _sensitivity_response(dataset_id, parameters, result):
+    """Response body for a finished sensitivity sweep."""
+    return {
+        'analysis_type': 'rd_sensitivity',
+        'dataset_id': dataset_id,
+        'parameters': parameters,
+        'results': result['results'],
+        'optimal_bandwidth': result['optimal_bandwidth'],
+        'stability_coefficient': result['stability_coefficient'],
+        'stability_std': result.get('stability_std'),
+        'stability_range': result.get('stability_range'),
+        'stability_mean': result.get('stability_mean'),
+        'interpretation': result['interpretation'],
+        'bandwidth_method': result.get('bandwidth_method'),
+        'bandwidth_warnings': result.get('bandwidth_warnings', [])
+    }
+
+
+def _stream_sensitivity(rd, dataset_id, parameters, result, result_key, optimal_bandwidth):
+    """
+    NDJSON body for a sensitivity sweep.
+
+    Emits {"type": "result", "result": row} per bandwidth as each fit
+    finishes (completion order), then one {"type": "summary", ...} line with
+    the rest of the usual response. Failures after the stream has started
+    are reported as a final {"type": "error"} line.
+    """
+    def line(obj):
+        return orjson.dumps(obj, default=orjson_default, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n'
+
+    try:
+        if result is None:
+            rows = []
+            for row in rd.iter_sensitivity(
+                n_bandwidths=parameters['n_bandwidths'],
+                parallel=True,
+                optimal_bandwidth=optimal_bandwidth,
+            ):
+                rows.append(row)
+                yield line({"type": "result", "result": row})
+            rows.sort(key=lambda r: r['bandwidth'])
+            result = RDEstimator.summarize_sensitivity(rows, optimal_bandwidth)
+            _store_sensitivity_result(result_key, result)
+        else:
+            for row in result['results']:
+                yield line({"type": "result", "result": row})
+
+        summary = _sensitivity_response(dataset_id, parameters, result)
+        del summary['results']
+        yield line({"type": "summary", **summary})
+    except Exception as e:
+        logger.exception("Streaming sensitivity analysis failed: %s", e)
+        yield line({"type": "error", "error": f"Sensitivity analysis failed: {str(e)}"})
 
 
 @datasets_bp.route('/<int:dataset_id>/schema', methods=['GET'])
@@ -426,13 +683,6 @@ def get_dataset_schema(dataset_id):
             }), 403
 
         # Download file from S3 to analyze schema
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
-        )
-
         # Create a temporary file to download the CSV
         temp_file_path = f"/tmp/temp_dataset_{dataset_id}.csv"
         
@@ -443,7 +693,7 @@ def get_dataset_schema(dataset_id):
             )
 
             # Read CSV and analyze schema
-            df = pd.read_csv(temp_file_path)
+            df = _read_local_csv(temp_file_path)
 
             # Analyze each column
             columns_info = []
@@ -482,13 +732,13 @@ def get_dataset_schema(dataset_id):
                 unique_values = None
                 if col_type in ['categorical', 'boolean']:
                     unique_vals = col_data.dropna().unique()
-                    print(f"Column '{column}' ({col_type}): {len(unique_vals)} unique values")
+                    logger.debug("Column '%s' (%s): %s unique values", column, col_type, len(unique_vals))
                     # Increase limit to 100 for categorical columns to support state/country selection
                     if len(unique_vals) <= 100:
                         unique_values = [str(val) for val in unique_vals]
-                        print(f"  -> Providing {len(unique_values)} unique values")
+                        logger.debug("  -> Providing %s unique values", len(unique_values))
                     else:
-                        print(f"  -> Too many unique values ({len(unique_vals)}), providing first 100")
+                        logger.debug("  -> Too many unique values (%s), providing first 100", len(unique_vals))
                         # For very large categorical columns, provide first 100 values
                         unique_values = [str(val) for val in unique_vals[:100]]
                 elif col_type == 'numeric':
@@ -572,15 +822,9 @@ def get_dataset_preview(dataset_id):
                 if not has_access:
                     return jsonify({"error": "Access denied"}), 403
 
-                s3_client = boto3.client(
-                    's3',
-                    aws_access_key_id=AWS_ACCESS_KEY_ID,
-                    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-                    region_name=AWS_REGION
-                )
                 temp_file_path = f"/tmp/preview_{dataset_id}.csv"
                 s3_client.download_file(S3_BUCKET_NAME, dataset.s3_key, temp_file_path)
-                df = pd.read_csv(temp_file_path)
+                df = _read_local_csv(temp_file_path)
 
             # Validate that the DataFrame has data
             if df.empty or len(df.columns) == 0:
@@ -659,8 +903,7 @@ def get_dataset_preview(dataset_id):
                 os.remove(temp_file_path)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in get_dataset_preview: %s", e)
         return jsonify({"error": f"Failed to get preview: {str(e)}"}), 500
 
 
@@ -668,7 +911,7 @@ def get_dataset_preview(dataset_id):
 @jwt_required()
 def run_did_analysis(dataset_id):
     """Run Difference-in-Differences analysis on a dataset."""
-    print("=== DiD ANALYSIS STARTED ===")
+    logger.debug("=== DiD ANALYSIS STARTED ===")
     try:
         current_user_id = get_jwt_identity()
         if not isinstance(current_user_id, str):
@@ -707,15 +950,15 @@ def run_did_analysis(dataset_id):
         treatment_units = data.get('treatment_units', [])
         control_units = data.get('control_units', [])
         
-        print("Received parameters:")
-        print(f"  treatment_units: {treatment_units}")
-        print(f"  control_units: {control_units}")
-        print(f"  unit_var: {unit_var}")
-        print(f"  treatment_var: {treatment_var}")
-        print(f"  treatment_value: {treatment_value}")
-        print(f"  start_period: {start_period}")
-        print(f"  end_period: {end_period}")
-        print(f"  treatment_start: {treatment_start}")
+        logger.debug("Received parameters:")
+        logger.debug("  treatment_units: %s", treatment_units)
+        logger.debug("  control_units: %s", control_units)
+        logger.debug("  unit_var: %s", unit_var)
+        logger.debug("  treatment_var: %s", treatment_var)
+        logger.debug("  treatment_value: %s", treatment_value)
+        logger.debug("  start_period: %s", start_period)
+        logger.debug("  end_period: %s", end_period)
+        logger.debug("  treatment_start: %s", treatment_start)
         
         # Validate required parameters
         # Validate required parameters
@@ -731,19 +974,12 @@ def run_did_analysis(dataset_id):
                 'tr_start': treatment_start, 'start': start_period, 'end': end_period,
                 'unit': unit_var
             }.items() if not v]
-            print(f"Missing params: {missing}")
+            logger.debug("Missing params: %s", missing)
             return jsonify({
                 "error": f"Missing required analysis parameters: {', '.join(missing)}"
             }), 400
         
         # Download file from S3 to perform analysis
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
-        )
-        
         temp_file_path = f"/tmp/did_analysis_{dataset_id}.csv"
         
         try:
@@ -751,7 +987,7 @@ def run_did_analysis(dataset_id):
             s3_client.download_file(S3_BUCKET_NAME, dataset.s3_key, temp_file_path)
             
             # Read CSV and perform DiD analysis
-            df = pd.read_csv(temp_file_path)
+            df = _read_local_csv(temp_file_path)
             
             # Convert outcome variable to numeric (handle large numbers stored as strings)
             if outcome_var in df.columns:
@@ -759,23 +995,23 @@ def run_did_analysis(dataset_id):
                 # Check for any NaN values created during conversion
                 nan_count = df[outcome_var].isna().sum()
                 if nan_count > 0:
-                    print(f"Warning: {nan_count} non-numeric values in outcome variable were converted to NaN")
+                    logger.warning("%s non-numeric values in outcome variable were converted to NaN", nan_count)
             
             # Apply treatment and control unit filtering
-            print(f"Treatment units: {treatment_units}")
-            print(f"Control units: {control_units}")
-            print(f"Unit variable: {unit_var}")
+            logger.debug("Treatment units: %s", treatment_units)
+            logger.debug("Control units: %s", control_units)
+            logger.debug("Unit variable: %s", unit_var)
             if treatment_units and control_units:
-                print("Using unit-based treatment assignment")
+                logger.debug("Using unit-based treatment assignment")
                 # Filter data to only include selected treatment and control units
                 df = df[df[unit_var].isin(treatment_units + control_units)]
-                print(f"Data shape after unit filtering: {df.shape}")
+                logger.debug("Data shape after unit filtering: %s", df.shape)
                 
                 # Create treatment indicator based on selected units
                 df['is_treated'] = df[unit_var].isin(treatment_units).astype(int)
-                print(f"Treatment assignment - treated units: {df['is_treated'].sum()}")
+                logger.debug("Treatment assignment - treated units: %s", df['is_treated'].sum())
             else:
-                print("Using fallback treatment variable logic (Auto-Group Creation)")
+                logger.debug("Using fallback treatment variable logic (Auto-Group Creation)")
                 # Handle type matching for treatment comparison
                 tv_col = df[treatment_var]
                 matched_value = treatment_value
@@ -795,14 +1031,14 @@ def run_did_analysis(dataset_id):
                 # For string/categorical columns, we use treatment_value directly as provided
 
                 
-                print(f"  Matching treatment var '{treatment_var}' with value '{matched_value}'")
+                logger.debug("  Matching treatment var '%s' with value '%s'", treatment_var, matched_value)
                 
                 if unit_var:
                     # Identify units that HAVE the treatment value (at any time)
                     # This defines the "Treatment Group" vs "Control Group"
                     # We assume standard DiD: units that are treated at some point belong to Treatment Group.
                     treated_units_derived = df[df[treatment_var] == matched_value][unit_var].unique()
-                    print(f"  Identified {len(treated_units_derived)} treated units based on value match")
+                    logger.debug("  Identified %s treated units based on value match", len(treated_units_derived))
                     
                     # Create group indicator: 1 if unit is in derived treated list, 0 otherwise
                     df['is_treated'] = df[unit_var].isin(treated_units_derived).astype(int)
@@ -823,10 +1059,10 @@ def run_did_analysis(dataset_id):
             df['did_interaction'] = df['is_treated'] * df['post_treatment']
             
             # Debug information
-            print(f"Dataset shape: {df.shape}")
-            print(f"Unit-based assignment - Treatment units: {treatment_units}, Control units: {control_units}")
-            print(f"Treated units: {df['is_treated'].sum()}")
-            print(f"Post-treatment observations: {df['post_treatment'].sum()}")
+            logger.debug("Dataset shape: %s", df.shape)
+            logger.debug("Unit-based assignment - Treatment units: %s, Control units: %s", treatment_units, control_units)
+            logger.debug("Treated units: %s", df['is_treated'].sum())
+            logger.debug("Post-treatment observations: %s", df['post_treatment'].sum())
             
             # Check if we have enough data
             if df['is_treated'].sum() == 0:
@@ -852,25 +1088,23 @@ def run_did_analysis(dataset_id):
                 # Get unit column if available
                 unit_var = request.json.get('unit') if request.json else None
                 
-                print(f"Running parallel trends check:")
-                print(f"  - treatment_col: is_treated")
-                print(f"  - time_col: {time_var}")
-                print(f"  - outcome_col: {outcome_var}")
-                print(f"  - unit_col: {unit_var}")
-                print(f"  - treatment_time: {treatment_time_for_test} (type: {type(treatment_time_for_test)})")
-                print(f"  - Data shape: {df.shape}")
-                print(f"  - Time column dtype: {df[time_var].dtype}")
-                if unit_var and unit_var in df.columns:
-                    print(f"  - Unit column dtype: {df[unit_var].dtype}")
-                    print(f"  - Unique units: {df[unit_var].nunique()}")
-                print(f"  - Pre-treatment periods: {sorted(df[df[time_var] < treatment_time_for_test][time_var].unique())}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Running parallel trends check:")
+                    logger.debug("  - treatment_col: is_treated")
+                    logger.debug("  - time_col: %s", time_var)
+                    logger.debug("  - outcome_col: %s", outcome_var)
+                    logger.debug("  - unit_col: %s", unit_var)
+                    logger.debug("  - treatment_time: %s (type: %s)", treatment_time_for_test, type(treatment_time_for_test))
+                    logger.debug("  - Data shape: %s", df.shape)
+                    logger.debug("  - Time column dtype: %s", df[time_var].dtype)
+                    if unit_var and unit_var in df.columns:
+                        logger.debug("  - Unit column dtype: %s", df[unit_var].dtype)
+                        logger.debug("  - Unique units: %s", df[unit_var].nunique())
+                    logger.debug("  - Pre-treatment periods: %s", sorted(df[df[time_var] < treatment_time_for_test][time_var].unique()))
                 
                 # Use the improved check_parallel_trends function
                 # It expects: df, treatment_col, time_col, outcome_col, treatment_time, unit_col
-                print(f"  Calling check_parallel_trends function...")
-                import sys
-                sys.stdout.flush()
-                sys.stderr.flush()
+                logger.debug("  Calling check_parallel_trends function...")
                 
                 try:
                     parallel_trends_result = check_parallel_trends(
@@ -881,37 +1115,28 @@ def run_did_analysis(dataset_id):
                         treatment_time=treatment_time_for_test,
                         unit_col=unit_var if unit_var and unit_var in df.columns else None
                     )
-                    print(f"  check_parallel_trends returned successfully")
-                    sys.stdout.flush()
+                    logger.debug("  check_parallel_trends returned successfully")
                 except Exception as e:
-                    print(f"  EXCEPTION in check_parallel_trends: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
-                    sys.stdout.flush()
+                    logger.exception("EXCEPTION in check_parallel_trends: %s", e)
                     raise
                 
-                print(f"Parallel trends check completed.")
-                sys.stdout.flush()
-                print(f"  - Confidence: {parallel_trends_result.get('confidence_level', 'unknown')}")
-                print(f"  - P-value: {parallel_trends_result.get('p_value', 'None')}")
-                print(f"  - Message: {parallel_trends_result.get('message', 'None')}")
-                print(f"  - Has mean_chart: {parallel_trends_result.get('mean_chart') is not None}")
-                print(f"  - Has event_study_chart: {parallel_trends_result.get('event_study_chart') is not None}")
+                logger.debug("Parallel trends check completed.")
+                logger.debug("  - Confidence: %s", parallel_trends_result.get('confidence_level', 'unknown'))
+                logger.debug("  - P-value: %s", parallel_trends_result.get('p_value', 'None'))
+                logger.debug("  - Message: %s", parallel_trends_result.get('message', 'None'))
+                logger.debug("  - Has mean_chart: %s", parallel_trends_result.get('mean_chart') is not None)
+                logger.debug("  - Has event_study_chart: %s", parallel_trends_result.get('event_study_chart') is not None)
                 event_coeffs = parallel_trends_result.get('event_study_coefficients', [])
-                print(f"  - Event study coefficients: {len(event_coeffs)} coefficients")
-                print(f"  - Warnings: {parallel_trends_result.get('warnings', [])}")
-                sys.stdout.flush()
+                logger.debug("  - Event study coefficients: %s coefficients", len(event_coeffs))
+                logger.debug("  - Warnings: %s", parallel_trends_result.get('warnings', []))
                 
                 # Add warning to results if event study failed
                 if not event_coeffs and parallel_trends_result.get('warnings'):
                     event_warnings = [w for w in parallel_trends_result.get('warnings', []) if 'event study' in w.lower()]
                     if event_warnings:
-                        print(f"  - Event study warning: {event_warnings[0]}")
-                        sys.stdout.flush()
+                        logger.debug("  - Event study warning: %s", event_warnings[0])
             except Exception as e:
-                print(f"Error in parallel trends test: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error in parallel trends test: %s", e)
                 # Continue without parallel trends test if it fails
                 parallel_trends_result = {
                     "passed": None,
@@ -984,8 +1209,8 @@ def run_did_analysis(dataset_id):
             pre_treatment_mean_treated = basic_stats['outcome_mean_treated_pre']
             pre_treatment_mean_control = basic_stats['outcome_mean_control_pre']
             
-            print(f"Period stats - Pre-treatment baselines: treated={pre_treatment_mean_treated:.4f}, control={pre_treatment_mean_control:.4f}")
-            print(f"Period stats - Treatment start: {treatment_start}")
+            logger.debug("Period stats - Pre-treatment baselines: treated=%.4f, control=%.4f", pre_treatment_mean_treated, pre_treatment_mean_control)
+            logger.debug("Period stats - Treatment start: %s", treatment_start)
             
             try:
                 for period in all_periods:
@@ -1040,11 +1265,9 @@ def run_did_analysis(dataset_id):
                         'counterfactual': float(counterfactual_treated) if is_post and not pd.isna(counterfactual_treated) else None
                     })
                 
-                print(f"Generated {len(period_statistics)} period statistics")
+                logger.debug("Generated %s period statistics", len(period_statistics))
             except Exception as e:
-                print(f"Error generating period statistics: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error generating period statistics: %s", e)
                 # Continue with empty period statistics if there's an error
                 period_statistics = []
             
@@ -1052,7 +1275,7 @@ def run_did_analysis(dataset_id):
             treated_diff = basic_stats['outcome_mean_treated_post'] - basic_stats['outcome_mean_treated_pre']
             control_diff = basic_stats['outcome_mean_control_post'] - basic_stats['outcome_mean_control_pre']
             did_estimate = treated_diff - control_diff
-            print(f"DiD calculation: treated_diff={treated_diff}, control_diff={control_diff}, did_estimate={did_estimate}")
+            logger.debug("DiD calculation: treated_diff=%s, control_diff=%s, did_estimate=%s", treated_diff, control_diff, did_estimate)
             
             # Calculate clustered standard errors at the unit level
             # This accounts for correlation within units over time
@@ -1116,7 +1339,7 @@ def run_did_analysis(dataset_id):
             # Generate chart
             chart_base64 = None
             chart_data = None
-            print("Starting chart generation...")
+            logger.debug("Starting chart generation...")
             try:
                 chart_result = create_did_chart(
                     df, outcome_var, time_var, treatment_start, start_period, end_period, unit_var, treatment_units, control_units
@@ -1132,15 +1355,13 @@ def run_did_analysis(dataset_id):
                         # Backward compatibility: if it's still a string, use it as PNG
                         chart_base64 = chart_result
                     
-                    print(f"Chart generation result: PNG length: {len(chart_base64) if chart_base64 else 'None'}, Data: {bool(chart_data)}")
+                    logger.debug("Chart generation result: PNG length: %s, Data: %s", len(chart_base64) if chart_base64 else 'None', bool(chart_data))
                     # Allow charts up to 200KB (base64 encoded) for high quality
                     if chart_base64 and len(chart_base64) > 200000:
-                        print(f"Chart too large ({len(chart_base64)} chars), skipping chart")
+                        logger.debug("Chart too large (%s chars), skipping chart", len(chart_base64))
                         chart_base64 = None
             except Exception as e:
-                print(f"Error creating main chart: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error creating main chart: %s", e)
                 # Continue without chart if it fails
             
             # Generate pre-treatment trends chart for parallel trends test
@@ -1153,7 +1374,7 @@ def run_did_analysis(dataset_id):
                     )
                     parallel_trends_test['visual_chart'] = pretreatment_chart_base64
                 except Exception as e:
-                    print(f"Error creating pre-treatment chart: {str(e)}")
+                    logger.warning("Error creating pre-treatment chart: %s", e)
                     # Continue without chart if it fails
             
             # Calculate z-statistic and p-value using proper normal distribution
@@ -1163,7 +1384,7 @@ def run_did_analysis(dataset_id):
             # Run placebo test
             placebo_result = None
             try:
-                print("Running placebo test...")
+                logger.debug("Running placebo test...")
                 placebo_result = run_placebo_test(
                     df=df,
                     treatment_col='is_treated',
@@ -1173,11 +1394,9 @@ def run_did_analysis(dataset_id):
                     unit_col=unit_var if unit_var and unit_var in df.columns else None,
                     real_estimate=float(did_estimate)
                 )
-                print(f"Placebo test completed: n_total={placebo_result.get('n_total')}, passed={placebo_result.get('passed')}")
+                logger.debug("Placebo test completed: n_total=%s, passed=%s", placebo_result.get('n_total'), placebo_result.get('passed'))
             except Exception as e:
-                print(f"Error in placebo test: {str(e)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error in placebo test: %s", e)
                 placebo_result = {
                     "placebo_estimates": [],
                     "n_total": 0,
@@ -1191,7 +1410,7 @@ def run_did_analysis(dataset_id):
                 }
 
             # Results
-            print(f"Creating results object with did_estimate: {did_estimate}, se_did: {se_did}, z_stat: {z_stat}, p_value: {p_value}")
+            logger.debug("Creating results object with did_estimate: %s, se_did: %s, z_stat: %s, p_value: %s", did_estimate, se_did, z_stat, p_value)
             results = {
                 'did_estimate': float(did_estimate),
                 'standard_error': float(se_did),
@@ -1214,23 +1433,25 @@ def run_did_analysis(dataset_id):
                 'parallel_trends': parallel_trends_result,  # New improved structure
                 'placebo_test': placebo_result
             }
-            print(f"Results object created successfully with keys: {list(results.keys())}")
+            logger.debug("Results object created successfully with keys: %s", list(results.keys()))
             
-            # Debug: Try to serialize the results to catch any remaining issues
-            try:
-                import json
-                json.dumps(results)
-                print("Results serialization successful")
-            except Exception as e:
-                print(f"Serialization error: {str(e)}")
-                # Try to identify the problematic field
-                for key, value in results.items():
-                    try:
-                        json.dumps({key: value})
-                    except Exception as field_error:
-                        print(f"Problem with field '{key}': {str(field_error)}")
-                        print(f"Value type: {type(value)}")
-                        print(f"Value: {value}")
+            # Debug: Try to serialize the results to catch any remaining issues.
+            # Same encoder and options as the response; skipped unless debugging,
+            # since it is a full extra encode of the chart and series.
+            if logger.isEnabledFor(logging.DEBUG):
+                try:
+                    orjson.dumps(results, default=orjson_default, option=DUMPS_OPTIONS)
+                    logger.debug("Results serialization successful")
+                except Exception as e:
+                    logger.warning("Serialization error: %s", e)
+                    # Try to identify the problematic field
+                    for key, value in results.items():
+                        try:
+                            orjson.dumps({key: value}, default=orjson_default, option=DUMPS_OPTIONS)
+                        except Exception as field_error:
+                            logger.warning("Problem with field '%s': %s", key, field_error)
+                            logger.debug("Value type: %s", type(value))
+                            logger.debug("Value: %s", value)
             
             response_data = {
                 "analysis_type": "Difference-in-Differences",
@@ -1251,17 +1472,17 @@ def run_did_analysis(dataset_id):
                 "results": results
             }
             
-            print("Response structure check:")
-            print(f"  - Has analysis_type: {'analysis_type' in response_data}")
-            print(f"  - Has dataset_id: {'dataset_id' in response_data}")
-            print(f"  - Has parameters: {'parameters' in response_data}")
-            print(f"  - Has results: {'results' in response_data}")
-            print(f"  - Parameters keys: {list(response_data['parameters'].keys()) if 'parameters' in response_data else 'None'}")
-            print(f"  - Results keys: {list(response_data['results'].keys()) if 'results' in response_data else 'None'}")
+            logger.debug("Response structure check:")
+            logger.debug("  - Has analysis_type: %s", 'analysis_type' in response_data)
+            logger.debug("  - Has dataset_id: %s", 'dataset_id' in response_data)
+            logger.debug("  - Has parameters: %s", 'parameters' in response_data)
+            logger.debug("  - Has results: %s", 'results' in response_data)
+            logger.debug("  - Parameters keys: %s", list(response_data['parameters'].keys()) if 'parameters' in response_data else 'None')
+            logger.debug("  - Results keys: %s", list(response_data['results'].keys()) if 'results' in response_data else 'None')
             
             # Sanitize response data to convert NaN/Inf to None
             response_data = sanitize_for_json(response_data)
-            print("Response data sanitized for JSON")
+            logger.debug("Response data sanitized for JSON")
             
             return jsonify(response_data), 200
             
@@ -1273,9 +1494,7 @@ def run_did_analysis(dataset_id):
     except ValueError:
         return jsonify({"error": "Invalid token identity"}), 401
     except Exception as e:
-        print(f"ERROR in run_did_analysis: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in run_did_analysis: %s", e)
         return jsonify({
             "error": f"Failed to run DiD analysis: {str(e)}"
         }), 500
@@ -1285,14 +1504,14 @@ def run_did_analysis(dataset_id):
 @jwt_required()
 def run_rd_analysis(dataset_id):
     """Run Regression Discontinuity (RD) analysis on a dataset."""
-    print("=== RD ANALYSIS STARTED ===")
+    logger.debug("=== RD ANALYSIS STARTED ===")
     try:
         current_user_id = get_jwt_identity()
         if not isinstance(current_user_id, str):
             raise ValueError("Invalid token identity")
         
         # Get dataset
-        dataset = Dataset.query.get(dataset_id)
+        dataset = Dataset.query.options(joinedload(Dataset.project)).get(dataset_id)
         if not dataset:
             return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
         
@@ -1307,237 +1526,177 @@ def run_rd_analysis(dataset_id):
             return jsonify({"error": "Access denied"}), 403
         
         # Get analysis parameters from request
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No analysis parameters provided"}), 400
-        
-        # Extract parameters
-        running_var = data.get('running_var')
-        outcome_var = data.get('outcome_var')
-        cutoff = data.get('cutoff')
-        bandwidth = data.get('bandwidth')  # Optional
-        polynomial_order = data.get('polynomial_order', 1)  # Default to 1
-        treatment_side = data.get('treatment_side', 'above')  # Default to above
-        rd_type = data.get('rd_type', 'sharp')  # 'sharp' or 'fuzzy'
-        treatment_var = data.get('treatment_var')  # Required for fuzzy RDD only
-
-        print("Received RD parameters:")
-        print(f"  running_var: {running_var}")
-        print(f"  outcome_var: {outcome_var}")
-        print(f"  cutoff: {cutoff}")
-        print(f"  bandwidth: {bandwidth}")
-        print(f"  polynomial_order: {polynomial_order}")
-        print(f"  treatment_side: {treatment_side}")
-        print(f"  rd_type: {rd_type}")
-        print(f"  treatment_var: {treatment_var}")
-
-        # Validate required parameters
-        if not running_var:
-            return jsonify({"error": "Missing required parameter: running_var"}), 400
-        if not outcome_var:
-            return jsonify({"error": "Missing required parameter: outcome_var"}), 400
-        if cutoff is None:
-            return jsonify({"error": "Missing required parameter: cutoff"}), 400
-        if rd_type not in ('sharp', 'fuzzy'):
-            return jsonify({"error": "rd_type must be 'sharp' or 'fuzzy'"}), 400
-        if rd_type == 'fuzzy' and not treatment_var:
+        # Validate and coerce them in one pass
+        params, error = parse_body(
+            RDParams, request.get_json(), empty_error="No analysis parameters provided"
+        )
+        if error:
+            return jsonify({"error": error}), 400
+        
+        running_var = params.running_var
+        outcome_var = params.outcome_var
+        cutoff = params.cutoff
+        bandwidth = params.bandwidth
+        polynomial_order = params.polynomial_order
+        treatment_side = params.treatment_side
+        rd_type = params.rd_type
+        treatment_var = params.treatment_var
+
+        logger.debug("Received RD parameters:")
+        logger.debug("  running_var: %s", running_var)
+        logger.debug("  outcome_var: %s", outcome_var)
+        logger.debug("  cutoff: %s", cutoff)
+        logger.debug("  bandwidth: %s", bandwidth)
+        logger.debug("  polynomial_order: %s", polynomial_order)
+        logger.debug("  treatment_side: %s", treatment_side)
+        logger.debug("  rd_type: %s", rd_type)
+        logger.debug("  treatment_var: %s", treatment_var)
+
+        etag = _dataset_etag(dataset.s3_key)
+        columns = _dataset_columns(dataset.s3_key, etag)
+
+        # Validate columns exist (from the header, before the full download)
+        if running_var not in columns:
+            return jsonify({
+                "error": f"running_var '{running_var}' not found in dataset"
+            }), 400
+        if outcome_var not in columns:
+            return jsonify({
+                "error": f"outcome_var '{outcome_var}' not found in dataset"
+            }), 400
+        if rd_type == 'fuzzy' and treatment_var not in columns:
             return jsonify({
-                "error": "treatment_var is required for Fuzzy RDD — "
-                         "provide the column that records whether each unit "
-                         "actually received treatment."
+                "error": f"treatment_var '{treatment_var}' not found in dataset"
             }), 400
 
-        # Validate cutoff is numeric
-        try:
-            cutoff = float(cutoff)
-        except (ValueError, TypeError):
-            return jsonify({"error": "cutoff must be a number"}), 400
+        rd_columns = [running_var, outcome_var] + ([treatment_var] if rd_type == 'fuzzy' else [])
+        df = _load_dataset(dataset.s3_key, columns=rd_columns, etag=etag)
 
-        # Validate bandwidth if provided
-        if bandwidth is not None:
-            try:
-                bandwidth = float(bandwidth)
-                if bandwidth <= 0:
-                    return jsonify({"error": "bandwidth must be positive"}), 400
-            except (ValueError, TypeError):
-                return jsonify({"error": "bandwidth must be a number"}), 400
+        logger.debug("Dataset shape: %s", df.shape)
+        logger.debug("Columns: %s", list(df.columns))
 
-        # Validate polynomial_order
-        try:
-            polynomial_order = int(polynomial_order)
-            if polynomial_order not in [1, 2]:
-                return jsonify({
-                    "error": "polynomial_order must be 1 or 2"
-                }), 400
-        except (ValueError, TypeError):
-            return jsonify({"error": "polynomial_order must be an integer"}), 400
-
-        # Download file from S3 to perform analysis
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
+        # Create RD estimator
+        rd = RDEstimator(
+            data=df,
+            running_var=running_var,
+            outcome_var=outcome_var,
+            cutoff=cutoff,
+            treatment_side=treatment_side
         )
 
-        temp_file_path = f"/tmp/rd_analysis_{dataset_id}.csv"
-
-        try:
-            # Download file from S3
-            s3_client.download_file(
-                S3_BUCKET_NAME, dataset.s3_key, temp_file_path
-            )
-
-            # Read CSV
-            df = pd.read_csv(temp_file_path)
-
-            print(f"Dataset shape: {df.shape}")
-            print(f"Columns: {list(df.columns)}")
-
-            # Validate columns exist
-            if running_var not in df.columns:
-                return jsonify({
-                    "error": f"running_var '{running_var}' not found in dataset"
-                }), 400
-            if outcome_var not in df.columns:
-                return jsonify({
-                    "error": f"outcome_var '{outcome_var}' not found in dataset"
-                }), 400
-            if rd_type == 'fuzzy' and treatment_var not in df.columns:
-                return jsonify({
-                    "error": f"treatment_var '{treatment_var}' not found in dataset"
-                }), 400
-
-            # Create RD estimator
-            rd = RDEstimator(
-                data=df,
-                running_var=running_var,
-                outcome_var=outcome_var,
-                cutoff=cutoff,
-                treatment_side=treatment_side
-            )
-
-            # If bandwidth not provided, calculate optimal bandwidth
-            if bandwidth is None:
-                print("Calculating optimal bandwidth...")
-                try:
-                    bw_result = rd.calculate_optimal_bandwidth()
-                    bandwidth = bw_result['bandwidth']
-                    bandwidth_info = {
-                        'optimal_bandwidth': bandwidth,
-                        'bandwidth_method': bw_result.get('method'),
-                        'bandwidth_diagnostics': bw_result.get('diagnostics'),
-                        'bandwidth_warnings': bw_result.get('warnings', [])
-                    }
-                    print(f"  Optimal bandwidth: {bandwidth}")
-                except Exception as bw_error:
-                    print(f"  Failed to calculate optimal bandwidth: {bw_error}")
-                    return jsonify({
-                        "error": (
-                            f"Failed to calculate optimal bandwidth: {str(bw_error)}. "
-                            "Please specify bandwidth manually."
-                        )
-                    }), 400
-            else:
+        # If bandwidth not provided, calculate optimal bandwidth
+        if bandwidth is None:
+            logger.debug("Calculating optimal bandwidth...")
+            try:
+                bw_result = _optimal_bandwidth(
+                    dataset.s3_key, etag, running_var, outcome_var, cutoff
+                )
+                bandwidth = bw_result['bandwidth']
                 bandwidth_info = {
-                    'optimal_bandwidth': None,
-                    'bandwidth_method': 'user_specified',
-                    'bandwidth_diagnostics': {},
-                    'bandwidth_warnings': []
+                    'optimal_bandwidth': bandwidth,
+                    'bandwidth_method': bw_result.get('method'),
+                    'bandwidth_diagnostics': bw_result.get('diagnostics'),
+                    'bandwidth_warnings': bw_result.get('warnings', [])
                 }
-
-            # Run RD estimation (sharp or fuzzy)
-            print(f"Running {rd_type} RD estimation with bandwidth={bandwidth}...")
-            try:
-                if rd_type == 'fuzzy':
-                    result = rd.estimate_fuzzy(
-                        treatment_var=treatment_var,
-                        bandwidth=bandwidth,
-                        polynomial_order=polynomial_order,
-                    )
-                else:
-                    result = rd.estimate(
-                        bandwidth=bandwidth, polynomial_order=polynomial_order
-                    )
-                print("  RD estimation completed successfully")
-            except Exception as est_error:
-                print(f"  RD estimation failed: {est_error}")
+                logger.debug("  Optimal bandwidth: %s", bandwidth)
+            except Exception as bw_error:
+                logger.warning("Failed to calculate optimal bandwidth: %s", bw_error)
                 return jsonify({
-                    "error": f"RD estimation failed: {str(est_error)}"
+                    "error": (
+                        f"Failed to calculate optimal bandwidth: {str(bw_error)}. "
+                        "Please specify bandwidth manually."
+                    )
                 }), 400
-
-            # Build response
-            results_block = {
-                'treatment_effect': result['treatment_effect'],
-                'se': result['se'],
-                'ci_lower': result['ci_lower'],
-                'ci_upper': result['ci_upper'],
-                'p_value': result['p_value'],
-                'is_significant': result['p_value'] < 0.05,
-                'n_treated': result['n_treated'],
-                'n_control': result['n_control'],
-                'n_total': result['n_total'],
-                'bandwidth_used': result['bandwidth_used'],
-                'polynomial_order': result['polynomial_order'],
-                'kernel': result['kernel'],
-                'warnings': result.get('warnings', []),
-                'diagnostics': result.get('diagnostics', {}),
+        else:
+            bandwidth_info = {
+                'optimal_bandwidth': None,
+                'bandwidth_method': 'user_specified',
+                'bandwidth_diagnostics': {},
+                'bandwidth_warnings': []
             }
 
-            # Include fuzzy-specific fields when applicable
+        # Run RD estimation (sharp or fuzzy)
+        logger.debug("Running %s RD estimation with bandwidth=%s...", rd_type, bandwidth)
+        try:
             if rd_type == 'fuzzy':
-                results_block.update({
-                    'rd_type': 'fuzzy',
-                    'reduced_form_effect': result.get('reduced_form_effect'),
-                    'reduced_form_se': result.get('reduced_form_se'),
-                    'first_stage_effect': result.get('first_stage_effect'),
-                    'first_stage_se': result.get('first_stage_se'),
-                    'compliance_rate_assigned': result.get('compliance_rate_assigned'),
-                    'compliance_rate_not_assigned': result.get('compliance_rate_not_assigned'),
-                })
+                result = rd.estimate_fuzzy(
+                    treatment_var=treatment_var,
+                    bandwidth=bandwidth,
+                    polynomial_order=polynomial_order,
+                )
             else:
-                results_block['rd_type'] = 'sharp'
+                result = rd.estimate(
+                    bandwidth=bandwidth, polynomial_order=polynomial_order
+                )
+            logger.debug("  RD estimation completed successfully")
+        except Exception as est_error:
+            logger.warning("RD estimation failed: %s", est_error)
+            return jsonify({
+                "error": f"RD estimation failed: {str(est_error)}"
+            }), 400
 
-            response_data = {
-                'analysis_type': 'regression_discontinuity',
-                'dataset_id': dataset_id,
-                'parameters': {
-                    'running_var': running_var,
-                    'outcome_var': outcome_var,
-                    'cutoff': cutoff,
-                    'bandwidth_used': bandwidth,
-                    'polynomial_order': polynomial_order,
-                    'treatment_side': treatment_side,
-                    'rd_type': rd_type,
-                    'treatment_var': treatment_var if rd_type == 'fuzzy' else None,
-                },
-                'results': results_block,
-                'bandwidth_info': bandwidth_info
-            }
-            
-            print("Response structure check:")
-            print(f"  - Has analysis_type: {'analysis_type' in response_data}")
-            print(f"  - Has dataset_id: {'dataset_id' in response_data}")
-            print(f"  - Has parameters: {'parameters' in response_data}")
-            print(f"  - Has results: {'results' in response_data}")
-            
-            # Sanitize response data to convert NaN/Inf to None
-            response_data = sanitize_for_json(response_data)
-            print("Response data sanitized for JSON")
-            
-            return jsonify(response_data), 200
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+        # Build response
+        results_block = {
+            'treatment_effect': result['treatment_effect'],
+            'se': result['se'],
+            'ci_lower': result['ci_lower'],
+            'ci_upper': result['ci_upper'],
+            'p_value': result['p_value'],
+            'is_significant': result['p_value'] < 0.05,
+            'n_treated': result['n_treated'],
+            'n_control': result['n_control'],
+            'n_total': result['n_total'],
+            'bandwidth_used': result['bandwidth_used'],
+            'polynomial_order': result['polynomial_order'],
+            'kernel': result['kernel'],
+            'warnings': result.get('warnings', []),
+            'diagnostics': result.get('diagnostics', {}),
+        }
+
+        # Include fuzzy-specific fields when applicable
+        if rd_type == 'fuzzy':
+            results_block.update({
+                'rd_type': 'fuzzy',
+                'reduced_form_effect': result.get('reduced_form_effect'),
+                'reduced_form_se': result.get('reduced_form_se'),
+                'first_stage_effect': result.get('first_stage_effect'),
+                'first_stage_se': result.get('first_stage_se'),
+                'compliance_rate_assigned': result.get('compliance_rate_assigned'),
+                'compliance_rate_not_assigned': result.get('compliance_rate_not_assigned'),
+            })
+        else:
+            results_block['rd_type'] = 'sharp'
+
+        response_data = {
+            'analysis_type': 'regression_discontinuity',
+            'dataset_id': dataset_id,
+            'parameters': {
+                'running_var': running_var,
+                'outcome_var': outcome_var,
+                'cutoff': cutoff,
+                'bandwidth_used': bandwidth,
+                'polynomial_order': polynomial_order,
+                'treatment_side': treatment_side,
+                'rd_type': rd_type,
+                'treatment_var': treatment_var if rd_type == 'fuzzy' else None,
+            },
+            'results': results_block,
+            'bandwidth_info': bandwidth_info
+        }
+        
+        logger.debug("Response structure check:")
+        logger.debug("  - Has analysis_type: %s", 'analysis_type' in response_data)
+        logger.debug("  - Has dataset_id: %s", 'dataset_id' in response_data)
+        logger.debug("  - Has parameters: %s", 'parameters' in response_data)
+        logger.debug("  - Has results: %s", 'results' in response_data)
         
+
+        return _json_response(response_data)
+
     except ValueError:
         return jsonify({"error": "Invalid token identity"}), 401
     except Exception as e:
-        print(f"ERROR in run_rd_analysis: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in run_rd_analysis: %s", e)
         return jsonify({
             "error": f"Failed to run RD analysis: {str(e)}"
         }), 500
@@ -1547,14 +1706,14 @@ def run_rd_analysis(dataset_id):
 @jwt_required()
 def run_rd_sensitivity_analysis(dataset_id):
     """Run RD sensitivity analysis across bandwidth grid."""
-    print("=== RD SENSITIVITY ANALYSIS STARTED ===")
+    logger.debug("=== RD SENSITIVITY ANALYSIS STARTED ===")
     try:
         current_user_id = get_jwt_identity()
         if not isinstance(current_user_id, str):
             raise ValueError("Invalid token identity")
         
         # Get dataset
-        dataset = Dataset.query.get(dataset_id)
+        dataset = Dataset.query.options(joinedload(Dataset.project)).get(dataset_id)
         if not dataset:
             return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
         
@@ -1569,78 +1728,51 @@ def run_rd_sensitivity_analysis(dataset_id):
             return jsonify({"error": "Access denied"}), 403
         
         # Get analysis parameters from request
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No analysis parameters provided"}), 400
-        
-        # Extract parameters
-        running_var = data.get('running_var')
-        outcome_var = data.get('outcome_var')
-        cutoff = data.get('cutoff')
-        n_bandwidths = data.get('n_bandwidths', 20)  # Default to 20
-        treatment_side = data.get('treatment_side', 'above')
-        
-        print("Received RD sensitivity parameters:")
-        print(f"  running_var: {running_var}")
-        print(f"  outcome_var: {outcome_var}")
-        print(f"  cutoff: {cutoff}")
-        print(f"  n_bandwidths: {n_bandwidths}")
-        print(f"  treatment_side: {treatment_side}")
-        
-        # Validate required parameters
-        if not running_var:
-            return jsonify({"error": "Missing required parameter: running_var"}), 400
-        if not outcome_var:
-            return jsonify({"error": "Missing required parameter: outcome_var"}), 400
-        if cutoff is None:
-            return jsonify({"error": "Missing required parameter: cutoff"}), 400
-        
-        # Validate cutoff is numeric
-        try:
-            cutoff = float(cutoff)
-        except (ValueError, TypeError):
-            return jsonify({"error": "cutoff must be a number"}), 400
-        
-        # Validate n_bandwidths
-        try:
-            n_bandwidths = int(n_bandwidths)
-            if n_bandwidths < 5:
-                n_bandwidths = 5
-            elif n_bandwidths > 50:
-                n_bandwidths = 50
-        except (ValueError, TypeError):
-            n_bandwidths = 20
-        
-        # Download file from S3
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
+        # Validate and coerce them in one pass
+        params, error = parse_body(
+            RDSensitivityParams, request.get_json(), empty_error="No analysis parameters provided"
         )
+        if error:
+            return jsonify({"error": error}), 400
+        
+        running_var = params.running_var
+        outcome_var = params.outcome_var
+        cutoff = params.cutoff
+        n_bandwidths = params.n_bandwidths
+        treatment_side = params.treatment_side
+        
+        logger.debug("Received RD sensitivity parameters:")
+        logger.debug("  running_var: %s", running_var)
+        logger.debug("  outcome_var: %s", outcome_var)
+        logger.debug("  cutoff: %s", cutoff)
+        logger.debug("  n_bandwidths: %s", n_bandwidths)
+        logger.debug("  treatment_side: %s", treatment_side)
+        
+        etag = _dataset_etag(dataset.s3_key)
+        columns = _dataset_columns(dataset.s3_key, etag)
+        
+        # Validate columns exist (from the header, before the full download)
+        if running_var not in columns:
+            return jsonify({
+                "error": f"running_var '{running_var}' not found in dataset"
+            }), 400
+        if outcome_var not in columns:
+            return jsonify({
+                "error": f"outcome_var '{outcome_var}' not found in dataset"
+            }), 400
         
-        temp_file_path = f"/tmp/rd_sensitivity_{dataset_id}.csv"
+        # The sweep is deterministic per dataset version and spec, so reuse a
+        # persisted result when one exists; only a miss downloads the data
+        result_key = _sensitivity_result_key(
+            dataset.s3_key, etag, running_var, outcome_var, cutoff, n_bandwidths, treatment_side
+        )
+        result = _load_sensitivity_result(result_key)
         
-        try:
-            # Download file from S3
-            s3_client.download_file(
-                S3_BUCKET_NAME, dataset.s3_key, temp_file_path
-            )
-            
-            # Read CSV
-            df = pd.read_csv(temp_file_path)
-            
-            print(f"Dataset shape: {df.shape}")
+        rd = None
+        if result is None:
+            df = _load_dataset(dataset.s3_key, columns=[running_var, outcome_var], etag=etag)
             
-            # Validate columns exist
-            if running_var not in df.columns:
-                return jsonify({
-                    "error": f"running_var '{running_var}' not found in dataset"
-                }), 400
-            if outcome_var not in df.columns:
-                return jsonify({
-                    "error": f"outcome_var '{outcome_var}' not found in dataset"
-                }), 400
+            logger.debug("Dataset shape: %s", df.shape)
             
             # Create RD estimator
             rd = RDEstimator(
@@ -1650,62 +1782,74 @@ def run_rd_sensitivity_analysis(dataset_id):
                 cutoff=cutoff,
                 treatment_side=treatment_side
             )
-            
-            # Run sensitivity analysis
-            print(f"Running RD sensitivity analysis with {n_bandwidths} bandwidths...")
+        
+        parameters = {
+            'running_var': running_var,
+            'outcome_var': outcome_var,
+            'cutoff': cutoff,
+            'n_bandwidths': n_bandwidths,
+            'treatment_side': treatment_side,
+        }
+        
+        # Clients that ask for NDJSON get each bandwidth as soon as it is fitted
+        wants_stream = request.accept_mimetypes.best_match(
+            ['application/json', 'application/x-ndjson']
+        ) == 'application/x-ndjson'
+        if wants_stream:
+            optimal_bandwidth = None
+            if result is None:
+                try:
+                    optimal_bandwidth = _optimal_bandwidth(
+                        dataset.s3_key, etag, running_var, outcome_var, cutoff
+                    )
+                except Exception as bw_error:
+                    logger.warning("Sensitivity analysis failed: %s", bw_error)
+                    return jsonify({
+                        "error": f"Sensitivity analysis failed: {str(bw_error)}"
+                    }), 400
+            return Response(
+                stream_with_context(_stream_sensitivity(
+                    rd, dataset_id, parameters, result, result_key, optimal_bandwidth
+                )),
+                mimetype='application/x-ndjson'
+            )
+        
+        # Run sensitivity analysis
+        if result is None:
+            logger.debug("Running RD sensitivity analysis with %s bandwidths...", n_bandwidths)
             try:
-                result = rd.sensitivity_analysis(n_bandwidths=n_bandwidths)
-                print("  Sensitivity analysis completed successfully")
+                result = rd.sensitivity_analysis(
+                    n_bandwidths=n_bandwidths,
+                    parallel=True,
+                    optimal_bandwidth=_optimal_bandwidth(
+                        dataset.s3_key, etag, running_var, outcome_var, cutoff
+                    ),
+                )
+                logger.debug("  Sensitivity analysis completed successfully")
             except Exception as sens_error:
-                print(f"  Sensitivity analysis failed: {sens_error}")
+                logger.warning("Sensitivity analysis failed: %s", sens_error)
                 return jsonify({
                     "error": f"Sensitivity analysis failed: {str(sens_error)}"
                 }), 400
-            
-            # Build response
-            response_data = {
-                'analysis_type': 'rd_sensitivity',
-                'dataset_id': dataset_id,
-                'parameters': {
-                    'running_var': running_var,
-                    'outcome_var': outcome_var,
-                    'cutoff': cutoff,
-                    'n_bandwidths': n_bandwidths,
-                    'treatment_side': treatment_side,
-                },
-                'results': result['results'],
-                'optimal_bandwidth': result['optimal_bandwidth'],
-                'stability_coefficient': result['stability_coefficient'],
-                'stability_std': result.get('stability_std'),
-                'stability_range': result.get('stability_range'),
-                'stability_mean': result.get('stability_mean'),
-                'interpretation': result['interpretation'],
-                'bandwidth_method': result.get('bandwidth_method'),
-                'bandwidth_warnings': result.get('bandwidth_warnings', [])
-            }
-            
-            print("Sensitivity response structure check:")
-            print(f"  - Number of results: {len(result['results'])}")
-            print(f"  - Optimal bandwidth: {result['optimal_bandwidth']}")
-            print(f"  - Stability: {result['interpretation']['stability']}")
-            
-            # Sanitize response data
-            response_data = sanitize_for_json(response_data)
-            print("Response data sanitized for JSON")
-            
-            return jsonify(response_data), 200
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+            _store_sensitivity_result(result_key, result)
+        else:
+            logger.debug("  Using persisted sensitivity result")
+        
+        # Build response
+        response_data = _sensitivity_response(dataset_id, parameters, result)
+        
+        logger.debug("Sensitivity response structure check:")
+        logger.debug("  - Number of results: %s", len(result['results']))
+        logger.debug("  - Optimal bandwidth: %s", result['optimal_bandwidth'])
+        logger.debug("  - Stability: %s", result['interpretation']['stability'])
         
+
+        return _json_response(response_data)
+
     except ValueError:
         return jsonify({"error": "Invalid token identity"}), 401
     except Exception as e:
-        print(f"ERROR in run_rd_sensitivity_analysis: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in run_rd_sensitivity_analysis: %s", e)
         return jsonify({
             "error": f"Failed to run RD sensitivity analysis: {str(e)}"
         }), 500
@@ -1715,13 +1859,13 @@ def run_rd_sensitivity_analysis(dataset_id):
 @jwt_required()
 def run_rd_placebo_test(dataset_id):
     """Run RD placebo cutoff test."""
-    print("=== RD PLACEBO CUTOFF TEST STARTED ===")
+    logger.debug("=== RD PLACEBO CUTOFF TEST STARTED ===")
     try:
         current_user_id = get_jwt_identity()
         if not isinstance(current_user_id, str):
             raise ValueError("Invalid token identity")
 
-        dataset = Dataset.query.get(dataset_id)
+        dataset = Dataset.query.options(joinedload(Dataset.project)).get(dataset_id)
         if not dataset:
             return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
 
@@ -1759,72 +1903,58 @@ def run_rd_placebo_test(dataset_id):
         except (ValueError, TypeError):
             return jsonify({"error": "cutoff and bandwidth must be numbers"}), 400
 
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
-        )
-        temp_file_path = f"/tmp/rd_placebo_{dataset_id}.csv"
-
-        try:
-            s3_client.download_file(S3_BUCKET_NAME, dataset.s3_key, temp_file_path)
-            df = pd.read_csv(temp_file_path)
-            print(f"Dataset shape: {df.shape}")
-
-            if running_var not in df.columns:
-                return jsonify({"error": f"running_var '{running_var}' not found"}), 400
-            if outcome_var not in df.columns:
-                return jsonify({"error": f"outcome_var '{outcome_var}' not found"}), 400
+        etag = _dataset_etag(dataset.s3_key)
+        columns = _dataset_columns(dataset.s3_key, etag)
 
-            rd = RDEstimator(
-                data=df,
-                running_var=running_var,
-                outcome_var=outcome_var,
-                cutoff=cutoff,
-                treatment_side=treatment_side
-            )
+        if running_var not in columns:
+            return jsonify({"error": f"running_var '{running_var}' not found"}), 400
+        if outcome_var not in columns:
+            return jsonify({"error": f"outcome_var '{outcome_var}' not found"}), 400
 
-            print(f"Running placebo cutoff test with {n_placebos} placebos, bandwidth={bandwidth}...")
-            try:
-                result = rd.placebo_cutoff_test(
-                    bandwidth=bandwidth,
-                    polynomial_order=polynomial_order,
-                    n_placebos=n_placebos
-                )
-                print(f"  Placebo test completed: n_total={result.get('n_total')}, passed={result.get('passed')}")
-            except Exception as pe:
-                print(f"  Placebo test failed: {pe}")
-                return jsonify({"error": f"Placebo test failed: {str(pe)}"}), 400
+        df = _load_dataset(dataset.s3_key, columns=[running_var, outcome_var], etag=etag)
+        logger.debug("Dataset shape: %s", df.shape)
 
-            response_data = {
-                'analysis_type': 'rd_placebo',
-                'dataset_id': dataset_id,
-                'parameters': {
-                    'running_var': running_var,
-                    'outcome_var': outcome_var,
-                    'cutoff': cutoff,
-                    'bandwidth': bandwidth,
-                    'polynomial_order': polynomial_order,
-                    'treatment_side': treatment_side,
-                    'n_placebos': n_placebos,
-                },
-                'results': result,
-            }
+        rd = RDEstimator(
+            data=df,
+            running_var=running_var,
+            outcome_var=outcome_var,
+            cutoff=cutoff,
+            treatment_side=treatment_side
+        )
 
-            response_data = sanitize_for_json(response_data)
-            return jsonify(response_data), 200
+        logger.debug("Running placebo cutoff test with %s placebos, bandwidth=%s...", n_placebos, bandwidth)
+        try:
+            result = rd.placebo_cutoff_test(
+                bandwidth=bandwidth,
+                polynomial_order=polynomial_order,
+                n_placebos=n_placebos
+            )
+            logger.debug("  Placebo test completed: n_total=%s, passed=%s", result.get('n_total'), result.get('passed'))
+        except Exception as pe:
+            logger.warning("Placebo test failed: %s", pe)
+            return jsonify({"error": f"Placebo test failed: {str(pe)}"}), 400
+
+        response_data = {
+            'analysis_type': 'rd_placebo',
+            'dataset_id': dataset_id,
+            'parameters': {
+                'running_var': running_var,
+                'outcome_var': outcome_var,
+                'cutoff': cutoff,
+                'bandwidth': bandwidth,
+                'polynomial_order': polynomial_order,
+                'treatment_side': treatment_side,
+                'n_placebos': n_placebos,
+            },
+            'results': result,
+        }
 
-        finally:
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+        return _json_response(response_data)
 
     except ValueError:
         return jsonify({"error": "Invalid token identity"}), 401
     except Exception as e:
-        print(f"ERROR in run_rd_placebo_test: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in run_rd_placebo_test: %s", e)
         return jsonify({"error": f"Failed to run placebo test: {str(e)}"}), 500
 
 
@@ -1832,13 +1962,13 @@ def run_rd_placebo_test(dataset_id):
 @jwt_required()
 def run_rd_density_test(dataset_id):
     """Run RD density (manipulation) test."""
-    print("=== RD DENSITY TEST STARTED ===")
+    logger.debug("=== RD DENSITY TEST STARTED ===")
     try:
         current_user_id = get_jwt_identity()
         if not isinstance(current_user_id, str):
             raise ValueError("Invalid token identity")
 
-        dataset = Dataset.query.get(dataset_id)
+        dataset = Dataset.query.options(joinedload(Dataset.project)).get(dataset_id)
         if not dataset:
             return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
 
@@ -1871,66 +2001,52 @@ def run_rd_density_test(dataset_id):
 
         n_bins = max(10, min(n_bins, 100))
 
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
-        )
-        temp_file_path = f"/tmp/rd_density_{dataset_id}.csv"
-
-        try:
-            s3_client.download_file(S3_BUCKET_NAME, dataset.s3_key, temp_file_path)
-            df = pd.read_csv(temp_file_path)
-            print(f"Dataset shape: {df.shape}")
-
-            if running_var not in df.columns:
-                return jsonify({"error": f"running_var '{running_var}' not found"}), 400
-            # density test only needs running_var; fall back gracefully if outcome absent
-            if outcome_var not in df.columns:
-                outcome_var = running_var
+        etag = _dataset_etag(dataset.s3_key)
+        columns = _dataset_columns(dataset.s3_key, etag)
 
-            rd = RDEstimator(
-                data=df,
-                running_var=running_var,
-                outcome_var=outcome_var,
-                cutoff=cutoff,
-                treatment_side=treatment_side
-            )
+        if running_var not in columns:
+            return jsonify({"error": f"running_var '{running_var}' not found"}), 400
+        # density test only needs running_var; fall back gracefully if outcome absent
+        if outcome_var not in columns:
+            outcome_var = running_var
 
-            print(f"Running density test with n_bins={n_bins}...")
-            try:
-                result = rd.density_test(n_bins=n_bins)
-                print(f"  Density test completed: z={result.get('z_stat')}, p={result.get('p_value')}, passed={result.get('passed')}")
-            except Exception as de:
-                print(f"  Density test failed: {de}")
-                return jsonify({"error": f"Density test failed: {str(de)}"}), 400
+        df = _load_dataset(dataset.s3_key, columns=[running_var, outcome_var], etag=etag)
+        logger.debug("Dataset shape: %s", df.shape)
 
-            response_data = {
-                'analysis_type': 'rd_density',
-                'dataset_id': dataset_id,
-                'parameters': {
-                    'running_var': running_var,
-                    'cutoff': cutoff,
-                    'n_bins': n_bins,
-                    'treatment_side': treatment_side,
-                },
-                'results': result,
-            }
+        rd = RDEstimator(
+            data=df,
+            running_var=running_var,
+            outcome_var=outcome_var,
+            cutoff=cutoff,
+            treatment_side=treatment_side
+        )
 
-            response_data = sanitize_for_json(response_data)
-            return jsonify(response_data), 200
+        logger.debug("Running density test with n_bins=%s...", n_bins)
+        try:
+            result = rd.density_test(n_bins=n_bins)
+            logger.debug("  Density test completed: z=%s, p=%s, passed=%s", result.get('z_stat'), result.get('p_value'), result.get('passed'))
+        except Exception as de:
+            logger.warning("Density test failed: %s", de)
+            return jsonify({"error": f"Density test failed: {str(de)}"}), 400
+
+        response_data = {
+            'analysis_type': 'rd_density',
+            'dataset_id': dataset_id,
+            'parameters': {
+                'running_var': running_var,
+                'cutoff': cutoff,
+                'n_bins': n_bins,
+                'treatment_side': treatment_side,
+            },
+            'results': result,
+        }
 
-        finally:
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+        return _json_response(response_data)
 
     except ValueError:
         return jsonify({"error": "Invalid token identity"}), 401
     except Exception as e:
-        print(f"ERROR in run_rd_density_test: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in run_rd_density_test: %s", e)
         return jsonify({"error": f"Failed to run density test: {str(e)}"}), 500
 
 
@@ -1938,7 +2054,7 @@ def run_rd_density_test(dataset_id):
 @jwt_required()
 def run_iv_analysis(dataset_id):
     """Run Instrumental Variable (2SLS) analysis on a dataset."""
-    print("=== IV ANALYSIS STARTED ===")
+    logger.debug("=== IV ANALYSIS STARTED ===")
     try:
         current_user_id = get_jwt_identity()
         if not isinstance(current_user_id, str):
@@ -1970,13 +2086,13 @@ def run_iv_analysis(dataset_id):
         additional_endogenous = data.get('additional_endogenous') or []  # list of {variable, instrument}
         run_sensitivity = bool(data.get('run_sensitivity', False))
 
-        print(f"  outcome:     {outcome_var}")
-        print(f"  treatment:   {treatment_var}")
-        print(f"  instruments: {instrument_vars}")
-        print(f"  controls:    {control_vars}")
-        print(f"  interactions: {interactions}")
-        print(f"  additional_endogenous: {additional_endogenous}")
-        print(f"  sensitivity: {run_sensitivity}")
+        logger.debug("  outcome:     %s", outcome_var)
+        logger.debug("  treatment:   %s", treatment_var)
+        logger.debug("  instruments: %s", instrument_vars)
+        logger.debug("  controls:    %s", control_vars)
+        logger.debug("  interactions: %s", interactions)
+        logger.debug("  additional_endogenous: %s", additional_endogenous)
+        logger.debug("  sensitivity: %s", run_sensitivity)
 
         # Validate required parameters
         if not outcome_var:
@@ -1987,20 +2103,14 @@ def run_iv_analysis(dataset_id):
             return jsonify({"error": "instruments must be a non-empty list of column names"}), 400
 
         # Download file from S3
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION
-        )
         temp_file_path = f"/tmp/iv_analysis_{dataset_id}.csv"
 
         try:
             s3_client.download_file(S3_BUCKET_NAME, dataset.s3_key, temp_file_path)
-            df = pd.read_csv(temp_file_path)
+            df = _read_local_csv(temp_file_path)
 
-            print(f"Dataset shape: {df.shape}")
-            print(f"Columns: {list(df.columns)}")
+            logger.debug("Dataset shape: %s", df.shape)
+            logger.debug("Columns: %s", list(df.columns))
 
             # Validate all columns exist (before creating interactions)
             all_base_cols = [outcome_var, treatment_var] + instrument_vars + control_vars
@@ -2033,7 +2143,7 @@ def run_iv_analysis(dataset_id):
                     if col_name not in control_vars:
                         control_vars.append(col_name)
             if interaction_col_names:
-                print(f"  Created interaction columns: {interaction_col_names}")
+                logger.debug("  Created interaction columns: %s", interaction_col_names)
 
             # Run IV estimation
             estimator = IVEstimator(
@@ -2114,8 +2224,6 @@ def run_iv_analysis(dataset_id):
     except ValueError:
         return jsonify({"error": "Invalid token identity"}), 401
     except Exception as e:
-        print(f"ERROR in run_iv_analysis: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("ERROR in run_iv_analysis: %s", e)
         return jsonify({"error": f"Failed to run IV analysis: {str(e)}"}), 500
 
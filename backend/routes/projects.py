@@ -3,31 +3,438 @@ Project and file upload routes.
 Handles project creation and CSV file uploads to S3.
 """
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+import base64
+import gzip
+import hashlib
 import os
+import shutil
+import tempfile
+import time
 import uuid
-import boto3
-import pandas as pd
-from models import db
+from datetime import datetime
+from urllib.parse import urlencode
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+import orjson
+from sqlalchemy import and_, func, or_, select, union, update
+from sqlalchemy.orm import defer, lazyload
+from models import Analysis, Dataset, Project, db, project_datasets
+from sample_data_utils import (
+    get_sample_dataset_by_id,
+    get_sample_file_path,
+    list_sample_datasets_for_user,
+)
+from utils.auth_middleware import current_uid
+from utils import background_uploads, response_cache
+from utils.s3 import S3_BUCKET_NAME, dataset_results_prefix, s3_client
+from utils.request_schemas import ProjectCreateParams, parse_body
 
 # Create blueprint
 projects_bp = Blueprint('projects', __name__, url_prefix='/api/projects')
 
-# Get S3 configuration from environment
-AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
-AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
-S3_BUCKET_NAME = os.environ.get('AWS_S3_BUCKET_NAME')
-
-# Configure S3 client
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
+# Upload large CSVs in parallel parts instead of one serial PUT. Part size
+# and concurrency are per-deployment knobs: sweep them on the target
+# instance and keep the plateau (S3 requires parts of at least 5MB).
+S3_PART_BYTES = max(int(os.environ.get('S3_MULTIPART_CHUNK_MB', '8')), 5) * 1024 * 1024
+TRANSFER_CFG = TransferConfig(
+    multipart_threshold=S3_PART_BYTES,
+    multipart_chunksize=S3_PART_BYTES,
+    use_threads=True,
+    max_concurrency=int(os.environ.get('S3_UPLOAD_CONCURRENCY', '4'))
 )
 
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+# Pre-encoded bodies for the most frequent error responses
+_ERR_INVALID_TOKEN = b'{"error":"Invalid token identity"}'
+_ERR_PROJECT_NOT_FOUND = b'{"error":"Project not found"}'
+_ERR_ACCESS_DENIED = b'{"error":"Access denied"}'
+
+
+def _canned_error(body, status):
+    """
+    Error response from a pre-encoded JSON body (no dict or encoder per call).
+
+    A new Response is built each time: response objects are mutated per
+    request (CORS and other after_request headers), so they cannot be shared.
+    """
+    return Response(body, status=status, mimetype='application/json')
+
+
+def _uuid7():
+    """
+    Time-ordered UUID (RFC 9562 version 7) for new S3 keys.
+    Keys use its .hex form: 32 characters, no hyphens.
+
+    48-bit Unix-millisecond timestamp followed by 74 random bits, so keys
+    under a user's prefix list oldest-to-newest while staying unguessable.
+    (uuid.uuid7 only exists from Python 3.14.)
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (unix_ms & ((1 << 48) - 1)) << 80
+    value |= 0x7 << 76                         # version
+    value |= ((rand >> 62) & 0xFFF) << 64      # rand_a
+    value |= 0b10 << 62                        # variant
+    value |= rand & ((1 << 62) - 1)            # rand_b
+    return uuid.UUID(int=value)
+
+
+class _CountingReader:
+    """
+    Read-only wrapper that counts the bytes pulled through it, giving the
+    exact file size without seeking to the end of the upload (which would
+    spool a large upload to disk first).
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = self._fileobj.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def _check_csv_upload(file):
+    """
+    Validate an uploaded CSV and split its name once.
+
+    Returns (stem, safe_name, error). stem is the default dataset name,
+    safe_name the ASCII-only name stored in S3 metadata (which rejects
+    non-ASCII), and error a (response, status) tuple or None. The extension
+    is not trusted alone: a NUL byte in the first 512 bytes marks a binary
+    file renamed to .csv.
+    """
+    if not file.filename:
+        return None, None, (jsonify({"error": "No file selected"}), 400)
+    
+    stem, ext = os.path.splitext(file.filename)
+    if ext.lower() != '.csv':
+        return None, None, (jsonify({"error": "Only CSV files are allowed"}), 400)
+    
+    head = file.stream.read(512)
+    file.stream.seek(0)
+    if b'\x00' in head:
+        return None, None, (jsonify({"error": "File does not look like a CSV (binary content)"}), 400)
+    
+    return stem, secure_filename(file.filename) or 'upload.csv', None
+
+
+def _gzip_into(file, dest):
+    """
+    Gzip-compress an uploaded file into the binary file object dest.
+
+    CSVs shrink several-fold, so both the upload to S3 and every later
+    download for analysis move far fewer bytes; objects are stored with
+    ContentEncoding=gzip and the readers in routes/datasets.py sniff the
+    format. Returns the uncompressed size.
+    """
+    reader = _CountingReader(file)
+    with gzip.GzipFile(fileobj=dest, mode='wb', compresslevel=6) as gz:
+        shutil.copyfileobj(reader, gz, 1024 * 1024)
+    return reader.bytes_read
+
+
+def _store_csv(body, s3_key, extra_args):
+    """
+    Upload a spooled, already-compressed CSV positioned at its end.
+
+    Below the multipart threshold this is one PutObject on the request
+    thread, skipping the transfer manager's worker threads and futures;
+    larger bodies go through upload_fileobj in parallel parts.
+    """
+    size = body.tell()
+    body.seek(0)
+    if size < S3_PART_BYTES:
+        s3_client.put_object(Bucket=S3_BUCKET_NAME, Key=s3_key, Body=body, **extra_args)
+    else:
+        s3_client.upload_fileobj(
+            body, S3_BUCKET_NAME, s3_key, ExtraArgs=extra_args, Config=TRANSFER_CFG
+        )
+
+
+def _wants_background_upload():
+    """True when the client asked for ?async=true (202 + status polling)."""
+    return request.args.get('async', '').lower() in ('1', 'true')
+
+
+def _save_uploaded_csv(file, dataset, extra_args, background):
+    """
+    Gzip file into S3 at dataset.s3_key and commit the dataset row.
+
+    Returns the raw (uncompressed) size. With background=True the compressed
+    body is spooled to a temp file and the S3 transfer is handed to
+    utils.background_uploads once the row is committed, so the request
+    thread never waits on S3.
+    """
+    if background:
+        # Spool to disk: the request stream is gone once we return
+        with tempfile.NamedTemporaryFile(suffix='.csv.gz', delete=False) as tmp:
+            file_size = _gzip_into(file, tmp)
+            local_path = tmp.name
+    else:
+        with tempfile.SpooledTemporaryFile(max_size=MAX_UPLOAD_BYTES) as spool:
+            file_size = _gzip_into(file, spool)
+            _store_csv(spool, dataset.s3_key, extra_args)
+
+    try:
+        db.session.add(dataset)
+        db.session.commit()
+    except Exception:
+        if background:
+            os.remove(local_path)
+        raise
+
+    if background:
+        background_uploads.submit_upload(
+            current_app._get_current_object(),
+            s3_client,
+            S3_BUCKET_NAME,
+            local_path,
+            dataset.s3_key,
+            dataset.id,
+            extra_args=extra_args,
+            config=TRANSFER_CFG
+        )
+    return file_size
+
+
+def _upload_accepted(dataset, file_size):
+    """202 response for a background upload, pointing at its status endpoint."""
+    return jsonify({
+        "message": "Upload accepted",
+        "dataset": dataset.to_dict(),
+        "file_size": file_size,
+        "status_url": f"/api/projects/uploads/{dataset.id}"
+    }), 202
+
+
+def _upload_too_large():
+    """
+    413 response if the declared request size is over the upload limit.
+
+    Checked before request.files is touched, so a refused upload is never
+    spooled to disk. Chunked bodies (no Content-Length) are bounded by the
+    app's MAX_CONTENT_LENGTH instead, which raises RequestEntityTooLarge
+    during form parsing.
+    """
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({"error": "File size too large. Maximum size is 10MB"}), 413
+    return None
+
+
+MAX_PAGE_SIZE = 200
+
+
+def _page_params():
+    """
+    Optional ?limit=&after= keyset paging for list endpoints.
+
+    Returns (limit, after, error). limit is None when the client did not ask
+    for paging, so existing callers still receive the full list; otherwise it
+    is capped at MAX_PAGE_SIZE. after is the decoded cursor of the previous
+    page's last row, or None for the first page.
+    """
+    limit = request.args.get('limit', type=int)
+    if 'limit' in request.args and (limit is None or limit < 1):
+        return None, None, (jsonify({"error": "limit must be a positive integer"}), 400)
+    after = request.args.get('after')
+    if after is not None:
+        try:
+            after = _decode_cursor(after)
+        except (ValueError, TypeError):
+            return None, None, (jsonify({"error": "Invalid paging cursor"}), 400)
+    if limit is not None:
+        limit = min(limit, MAX_PAGE_SIZE)
+    return limit, after, None
+
+
+def _encode_cursor(sort_value, row_id):
+    """Opaque cursor for a row's (sort timestamp, id) position."""
+    raw = orjson.dumps([sort_value.isoformat() if sort_value else None, row_id])
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(token):
+    """(sort timestamp or None, id) from _encode_cursor; ValueError/TypeError if malformed."""
+    sort_value, row_id = orjson.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    if not isinstance(row_id, int):
+        raise ValueError("cursor id must be an integer")
+    return (datetime.fromisoformat(sort_value) if sort_value is not None else None), row_id
+
+
+def _paged(query, limit, after, sort_col, id_col):
+    """
+    Keyset page of query, which must be ordered by (sort_col DESC NULLS LAST,
+    id_col DESC). Rows after the cursor are found through the sort index
+    rather than skipped, so deep pages stay cheap and rows do not shift when
+    others are inserted or deleted. Returns (rows, next_cursor or None).
+    """
+    if limit is None:
+        return query.all(), None
+    if after is not None:
+        sort_value, row_id = after
+        if sort_value is None:
+            query = query.filter(sort_col.is_(None), id_col < row_id)
+        else:
+            query = query.filter(or_(
+                sort_col < sort_value,
+                and_(sort_col == sort_value, id_col < row_id),
+                sort_col.is_(None),
+            ))
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, _encode_cursor(getattr(last, sort_col.key), last.id)
+
+
+def _with_next_link(response, limit, next_cursor):
+    """Add an RFC 8288 Link header pointing at the next page, if any."""
+    if next_cursor:
+        args = request.args.to_dict()
+        args.update(limit=limit, after=next_cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def _project_count_columns():
+    """
+    Correlated COUNT subqueries for (datasets_count, analyses_count) of a Project.
+
+    Selecting these next to Project returns every count in the same
+    statement, so listing N projects is one round-trip instead of per-project
+    collection loads. Datasets linked both through the junction table and the
+    legacy project_id column are counted once (UNION).
+    """
+    links = union(
+        select(project_datasets.c.project_id, project_datasets.c.dataset_id),
+        select(Dataset.project_id, Dataset.id).where(Dataset.project_id.isnot(None)),
+    ).subquery()
+    datasets_count = (
+        select(func.count())
+        .select_from(links)
+        .where(links.c.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+        .label('datasets_count')
+    )
+    analyses_count = (
+        select(func.count(Analysis.id))
+        .where(Analysis.project_id == Project.id)
+        .correlate(Project)
+        .scalar_subquery()
+        .label('analyses_count')
+    )
+    return datasets_count, analyses_count
+
+
+def _project_datasets(project_id, *options):
+    """
+    Datasets linked to a project through the junction table or the legacy
+    project_id column, de-duplicated by the database in a single query.
+    Loader options (e.g. defer) can be passed positionally.
+    """
+    linked_ids = select(project_datasets.c.dataset_id).where(
+        project_datasets.c.project_id == project_id
+    )
+    return Dataset.query.options(*options).filter(
+        or_(Dataset.project_id == project_id, Dataset.id.in_(linked_ids))
+    ).order_by(Dataset.created_at, Dataset.id).all()
+
+
+def _unlink_project_datasets(project_id):
+    """
+    Detach every dataset from a project (the datasets themselves are kept).
+
+    One DELETE on the junction table plus one UPDATE of legacy project_id
+    links, without loading the project's datasets collection.
+    """
+    db.session.execute(
+        project_datasets.delete().where(project_datasets.c.project_id == project_id)
+    )
+    db.session.execute(
+        update(Dataset).where(Dataset.project_id == project_id).values(project_id=None)
+    )
+
+
+def _owned_project(project_id, user_id, *options, lock=False):
+    """
+    The project if it exists and belongs to user_id, else None.
+
+    Ownership is part of the WHERE clause (served by idx_projects_id_user_id),
+    so the common path is one query. lock=True adds SELECT ... FOR UPDATE
+    so concurrent autosaves of the same project serialize instead of
+    overwriting each other. The datasets collection is only loaded if
+    touched; extra loader options (e.g. defer) can be passed positionally.
+    """
+    query = Project.query.options(lazyload(Project.datasets), *options).filter_by(
+        id=project_id, user_id=user_id
+    )
+    if lock:
+        query = query.with_for_update()
+    return query.one_or_none()
+
+
+def _state_hash(value):
+    """Fingerprint of a JSON state value; key order does not matter."""
+    return hashlib.blake2b(
+        orjson.dumps(value, option=orjson.OPT_SORT_KEYS), digest_size=16
+    ).hexdigest()
+
+
+def _apply_project_state(project, data):
+    """
+    Copy the autosave fields present in data onto project.
+
+    analysis_config and last_results are compared by fingerprint against the
+    stored *_hash columns and only assigned when they changed, so a repeated
+    autosave neither rewrites the JSONB values nor needs them loaded.
+    Returns True if anything was assigned.
+    """
+    changed = False
+    for field in ('current_step', 'selected_method'):
+        if field in data and getattr(project, field) != data[field]:
+            setattr(project, field, data[field])
+            changed = True
+
+    for field in ('analysis_config', 'last_results'):
+        if field not in data:
+            continue
+        new_hash = _state_hash(data[field])
+        if getattr(project, f'{field}_hash') != new_hash:
+            setattr(project, field, data[field])
+            setattr(project, f'{field}_hash', new_hash)
+            changed = True
+    return changed
+
+
+def _project_access_error(project_id):
+    """404 or 403 response for a project that _owned_project did not return."""
+    if db.session.query(Project.id).filter_by(id=project_id).first() is None:
+        return _canned_error(_ERR_PROJECT_NOT_FOUND, 404)
+    return _canned_error(_ERR_ACCESS_DENIED, 403)
+
+
+def _owned_dataset(dataset_id, user_id):
+    """The dataset if it exists and belongs to user_id, else None (one query)."""
+    return Dataset.query.filter_by(id=dataset_id, user_id=user_id).one_or_none()
+
+
+def _dataset_access_error(dataset_id, denied="Access denied"):
+    """404 or 403 response for a dataset that _owned_dataset did not return."""
+    if db.session.query(Dataset.id).filter_by(id=dataset_id).first() is None:
+        return jsonify({"error": "Dataset not found"}), 404
+    return jsonify({"error": denied}), 403
+
 
 @projects_bp.route('', methods=['POST'])
 @jwt_required()
@@ -43,31 +450,25 @@ def create_project():
     """
     try:
         # Get current user
-        current_user_id = int(get_jwt_identity())
+        current_user_id = current_uid()
         
-        # Import models locally to avoid circular imports
-        from models import Project
-        
-        # Get project data from request
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        name = data.get('name', '').strip()
-        description = data.get('description', '').strip()
-        
-        if not name:
-            return jsonify({"error": "Project name is required"}), 400
+        # Get and validate project data from request
+        params, error = parse_body(ProjectCreateParams, request.get_json(silent=True))
+        if error:
+            if error == "Missing required parameter: name":
+                error = "Project name is required"
+            return jsonify({"error": error}), 400
         
         # Create new project
         new_project = Project(
             user_id=current_user_id,
-            name=name,
-            description=description
+            name=params.name,
+            description=params.description
         )
         
         db.session.add(new_project)
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         
         return jsonify({
             "message": "Project created successfully",
@@ -80,7 +481,7 @@ def create_project():
         }), 201
         
     except ValueError as e:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Project creation failed: {str(e)}"}), 500
@@ -94,44 +495,31 @@ def get_project(project_id):
     """
     try:
         # Get current user
-        current_user_id = int(get_jwt_identity())
+        current_user_id = current_uid()
         
-        # Import models locally to avoid circular imports
-        from models import Project
+        # Serve a recent response while nothing in this user's projects changed
+        cache_key = response_cache.cache_key(current_user_id, f"project:{project_id}")
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return Response(cached, mimetype='application/json'), 200
         
-        # Get project
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
         
-        # Check if user has access to this project
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
-        
-        # Import Dataset for legacy dataset queries
-        from models import Dataset
-        
-        # Get datasets with their info from many-to-many relationship
-        datasets_from_m2m = project.datasets
-        # Also get legacy datasets linked via project_id
-        legacy_datasets = Dataset.query.filter_by(project_id=project_id).all()
-        
-        # Combine and deduplicate datasets
-        all_datasets = {ds.id: ds for ds in datasets_from_m2m}
-        for ds in legacy_datasets:
-            if ds.id not in all_datasets:
-                all_datasets[ds.id] = ds
+        # Datasets from the many-to-many relationship and legacy project_id links
+        all_datasets = _project_datasets(project_id, defer(Dataset.schema_info))
         
         datasets_info = []
-        for dataset in all_datasets.values():
+        for dataset in all_datasets:
             datasets_info.append({
                 'id': dataset.id,
                 'name': dataset.name,
                 'file_name': dataset.file_name,
-                'created_at': dataset.created_at.isoformat() if dataset.created_at else None
+                'created_at': dataset.created_at
             })
         
-        return jsonify({
+        response = jsonify({
             "project": {
                 "id": project.id,
                 "name": project.name,
@@ -141,15 +529,59 @@ def get_project(project_id):
                 "selected_method": project.selected_method,
                 "analysis_config": project.analysis_config,
                 "last_results": project.last_results,
-                "updated_at": project.updated_at.isoformat() if project.updated_at else None,
+                "updated_at": project.updated_at,
                 "datasets_count": len(all_datasets),
                 "datasets": datasets_info,
-                "analyses_count": len(project.analyses)
+                "analyses_count": db.session.query(func.count(Analysis.id)).filter_by(project_id=project.id).scalar()
             }
-        }), 200
+        })
+        response_cache.put(cache_key, response.get_data(as_text=True))
+        return response, 200
         
     except ValueError as e:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
+    except Exception as e:
+        return jsonify({"error": f"Failed to get project: {str(e)}"}), 500
+
+
+@projects_bp.route('/<int:project_id>/full', methods=['GET'])
+@jwt_required()
+def get_project_full(project_id):
+    """
+    Get a project together with its datasets and analyses in one response.
+    Same shapes as GET /<id>, GET /<id>/datasets, plus the analyses list,
+    so a project screen needs a single request instead of three.
+    """
+    try:
+        current_user_id = current_uid()
+        
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
+        
+        datasets = _project_datasets(project_id)
+        analyses = Analysis.query.filter_by(project_id=project_id).all()
+        
+        return jsonify({
+            "project": {
+                "id": project.id,
+                "name": project.name,
+                "description": project.description,
+                "user_id": project.user_id,
+                "current_step": project.current_step,
+                "selected_method": project.selected_method,
+                "analysis_config": project.analysis_config,
+                "last_results": project.last_results,
+                "updated_at": project.updated_at,
+                "datasets_count": len(datasets),
+                "analyses_count": len(analyses)
+            },
+            "datasets": [dataset.to_dict() for dataset in datasets],
+            "analyses": [analysis.to_dict() for analysis in analyses]
+        }), 200
+        
+    except ValueError:
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         return jsonify({"error": f"Failed to get project: {str(e)}"}), 500
 
@@ -172,16 +604,11 @@ def update_project(project_id):
     }
     """
     try:
-        current_user_id = int(get_jwt_identity())
-        
-        from models import Project, Dataset
-        
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        current_user_id = current_uid()
         
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        project = _owned_project(project_id, current_user_id, lock=True)
+        if project is None:
+            return _project_access_error(project_id)
         
         data = request.get_json()
         if not data:
@@ -202,35 +629,23 @@ def update_project(project_id):
         if 'dataset_id' in data:
             dataset_id = data['dataset_id']
             if dataset_id:
-                dataset = Dataset.query.get(dataset_id)
-                if not dataset:
-                    return jsonify({"error": "Dataset not found"}), 404
-                if dataset.user_id != current_user_id:
-                    return jsonify({"error": "Access denied to this dataset"}), 403
-                
-                # Unlink any existing datasets from this project (many-to-many)
-                project.datasets.clear()
+                dataset = _owned_dataset(dataset_id, current_user_id)
+                if dataset is None:
+                    return _dataset_access_error(dataset_id, "Access denied to this dataset")
                 
-                # Also clear legacy project_id links for this project
-                Dataset.query.filter_by(project_id=project_id).update({'project_id': None})
+                # Unlink any existing datasets (many-to-many and legacy project_id)
+                _unlink_project_datasets(project_id)
                 
                 # Link the new dataset using many-to-many relationship
-                project.datasets.append(dataset)
+                db.session.execute(
+                    project_datasets.insert().values(project_id=project_id, dataset_id=dataset.id)
+                )
         
         # Update state fields if provided
-        if 'current_step' in data:
-            project.current_step = data['current_step']
-        
-        if 'selected_method' in data:
-            project.selected_method = data['selected_method']
-        
-        if 'analysis_config' in data:
-            project.analysis_config = data['analysis_config']
-        
-        if 'last_results' in data:
-            project.last_results = data['last_results']
+        _apply_project_state(project, data)
         
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         
         return jsonify({
             "message": "Project updated successfully",
@@ -238,7 +653,7 @@ def update_project(project_id):
         }), 200
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to update project: {str(e)}"}), 500
@@ -259,48 +674,45 @@ def save_project_state(project_id):
     }
     """
     try:
-        current_user_id = int(get_jwt_identity())
-        
-        from models import Project
-        
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        current_user_id = current_uid()
         
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        # The JSON columns are compared by hash, so don't fetch them
+        project = _owned_project(
+            project_id, current_user_id,
+            defer(Project.analysis_config), defer(Project.last_results),
+            lock=True
+        )
+        if project is None:
+            return _project_access_error(project_id)
         
         data = request.get_json()
         if not data:
+            db.session.rollback()
             return jsonify({"error": "No data provided"}), 400
         
-        # Update state fields
-        if 'current_step' in data:
-            project.current_step = data['current_step']
-        
-        if 'selected_method' in data:
-            project.selected_method = data['selected_method']
+        # Update state fields; unchanged autosaves skip the UPDATE entirely
+        changed = _apply_project_state(project, data)
         
-        if 'analysis_config' in data:
-            project.analysis_config = data['analysis_config']
+        state = {
+            "id": project.id,
+            "current_step": project.current_step,
+            "selected_method": project.selected_method,
+            "analysis_config": project.analysis_config
+        }
         
-        if 'last_results' in data:
-            project.last_results = data['last_results']
-        
-        db.session.commit()
+        if changed:
+            db.session.commit()
+            response_cache.invalidate_user(current_user_id)
+        else:
+            db.session.rollback()  # release the row lock
         
         return jsonify({
             "message": "Project state saved successfully",
-            "project": {
-                "id": project.id,
-                "current_step": project.current_step,
-                "selected_method": project.selected_method,
-                "analysis_config": project.analysis_config
-            }
+            "project": state
         }), 200
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to save project state: {str(e)}"}), 500
@@ -313,33 +725,26 @@ def delete_project(project_id):
     Delete a project and optionally its associated datasets.
     """
     try:
-        current_user_id = int(get_jwt_identity())
-        
-        from models import Project, Dataset
-        
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        current_user_id = current_uid()
         
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
         
         # Unlink datasets from this project (don't delete them)
-        # Clear many-to-many relationships
-        project.datasets.clear()
-        # Also clear legacy project_id links for this project
-        Dataset.query.filter_by(project_id=project_id).update({'project_id': None})
+        _unlink_project_datasets(project_id)
         
         # Delete the project
         db.session.delete(project)
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         
         return jsonify({
             "message": "Project deleted successfully"
         }), 200
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to delete project: {str(e)}"}), 500
@@ -350,52 +755,73 @@ def delete_project(project_id):
 def list_projects():
     """
     List all projects for the authenticated user, including progress state.
+    
+    Optional keyset paging: ?limit=N (capped at 200), then ?after=<next_cursor>
+    from the previous page. When more rows remain the body has next_cursor and
+    the response carries a Link: <...>; rel="next" header.
     """
     try:
         # Get current user
-        current_user_id = int(get_jwt_identity())
-        
-        # Import models locally to avoid circular imports
-        from models import Project
-        
-        # Get user's projects, ordered by most recently updated first
-        projects = Project.query.filter_by(user_id=current_user_id).order_by(
-            Project.updated_at.desc().nullslast()
-        ).all()
-        
-        # Import Dataset for legacy dataset queries
-        from models import Dataset
+        current_user_id = current_uid()
+        
+        limit, after, error = _page_params()
+        if error:
+            return error
+        
+        # Serve a recent response while nothing in this user's projects changed
+        # (only the unpaged list, which is what the projects page polls)
+        cache_key = response_cache.cache_key(current_user_id, "projects") if limit is None else None
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return Response(cached, mimetype='application/json'), 200
+        
+        # Get user's projects with their counts in one query, ordered by most
+        # recently updated first. Only the list-view columns are selected, so
+        # the large analysis_config/last_results values are never fetched.
+        datasets_count, analyses_count = _project_count_columns()
+        query = db.session.query(
+            Project.id,
+            Project.name,
+            Project.description,
+            Project.current_step,
+            Project.selected_method,
+            Project.updated_at,
+            datasets_count,
+            analyses_count
+        ).filter(
+            Project.user_id == current_user_id
+        ).order_by(
+            Project.updated_at.desc().nullslast(),
+            Project.id.desc()
+        )
+        rows, next_cursor = _paged(query, limit, after, Project.updated_at, Project.id)
         
         projects_data = []
-        for project in projects:
-            # Get datasets from many-to-many relationship
-            datasets_from_m2m = project.datasets
-            # Also get legacy datasets linked via project_id
-            legacy_datasets = Dataset.query.filter_by(project_id=project.id).all()
-            # Combine and deduplicate
-            all_dataset_ids = {ds.id for ds in datasets_from_m2m}
-            for ds in legacy_datasets:
-                if ds.id not in all_dataset_ids:
-                    all_dataset_ids.add(ds.id)
-            
+        for row in rows:
             projects_data.append({
-                "id": project.id,
-                "name": project.name,
-                "description": project.description,
-                "datasets_count": len(all_dataset_ids),
-                "analyses_count": len(project.analyses),
-                "current_step": project.current_step,
-                "selected_method": project.selected_method,
-                "updated_at": project.updated_at.isoformat() if project.updated_at else None
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "datasets_count": row.datasets_count,
+                "analyses_count": row.analyses_count,
+                "current_step": row.current_step,
+                "selected_method": row.selected_method,
+                "updated_at": row.updated_at
             })
         
-        return jsonify({
+        body = {
             "projects": projects_data,
             "count": len(projects_data)
-        }), 200
+        }
+        if limit is not None:
+            body["has_more"] = next_cursor is not None
+            body["next_cursor"] = next_cursor
+        response = jsonify(body)
+        response_cache.put(cache_key, response.get_data(as_text=True))
+        return _with_next_link(response, limit, next_cursor), 200
         
     except ValueError as e:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         return jsonify({"error": f"Failed to list projects: {str(e)}"}), 500
 
@@ -410,22 +836,22 @@ def upload_file(project_id):
     Expected form data:
     - file: CSV file to upload
     - name: Optional dataset name (defaults to filename)
+    
+    With ?async=true the S3 transfer runs in the background and the response
+    is 202 with a status_url to poll (see GET /uploads/<dataset_id>).
     """
     try:
-        # Get current user
-        current_user_id = int(get_jwt_identity())
-        
-        # Import models locally to avoid circular imports
-        from models import Dataset, Project
+        # Reject oversize uploads from the declared length, before parsing the body
+        too_large = _upload_too_large()
+        if too_large:
+            return too_large
         
-        # Check if project exists and user has access
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        # Get current user
+        current_user_id = current_uid()
         
-        # Check if user has access to this project
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
         
         # Validate file upload
         if 'file' not in request.files:
@@ -433,57 +859,214 @@ def upload_file(project_id):
 
         file = request.files['file']
         
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
         # Validate file type (only allow CSV files)
-        if not file.filename.lower().endswith('.csv'):
-            return jsonify({"error": "Only CSV files are allowed"}), 400
-        
-        # Validate file size (limit to 10MB)
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
-        
-        if file_size > 10 * 1024 * 1024:  # 10MB limit
-            return jsonify({"error": "File size too large. Maximum size is 10MB"}), 400
+        stem, safe_name, error = _check_csv_upload(file)
+        if error:
+            return error
         
         # Get dataset name from form data (default to filename without extension)
         dataset_name = request.form.get('name', '').strip()
         if not dataset_name:
-            dataset_name = os.path.splitext(file.filename)[0]
+            dataset_name = stem
         
         # Create unique filename to avoid overwrites
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
+        unique_filename = f"{_uuid7().hex}.csv"
         s3_key = f"uploads/user_{current_user_id}/{unique_filename}"
         
-        # Upload file to S3
-        s3_client.upload_fileobj(
-            file,
+        extra_args = {
+            'ContentType': 'text/csv',
+            'ContentEncoding': 'gzip',
+            'Metadata': {
+                'original-filename': safe_name,
+                'project-id': str(project_id),
+                'uploaded-by': str(current_user_id)
+            }
+        }
+        background = _wants_background_upload()
+        
+        # Compress, upload to S3 and save metadata to database
+        new_dataset = Dataset(
+            user_id=current_user_id,
+            project_id=project_id,
+            name=dataset_name,
+            file_name=file.filename,
+            s3_key=s3_key
+        )
+        file_size = _save_uploaded_csv(file, new_dataset, extra_args, background)
+        response_cache.invalidate_user(current_user_id)
+        
+        if background:
+            return _upload_accepted(new_dataset, file_size)
+        
+        return jsonify({
+            "message": "File uploaded successfully",
+            "dataset": new_dataset.to_dict(),
+            "file_size": file_size
+        }), 201
+        
+    except ValueError as e:
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
+    except RequestEntityTooLarge:
+        # Chunked body over MAX_CONTENT_LENGTH: answered by the app's 413 handler
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+
+
+@projects_bp.route('/uploads/<int:dataset_id>', methods=['GET'])
+@jwt_required()
+def get_upload_status(dataset_id):
+    """
+    Status of a background upload started with ?async=true on POST /<id>/upload
+    or POST /user/datasets/upload.
+
+    Returns {"status": "pending" | "complete"}; a failed transfer removes the
+    dataset, so it answers 404 with status "failed".
+    """
+    try:
+        current_user_id = current_uid()
+
+        dataset = _owned_dataset(dataset_id, current_user_id)
+        if dataset is None:
+            return jsonify({"status": "failed", "error": "Upload not found"}), 404
+
+        try:
+            s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=dataset.s3_key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return jsonify({"status": "pending", "dataset_id": dataset_id}), 200
+            raise
+
+        return jsonify({"status": "complete", "dataset": dataset.to_dict()}), 200
+
+    except ValueError as e:
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
+    except Exception as e:
+        return jsonify({"error": f"Failed to get upload status: {str(e)}"}), 500
+
+
+PRESIGNED_UPLOAD_EXPIRES = 300  # seconds
+
+
+@projects_bp.route('/<int:project_id>/upload-url', methods=['POST'])
+@jwt_required()
+def create_upload_url(project_id):
+    """
+    Issue a presigned S3 POST so the browser uploads a CSV straight to S3.
+    The file never passes through this server; call confirm-upload afterwards.
+    
+    Expected JSON:
+    {
+        "file_name": "data.csv"
+    }
+    
+    Returns {"url", "fields", "s3_key"}: POST the file as multipart form data
+    to url with every field in fields plus "file" last.
+    """
+    try:
+        current_user_id = current_uid()
+        
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+        
+        file_name = (data.get('file_name') or '').strip()
+        if not file_name:
+            return jsonify({"error": "file_name is required"}), 400
+        if file_name[-4:].lower() != '.csv':
+            return jsonify({"error": "Only CSV files are allowed"}), 400
+        
+        s3_key = f"uploads/user_{current_user_id}/{_uuid7().hex}.csv"
+        presigned = s3_client.generate_presigned_post(
             S3_BUCKET_NAME,
             s3_key,
-            ExtraArgs={
-                'ContentType': 'text/csv',
-                'Metadata': {
-                    'original-filename': file.filename,
-                    'project-id': str(project_id),
-                    'uploaded-by': str(current_user_id)
-                }
-            }
+            Fields={'Content-Type': 'text/csv'},
+            Conditions=[
+                {'Content-Type': 'text/csv'},
+                ['content-length-range', 1, MAX_UPLOAD_BYTES]
+            ],
+            ExpiresIn=PRESIGNED_UPLOAD_EXPIRES
         )
         
-        # Save metadata to database
+        return jsonify({
+            "url": presigned['url'],
+            "fields": presigned['fields'],
+            "s3_key": s3_key,
+            "expires_in": PRESIGNED_UPLOAD_EXPIRES
+        }), 200
+        
+    except ValueError:
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
+    except Exception as e:
+        return jsonify({"error": f"Failed to create upload URL: {str(e)}"}), 500
+
+
+@projects_bp.route('/<int:project_id>/confirm-upload', methods=['POST'])
+@jwt_required()
+def confirm_upload(project_id):
+    """
+    Register a CSV uploaded directly to S3 via upload-url as a dataset.
+    
+    Expected JSON:
+    {
+        "s3_key": "uploads/user_1/<uuid>.csv",
+        "file_name": "data.csv",
+        "name": "Optional dataset name (defaults to filename)"
+    }
+    """
+    try:
+        current_user_id = current_uid()
+        
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+        
+        s3_key = (data.get('s3_key') or '').strip()
+        file_name = (data.get('file_name') or '').strip()
+        if not s3_key or not file_name:
+            return jsonify({"error": "s3_key and file_name are required"}), 400
+        
+        # Only keys issued to this user can be claimed, and only once
+        if not s3_key.startswith(f"uploads/user_{current_user_id}/"):
+            return jsonify({"error": "Access denied"}), 403
+        if Dataset.query.filter_by(s3_key=s3_key).first():
+            return jsonify({"error": "Upload already confirmed"}), 409
+        
+        # Verify the object actually landed and respects the upload limits
+        try:
+            head = s3_client.head_object(Bucket=S3_BUCKET_NAME, Key=s3_key)
+        except Exception:
+            return jsonify({"error": "Uploaded file not found"}), 404
+        file_size = head.get('ContentLength', 0)
+        if file_size > MAX_UPLOAD_BYTES:
+            return jsonify({"error": "File size too large. Maximum size is 10MB"}), 400
+        if head.get('ContentType') != 'text/csv':
+            return jsonify({"error": "Only CSV files are allowed"}), 400
+        
+        dataset_name = (data.get('name') or '').strip()
+        if not dataset_name:
+            dataset_name = os.path.splitext(file_name)[0]
+        
         new_dataset = Dataset(
             user_id=current_user_id,
             project_id=project_id,
             name=dataset_name,
-            file_name=file.filename,
+            file_name=file_name,
             s3_key=s3_key
         )
         
         db.session.add(new_dataset)
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         
         return jsonify({
             "message": "File uploaded successfully",
@@ -491,11 +1074,11 @@ def upload_file(project_id):
             "file_size": file_size
         }), 201
         
-    except ValueError as e:
-        return jsonify({"error": "Invalid token identity"}), 401
+    except ValueError:
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": f"Upload failed: {str(e)}"}), 500
+        return jsonify({"error": f"Upload confirmation failed: {str(e)}"}), 500
 
 
 @projects_bp.route('/<int:project_id>/datasets', methods=['GET'])
@@ -506,42 +1089,36 @@ def list_datasets(project_id):
     """
     try:
         # Get current user
-        current_user_id = int(get_jwt_identity())
+        current_user_id = current_uid()
         
-        # Import models locally to avoid circular imports
-        from models import Project, Dataset
+        # A cached body implies ownership: it was stored for this user and any
+        # project or dataset change (including deletion) orphans it
+        cache_key = response_cache.cache_key(current_user_id, f"project:{project_id}:datasets")
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return Response(cached, mimetype='application/json'), 200
         
-        # Check if project exists and user has access
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
-        
-        # Check if user has access to this project
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
         
         # Get datasets for this project using many-to-many relationship
         # Also include legacy datasets linked via project_id for backward compatibility
-        datasets_from_m2m = project.datasets
-        legacy_datasets = Dataset.query.filter_by(project_id=project_id).all()
-        
-        # Combine and deduplicate datasets
-        all_datasets = {ds.id: ds for ds in datasets_from_m2m}
-        for ds in legacy_datasets:
-            if ds.id not in all_datasets:
-                all_datasets[ds.id] = ds
+        # (schema_info is not needed for the list and is never fetched)
+        datasets_data = [
+            dataset.to_summary_dict()
+            for dataset in _project_datasets(project_id, defer(Dataset.schema_info))
+        ]
         
-        datasets_data = []
-        for dataset in all_datasets.values():
-            datasets_data.append(dataset.to_dict())
-        
-        return jsonify({
+        response = jsonify({
             "datasets": datasets_data,
             "count": len(datasets_data)
-        }), 200
+        })
+        response_cache.put(cache_key, response.get_data(as_text=True))
+        return response, 200
         
     except ValueError as e:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         return jsonify({"error": f"Failed to list datasets: {str(e)}"}), 500
 
@@ -560,17 +1137,11 @@ def link_dataset_to_project(project_id):
     }
     """
     try:
-        current_user_id = int(get_jwt_identity())
-        
-        from models import Project, Dataset, project_datasets
-        
-        # Check if project exists and user has access
-        project = Project.query.get(project_id)
-        if not project:
-            return jsonify({"error": "Project not found"}), 404
+        current_user_id = current_uid()
         
-        if project.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        project = _owned_project(project_id, current_user_id)
+        if project is None:
+            return _project_access_error(project_id)
         
         data = request.get_json()
         if not data or 'dataset_id' not in data:
@@ -581,7 +1152,6 @@ def link_dataset_to_project(project_id):
 
         if dataset_id < 0:
             # Built-in sample dataset: copy to user's space and create a new Dataset row
-            from sample_data_utils import get_sample_dataset_by_id, get_sample_file_path
             sample = get_sample_dataset_by_id(dataset_id)
             if not sample:
                 return jsonify({"error": "Sample dataset not found"}), 404
@@ -592,7 +1162,7 @@ def link_dataset_to_project(project_id):
                 return jsonify({"error": "File storage is not configured; cannot link sample dataset"}), 503
             # Upload sample file to S3 under user's folder so we have a real dataset
             file_ext = os.path.splitext(sample["file_name"])[1]
-            unique_key = f"uploads/user_{current_user_id}/sample_{abs(dataset_id)}_{uuid.uuid4()}{file_ext}"
+            unique_key = f"uploads/user_{current_user_id}/sample_{abs(dataset_id)}_{_uuid7().hex}{file_ext}"
             try:
                 s3_client.upload_file(
                     file_path,
@@ -601,7 +1171,8 @@ def link_dataset_to_project(project_id):
                     ExtraArgs={
                         'ContentType': 'text/csv',
                         'Metadata': {'source': 'sample', 'sample_id': str(dataset_id)}
-                    }
+                    },
+                    Config=TRANSFER_CFG
                 )
             except Exception as e:
                 return jsonify({"error": f"Failed to copy sample data: {str(e)}"}), 500
@@ -617,20 +1188,28 @@ def link_dataset_to_project(project_id):
             dataset = new_dataset
         else:
             # Regular dataset from DB
-            dataset = Dataset.query.get(dataset_id)
-            if not dataset:
-                return jsonify({"error": "Dataset not found"}), 404
-            if dataset.user_id != current_user_id:
-                return jsonify({"error": "Access denied to this dataset"}), 403
-            if dataset in project.datasets:
+            dataset = _owned_dataset(dataset_id, current_user_id)
+            if dataset is None:
+                return _dataset_access_error(dataset_id, "Access denied to this dataset")
+            already_linked = db.session.execute(
+                select(project_datasets.c.dataset_id).where(
+                    project_datasets.c.project_id == project_id,
+                    project_datasets.c.dataset_id == dataset.id
+                )
+            ).first()
+            if already_linked:
                 return jsonify({
                     "message": "Dataset already linked to this project",
                     "dataset": dataset.to_dict()
                 }), 200
 
         # Link dataset to project using many-to-many relationship
-        project.datasets.append(dataset)
+        # (a single junction-row insert; the project's collection is never loaded)
+        db.session.execute(
+            project_datasets.insert().values(project_id=project_id, dataset_id=dataset.id)
+        )
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         
         return jsonify({
             "message": "Dataset linked to project successfully",
@@ -638,7 +1217,7 @@ def link_dataset_to_project(project_id):
         }), 200
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to link dataset: {str(e)}"}), 500
@@ -654,29 +1233,52 @@ def list_user_datasets():
     """
     List all datasets available to the current user.
     Includes built-in sample datasets (bodycam, cct_data) for all users.
+    
+    Optional keyset paging (?limit=N&after=<next_cursor>, as in list_projects)
+    over the user's own datasets; sample datasets are prepended to the first
+    page only.
     """
     try:
-        current_user_id = int(get_jwt_identity())
+        current_user_id = current_uid()
+        
+        limit, after, error = _page_params()
+        if error:
+            return error
         
-        from models import Dataset
-        from sample_data_utils import list_sample_datasets_for_user
+        # Unpaged listing only, as in list_projects
+        cache_key = response_cache.cache_key(current_user_id, "user_datasets") if limit is None else None
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            return Response(cached, mimetype='application/json'), 200
         
         # Get all datasets for this user
-        datasets = Dataset.query.filter_by(user_id=current_user_id).order_by(Dataset.created_at.desc()).all()
+        query = Dataset.query.options(defer(Dataset.schema_info)).filter_by(
+            user_id=current_user_id
+        ).order_by(
+            Dataset.created_at.desc(), Dataset.id.desc()
+        )
+        datasets, next_cursor = _paged(query, limit, after, Dataset.created_at, Dataset.id)
         
-        datasets_data = [dataset.to_dict() for dataset in datasets]
+        datasets_data = [dataset.to_summary_dict() for dataset in datasets]
         
         # Prepend built-in sample datasets so every user sees them
-        sample_datasets = list_sample_datasets_for_user(current_user_id)
-        datasets_data = sample_datasets + datasets_data
+        if after is None:
+            sample_datasets = list_sample_datasets_for_user(current_user_id)
+            datasets_data = sample_datasets + datasets_data
         
-        return jsonify({
+        body = {
             "datasets": datasets_data,
             "count": len(datasets_data)
-        }), 200
+        }
+        if limit is not None:
+            body["has_more"] = next_cursor is not None
+            body["next_cursor"] = next_cursor
+        response = jsonify(body)
+        response_cache.put(cache_key, response.get_data(as_text=True))
+        return _with_next_link(response, limit, next_cursor), 200
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         return jsonify({"error": f"Failed to list datasets: {str(e)}"}), 500
 
@@ -691,11 +1293,16 @@ def upload_user_dataset():
     Expected form data:
     - file: CSV file to upload
     - name: Dataset name (required)
+    
+    Accepts ?async=true like POST /<id>/upload.
     """
     try:
-        current_user_id = int(get_jwt_identity())
+        # Reject oversize uploads from the declared length, before parsing the body
+        too_large = _upload_too_large()
+        if too_large:
+            return too_large
         
-        from models import Dataset
+        current_user_id = current_uid()
         
         # Validate file upload
         if 'file' not in request.files:
@@ -703,47 +1310,32 @@ def upload_user_dataset():
 
         file = request.files['file']
         
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
         # Validate file type (only allow CSV files)
-        if not file.filename.lower().endswith('.csv'):
-            return jsonify({"error": "Only CSV files are allowed"}), 400
-        
-        # Validate file size (limit to 10MB)
-        file.seek(0, 2)  # Seek to end
-        file_size = file.tell()
-        file.seek(0)  # Reset to beginning
-        
-        if file_size > 10 * 1024 * 1024:  # 10MB limit
-            return jsonify({"error": "File size too large. Maximum size is 10MB"}), 400
+        stem, safe_name, error = _check_csv_upload(file)
+        if error:
+            return error
         
         # Get dataset name from form data (required)
         dataset_name = request.form.get('name', '').strip()
         if not dataset_name:
             # Default to filename without extension
-            dataset_name = os.path.splitext(file.filename)[0]
+            dataset_name = stem
         
         # Create unique filename to avoid overwrites
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
+        unique_filename = f"{_uuid7().hex}.csv"
         s3_key = f"uploads/user_{current_user_id}/{unique_filename}"
         
-        # Upload file to S3
-        s3_client.upload_fileobj(
-            file,
-            S3_BUCKET_NAME,
-            s3_key,
-            ExtraArgs={
-                'ContentType': 'text/csv',
-                'Metadata': {
-                    'original-filename': file.filename,
-                    'uploaded-by': str(current_user_id)
-                }
+        extra_args = {
+            'ContentType': 'text/csv',
+            'ContentEncoding': 'gzip',
+            'Metadata': {
+                'original-filename': safe_name,
+                'uploaded-by': str(current_user_id)
             }
-        )
+        }
+        background = _wants_background_upload()
         
-        # Save metadata to database (no project_id)
+        # Compress, upload to S3 and save metadata to database (no project_id)
         new_dataset = Dataset(
             user_id=current_user_id,
             project_id=None,  # No project yet
@@ -751,9 +1343,11 @@ def upload_user_dataset():
             file_name=file.filename,
             s3_key=s3_key
         )
+        file_size = _save_uploaded_csv(file, new_dataset, extra_args, background)
+        response_cache.invalidate_user(current_user_id)
         
-        db.session.add(new_dataset)
-        db.session.commit()
+        if background:
+            return _upload_accepted(new_dataset, file_size)
         
         return jsonify({
             "message": "Dataset uploaded successfully",
@@ -762,7 +1356,10 @@ def upload_user_dataset():
         }), 201
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
+    except RequestEntityTooLarge:
+        # Chunked body over MAX_CONTENT_LENGTH: answered by the app's 413 handler
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Upload failed: {str(e)}"}), 500
@@ -778,36 +1375,129 @@ def delete_user_dataset(dataset_id):
     try:
         if dataset_id < 0:
             return jsonify({"error": "Sample datasets cannot be deleted"}), 400
-        current_user_id = int(get_jwt_identity())
-        from models import Dataset
-        dataset = Dataset.query.get(dataset_id)
-        if not dataset:
-            return jsonify({"error": "Dataset not found"}), 404
-        
-        if dataset.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        current_user_id = current_uid()
+        dataset = _owned_dataset(dataset_id, current_user_id)
+        if dataset is None:
+            return _dataset_access_error(dataset_id)
         
         # Delete from S3
         try:
             s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=dataset.s3_key)
         except Exception as s3_error:
             print(f"Warning: Failed to delete S3 object: {s3_error}")
+        _delete_s3_keys(_dataset_result_keys([dataset.s3_key]))
         
         # Delete from database
         db.session.delete(dataset)
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         
         return jsonify({
             "message": "Dataset deleted successfully"
         }), 200
         
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to delete dataset: {str(e)}"}), 500
 
 
+MAX_BULK_DELETE = 1000  # S3 DeleteObjects accepts at most 1000 keys per call
+
+
+def _dataset_result_keys(s3_keys):
+    """Keys of the analysis results persisted for these dataset objects."""
+    keys = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for s3_key in s3_keys:
+        try:
+            for page in paginator.paginate(Bucket=S3_BUCKET_NAME, Prefix=dataset_results_prefix(s3_key)):
+                keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        except Exception as s3_error:
+            print(f"Warning: Failed to list results of {s3_key}: {s3_error}")
+    return keys
+
+
+def _delete_s3_keys(keys):
+    """Delete S3 objects in DeleteObjects batches; failures are only logged."""
+    for start in range(0, len(keys), MAX_BULK_DELETE):
+        batch = keys[start:start + MAX_BULK_DELETE]
+        try:
+            result = s3_client.delete_objects(
+                Bucket=S3_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            for err in result.get('Errors', []):
+                print(f"Warning: Failed to delete S3 object {err.get('Key')}: {err.get('Message')}")
+        except Exception as s3_error:
+            print(f"Warning: Failed to delete S3 objects: {s3_error}")
+
+
+@projects_bp.route('/user/datasets', methods=['DELETE'])
+@projects_bp.route('/user/datasets/bulk-delete', methods=['POST'])
+@jwt_required()
+def delete_user_datasets():
+    """
+    Delete several datasets owned by the current user in one request.
+    Also served as POST /user/datasets/bulk-delete for clients and proxies
+    that drop DELETE request bodies.
+
+    Expected JSON:
+    {
+        "dataset_ids": [1, 2, 3]
+    }
+
+    Ids that do not exist or belong to another user are skipped; the
+    response lists the ids actually deleted. Database rows go in bulk
+    statements, S3 objects in a single DeleteObjects call after the commit.
+    """
+    try:
+        current_user_id = current_uid()
+
+        data = request.get_json(silent=True) or {}
+        dataset_ids = data.get('dataset_ids')
+        if not isinstance(dataset_ids, list) or not dataset_ids:
+            return jsonify({"error": "dataset_ids must be a non-empty list"}), 400
+        if len(dataset_ids) > MAX_BULK_DELETE:
+            return jsonify({"error": f"At most {MAX_BULK_DELETE} datasets can be deleted at once"}), 400
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in dataset_ids):
+            return jsonify({"error": "dataset_ids must contain integers"}), 400
+        if any(i < 0 for i in dataset_ids):
+            return jsonify({"error": "Sample datasets cannot be deleted"}), 400
+
+        # Ownership is checked in the same query that finds the rows
+        owned = db.session.query(Dataset.id, Dataset.s3_key).filter(
+            Dataset.id.in_(dataset_ids),
+            Dataset.user_id == current_user_id
+        ).all()
+        if not owned:
+            return jsonify({"error": "Dataset not found"}), 404
+        owned_ids = [row.id for row in owned]
+
+        db.session.execute(
+            project_datasets.delete().where(project_datasets.c.dataset_id.in_(owned_ids))
+        )
+        Dataset.query.filter(Dataset.id.in_(owned_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        response_cache.invalidate_user(current_user_id)
+
+        # Objects are removed after the rows, so no row ever points at a missing file
+        s3_keys = [row.s3_key for row in owned]
+        _delete_s3_keys(s3_keys + _dataset_result_keys(s3_keys))
+
+        return jsonify({
+            "message": f"Deleted {len(owned_ids)} dataset(s)",
+            "deleted_ids": owned_ids
+        }), 200
+
+    except ValueError:
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to delete datasets: {str(e)}"}), 500
+
+
 @projects_bp.route('/user/datasets/<int:dataset_id>', methods=['PATCH'])
 @jwt_required()
 def update_user_dataset(dataset_id):
@@ -818,13 +1508,10 @@ def update_user_dataset(dataset_id):
     try:
         if dataset_id < 0:
             return jsonify({"error": "Sample datasets cannot be renamed"}), 400
-        current_user_id = int(get_jwt_identity())
-        from models import Dataset
-        dataset = Dataset.query.get(dataset_id)
-        if not dataset:
-            return jsonify({"error": "Dataset not found"}), 404
-        if dataset.user_id != current_user_id:
-            return jsonify({"error": "Access denied"}), 403
+        current_user_id = current_uid()
+        dataset = _owned_dataset(dataset_id, current_user_id)
+        if dataset is None:
+            return _dataset_access_error(dataset_id)
         data = request.get_json()
         if not data:
             return jsonify({"error": "No data provided"}), 400
@@ -835,12 +1522,13 @@ def update_user_dataset(dataset_id):
             return jsonify({"error": "Dataset name is too long"}), 400
         dataset.name = new_name
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
         return jsonify({
             "message": "Dataset updated successfully",
             "dataset": dataset.to_dict()
         }), 200
     except ValueError:
-        return jsonify({"error": "Invalid token identity"}), 401
+        return _canned_error(_ERR_INVALID_TOKEN, 401)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Failed to update dataset: {str(e)}"}), 500
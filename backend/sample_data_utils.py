@@ -3,8 +3,10 @@ Utilities for built-in sample datasets (CSV files in backend/sample data/).
 Sample datasets are exposed to all users with negative IDs and resolved from local disk.
 """
 
+import functools
 import os
 from datetime import datetime
+from types import MappingProxyType
 
 # Directory containing sample CSV files (relative to this file: backend/sample data/)
 SAMPLE_DATA_DIR = os.path.join(os.path.dirname(__file__), "sample data")
@@ -41,36 +43,51 @@ def get_sample_file_path(s3_key):
     """
     if not s3_key or not s3_key.startswith("__sample__/"):
         return None
-    filename = s3_key.replace("__sample__/", "", 1)
+    return _sample_file_path(s3_key.replace("__sample__/", "", 1))
+
+
+@functools.lru_cache(maxsize=32)
+def _sample_file_path(filename):
+    # Sample files ship with the code and do not change at runtime, so the
+    # stat result is cached for the life of the process
     path = os.path.join(SAMPLE_DATA_DIR, filename)
     return path if os.path.isfile(path) else None
 
 
+# id -> config, for O(1) lookups by dataset id
+_SAMPLE_BY_ID = MappingProxyType({d["id"]: d for d in SAMPLE_DATASETS})
+
+
 def get_sample_dataset_by_id(dataset_id):
     """Return the sample dataset config for a negative dataset_id, or None."""
-    for d in SAMPLE_DATASETS:
-        if d["id"] == dataset_id:
-            return d.copy()
-    return None
+    d = _SAMPLE_BY_ID.get(dataset_id)
+    return d.copy() if d is not None else None
+
+
+# Display timestamp for sample datasets: fixed per process so repeated listings agree
+SAMPLE_LISTED_AT = datetime.utcnow().isoformat() + "Z"
+
+# API payloads (to_dict style) built once at import; only user_id varies per call
+_SAMPLE_TEMPLATES = tuple(
+    {
+        "id": d["id"],
+        "user_id": None,
+        "project_id": None,
+        "name": d["name"],
+        "file_name": d["file_name"],
+        "s3_key": d["s3_key"],
+        "schema_info": None,
+        "created_at": SAMPLE_LISTED_AT,
+        "is_sample": True,
+    }
+    for d in SAMPLE_DATASETS
+)
 
 
 def list_sample_datasets_for_user(current_user_id):
     """
     Return list of sample dataset dicts in API format (to_dict style),
     with user_id set to current_user_id and created_at set for display.
+    Each call returns fresh dicts, so callers may modify them.
     """
-    created = datetime.utcnow().isoformat() + "Z"
-    out = []
-    for d in SAMPLE_DATASETS:
-        out.append({
-            "id": d["id"],
-            "user_id": current_user_id,
-            "project_id": None,
-            "name": d["name"],
-            "file_name": d["file_name"],
-            "s3_key": d["s3_key"],
-            "schema_info": None,
-            "created_at": created,
-            "is_sample": True,
-        })
-    return out
+    return [{**tpl, "user_id": current_user_id} for tpl in _SAMPLE_TEMPLATES]
@@ -2,44 +2,121 @@
 AI Assistant Service - Comprehensive AI support throughout the analysis workflow
 """
 
+import hashlib
+import logging
 import os
-import json
-from typing import Dict, Any, Optional, List
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, Iterable, Iterator, Optional, List, Tuple
+
+import numpy as np
+import orjson
+
+from services.gemini_client import (
+    batch_generate_content_text,
+    embed_text,
+    generate_content_text,
+    resolve_model_id_from_env,
+    stream_content_text,
+)
+from utils import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Static guidelines for chat(); sent as its system instruction rather than
+# prepended to every turn's prompt.
+CHAT_SYSTEM_INSTRUCTION = """You are a helpful AI assistant specializing in causal inference and econometrics. 
+You help users understand their analysis results, datasets, and causal inference concepts.
 
-from services.gemini_client import generate_content_text, resolve_model_id_from_env
+Guidelines:
+- Provide clear, concise, and accurate explanations
+- Use appropriate technical language but remain accessible
+- Reference the user's specific analysis when relevant
+- If asked about concepts, provide practical examples when possible
+- Keep responses focused and under 2000 words unless the user asks for more detail
+- DO NOT use markdown formatting like **bold** or *italic* - use plain text only
+- After your response, suggest 3 relevant follow-up questions the user might want to ask
+- IMPORTANT: The user has already received an AI interpretation of their results. Do not repeat information that has already been provided. Instead, provide nuanced, context-specific responses that build upon or clarify what they already know.
 
+IMPORTANT GUIDANCE FOR DiD ANALYSIS:
+ℹ️ What DiD Already Handles:
+- Time-invariant differences (geography, baseline characteristics) are absorbed by group fixed effects.
+- Common time shocks (macroeconomic fluctuations, seasonal patterns) are absorbed by time fixed effects.
+- DO NOT advise controlling for these.
 
-class CausalAIAssistant:
-    """
-    AI assistant that helps users throughout the causal analysis workflow:
-    1. Data quality assessment
-    2. Variable role suggestions
-    3. Method recommendation
-    4. Assumption validation
-    5. Results interpretation
-    6. Next steps guidance
-    """
-    
-    def __init__(self):
-        self.api_key = os.getenv('GOOGLE_API_KEY')
-        if not self.api_key:
-            # Don't raise error on init, just warn, so app can start even if not configured
-            print("WARNING: GOOGLE_API_KEY not found in environment variables. AI features will be disabled.")
-            self._model_id = None
-            return
+⚠️ What Users Should Control:
+- Time-varying confounders that differentially affect treatment and control groups.
+- Variables that change over time differently across groups AND correlate with both treatment status and outcome.
 
-        # Same model resolution as CausalAIService (no list_models() or probe calls).
-        self._model_id = resolve_model_id_from_env()
-        self._model_name = self._model_id
-    
-    def assess_data_quality(self, schema_info: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Analyze dataset schema and provide quality assessment.
-        """
-        prompt = f"""You are a causal inference expert. Analyze this dataset schema and provide guidance.
+🚫 Avoid "Bad Controls":
+- NEVER control for variables affected by the treatment itself.
+- Example: If studying a job training program's effect on wages, don't control for employment status.
+
+IMPORTANT: At the end of your response, include exactly 3 follow-up questions in this format:
+<FOLLOWUP_QUESTIONS>
+1. [First question]
+2. [Second question]
+3. [Third question]
+</FOLLOWUP_QUESTIONS>
+
+"""
+
+# Cache of Gemini responses by (model, prompt): in-process LRU, backed by the
+# shared Redis response cache when REDIS_URL is set. Bump CACHE_VERSION when
+# the prompt templates change meaning, to drop every old entry at once.
+CACHE_VERSION = "v1"
+CACHE_MAX = 512
+CACHE_TTL = 3600  # seconds
+# Batch API answers (prewarm_ai_cache.py, run nightly) must outlive the gap
+# between runs; a run refreshes the entries it finds still cached
+BATCH_CACHE_TTL = 48 * 3600  # seconds
+
+# Sampling temperature of the structured (JSON / explanation) prompts
+STRUCTURED_TEMPERATURE = 0.3
+
+# Concepts users most often ask explain_concept about; prewarm_concepts()
+# fills the response cache for them through the Batch API
+COMMON_CONCEPTS = (
+    "difference-in-differences", "parallel trends", "event study",
+    "staggered adoption", "two-way fixed effects", "treatment effect",
+    "average treatment effect on the treated", "regression discontinuity",
+    "running variable", "bandwidth", "sharp vs fuzzy regression discontinuity",
+    "McCrary density test", "instrumental variables", "exclusion restriction",
+    "instrument relevance", "first-stage F-statistic", "weak instruments",
+    "local average treatment effect", "two-stage least squares", "compliers",
+    "confounding", "selection bias", "endogeneity", "bad controls",
+    "placebo test", "clustered standard errors", "p-value",
+    "confidence interval", "statistical power", "external validity",
+)
+
+# Optional Gemini service tier for validate_did_setup / generate_next_steps.
+# Standard by default: both are served synchronously, and "flex" (half price)
+# can queue for minutes, past GEMINI_HTTP_TIMEOUT_MS and the worker timeout.
+# Only set AI_BACKGROUND_SERVICE_TIER=flex when those limits allow it.
+BACKGROUND_SERVICE_TIER = os.getenv('AI_BACKGROUND_SERVICE_TIER', '').strip() or None
+
+# Opt-in (AI_SEMANTIC_CACHE=1): reuse chat / explain_concept answers for
+# near-duplicate questions, judged by embedding cosine similarity. Costs one
+# embedding call per question.
+SEMANTIC_CACHE_ENABLED = os.getenv('AI_SEMANTIC_CACHE', '').lower() in ('1', 'true')
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('AI_SEMANTIC_CACHE_THRESHOLD', '0.92'))
+SEMANTIC_CACHE_MAX_SCOPES = 1024
+
+# Prior chat turns sent with a question: the newest ones, up to about this
+# many tokens (estimated at ~4 characters per token, no API call)
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('AI_CHAT_HISTORY_TOKENS', '4000'))
+_CHARS_PER_TOKEN = 4
+
+
+# Prompt templates, built once at import. Interpolated with str.format_map,
+# so literal braces in the JSON response shapes are doubled.
+_PROMPT_ASSESS_QUALITY = """You are a causal inference expert. Analyze this dataset schema and provide guidance.
 
 Dataset Schema:
-{json.dumps(schema_info, indent=2)}
+{schema}
 
 Respond with JSON only:
 {{
@@ -53,34 +130,11 @@ Respond with JSON only:
     "recommendations": ["specific recommendations for this data"]
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-    
-    def suggest_variable_roles(
-        self, 
-        schema_info: Dict[str, Any],
-        causal_question: Optional[str] = None,
-        treatment_variable: Optional[str] = None,
-        outcome_variable: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """
-        Suggest which variables should be used for outcome, treatment, time, etc.
-        """
-        question_context = f"\nUser's causal question: {causal_question}" if causal_question else ""
-        hints_context = ""
-        if treatment_variable or outcome_variable:
-            hints_context = "\nUser-provided hints from prior step:"
-            if treatment_variable:
-                hints_context += f"\n  - Treatment variable (user named it): \"{treatment_variable}\""
-            if outcome_variable:
-                hints_context += f"\n  - Outcome variable (user named it): \"{outcome_variable}\""
-            hints_context += "\nPrioritise matching these names or close variants when selecting roles."
-
-        prompt = f"""You are a causal inference expert helping a user set up their Difference-in-Differences (DiD) analysis.
+_PROMPT_DID_VARIABLE_ROLES = """You are a causal inference expert helping a user set up their Difference-in-Differences (DiD) analysis.
 {question_context}{hints_context}
 
 Dataset columns:
-{json.dumps(schema_info['columns'], indent=2)}
+{columns}
 
 Based on the column names and types, suggest the best variables for each role.
 
@@ -134,37 +188,11 @@ Respond with JSON only:
     "explanation": "Brief explanation of your selections and any alternatives"
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-
-    def suggest_rd_variable_roles(
-        self,
-        schema_info: Dict[str, Any],
-        causal_question: Optional[str] = None,
-        treatment_variable: Optional[str] = None,
-        outcome_variable: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """
-        Suggest which variables should be used for RD analysis: running variable, outcome, cutoff, treatment side.
-        """
-        question_context = f"\nUser's causal question: {causal_question}" if causal_question else ""
-        hints_context = ""
-        if treatment_variable or outcome_variable:
-            hints_context = "\nUser-provided hints from prior step:"
-            if outcome_variable:
-                hints_context += f"\n  - Outcome variable (user named it): \"{outcome_variable}\" — match this for outcome_var_suggestions."
-            if treatment_variable:
-                hints_context += (
-                    f"\n  - The user called their treatment variable \"{treatment_variable}\". "
-                    "In RD there is no binary treatment column — use this as a hint for what the running variable might be "
-                    "(e.g. a continuous version of this concept), not as a direct column match."
-                )
-
-        prompt = f"""You are a causal inference expert helping a user set up their Regression Discontinuity (RD) analysis.
+_PROMPT_RD_VARIABLE_ROLES = """You are a causal inference expert helping a user set up their Regression Discontinuity (RD) analysis.
 {question_context}{hints_context}
 
 Dataset columns:
-{json.dumps(schema_info.get('columns', []), indent=2)}
+{columns}
 
 RD requires THREE main inputs:
 1. RUNNING VARIABLE: The numeric/continuous variable that determines treatment assignment (e.g., test score, age, income). MUST be numeric.
@@ -211,27 +239,16 @@ Respond with JSON only:
     "explanation": "Brief explanation of your selections"
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-
-    def recommend_method(
-        self,
-        data_description: Dict[str, Any],
-        causal_question: str
-    ) -> Dict[str, Any]:
-        """
-        Recommend the best causal inference method based on the research question and data.
-        """
-        prompt = f"""You are a causal inference methodologist. Help the user choose the right method.
+_PROMPT_RECOMMEND_METHOD = """You are a causal inference methodologist. Help the user choose the right method.
 
 User's causal question: {causal_question}
 
 Data characteristics:
-- Rows: {data_description.get('total_rows', 'unknown')}
-- Has time variable: {data_description.get('has_time', False)}
-- Has treatment indicator: {data_description.get('has_treatment', False)}
-- Panel data: {data_description.get('is_panel', False)}
-- Natural experiment context: {data_description.get('natural_experiment', 'unknown')}
+- Rows: {total_rows}
+- Has time variable: {has_time}
+- Has treatment indicator: {has_treatment}
+- Panel data: {is_panel}
+- Natural experiment context: {natural_experiment}
 
 Available methods:
 1. Difference-in-Differences (DiD) - requires panel data with treatment/control groups observed before/after
@@ -252,45 +269,22 @@ Respond with JSON only:
     "limitations": ["limitations of recommended approach"]
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-    
-    def validate_did_setup(
-        self,
-        parameters: Dict[str, Any],
-        data_summary: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Validate DiD analysis setup before running.
-        """
-        # Extract structure info if available
-        structure_info = data_summary.get('structure_info', {})
-        structure_context = ""
-        if structure_info:
-            structure_context = f"""
-Data Structure Analysis:
-- Total Rows: {data_summary.get('total_rows')}
-- Unique Units ({structure_info.get('unit_column')}): {structure_info.get('unit_count')}
-- Unique Time Periods ({structure_info.get('time_column')}): {structure_info.get('time_count')}
-- Expected Rows (Balanced Panel): {structure_info.get('expected_rows')}
-"""
-
-        prompt = f"""You are a DiD expert. Validate this analysis setup before it runs.
+_PROMPT_VALIDATE_DID = """You are a DiD expert. Validate this analysis setup before it runs.
 Note: Empty treatment/control units lists are VALID. In that case, the system automatically assigns groups based on the treatment variable and value.
 
 Analysis Parameters:
-- Outcome variable: {parameters.get('outcome')}
-- Treatment variable: {parameters.get('treatment')}
-- Treatment value: {parameters.get('treatment_value')}
-- Time variable: {parameters.get('time')}
-- Treatment start: {parameters.get('treatment_start')}
-- Unit variable: {parameters.get('unit')}
-- Treatment units: {parameters.get('treatment_units', [])}
-- Control units: {parameters.get('control_units', [])}
-- Analysis period: {parameters.get('start_period')} to {parameters.get('end_period')}
+- Outcome variable: {outcome}
+- Treatment variable: {treatment}
+- Treatment value: {treatment_value}
+- Time variable: {time}
+- Treatment start: {treatment_start}
+- Unit variable: {unit}
+- Treatment units: {treatment_units}
+- Control units: {control_units}
+- Analysis period: {start_period} to {end_period}
 
 Data Summary:
-{json.dumps(data_summary, indent=2)}
+{data_summary}
 {structure_context}
 
 Check for potential issues and provide guidance.
@@ -310,37 +304,7 @@ Respond with JSON only:
     "proceed_recommendation": "proceed|review|stop"
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-    
-    def validate_iv_setup(
-        self,
-        parameters: Dict[str, Any],
-        data_summary: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Validate IV (2SLS) analysis setup before running.
-        Checks variable types, data compatibility, and instrument requirements.
-        """
-        structure_info = data_summary.get('structure_info', {})
-        total_rows = data_summary.get('total_rows', 'unknown')
-        column_types = structure_info.get('column_types', {})
-        missing_by_col = structure_info.get('missing_pct_by_column', {})
-        selected_cols = structure_info.get('selected_columns', [])
-
-        # Build a concise type summary for ONLY the selected variables
-        outcome = parameters.get('outcome', '')
-        treatment = parameters.get('treatment', '')
-        instruments = parameters.get('instruments', [])
-        controls = parameters.get('controls', [])
-
-        all_selected = [v for v in [outcome, treatment] + instruments + controls if v]
-        selected_types = {c: column_types.get(c, 'unknown') for c in all_selected}
-        selected_missing = {c: missing_by_col.get(c) for c in all_selected if c in missing_by_col}
-
-        n_variables = len(all_selected)
-
-        prompt = f"""You are a causal inference expert. Validate this Instrumental Variables (2SLS) setup before running.
+_PROMPT_VALIDATE_IV = """You are a causal inference expert. Validate this Instrumental Variables (2SLS) setup before running.
 Use plain language — no jargon.
 
 Selected variables:
@@ -348,15 +312,15 @@ Selected variables:
 - Treatment (the variable whose effect we want to measure): {treatment}
 - Instruments: {instruments}
 - Controls: {controls}
-- Additional endogenous variables: {parameters.get('additional_endogenous', [])}
+- Additional endogenous variables: {additional_endogenous}
 
 Dataset information:
 - Total rows: {total_rows}
 - Number of variables selected: {n_variables}
 - Data type of each selected variable (must be "numeric" to work in regression):
-{json.dumps(selected_types, indent=2)}
+{selected_types}
 - Missing data percentage per selected variable (None means data was not available):
-{json.dumps(selected_missing, indent=2)}
+{selected_missing}
 
 Run these checks. Use simple everyday language — explain what you found, not just pass/fail:
 1. Variable types — are ALL selected variables of type "numeric"? List any that are not.
@@ -376,65 +340,27 @@ Respond with JSON only:
     "proceed_recommendation": "proceed|review|stop"
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-
-    def validate_rd_setup(
-        self,
-        parameters: Dict[str, Any],
-        data_summary: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Validate RD (Regression Discontinuity) setup before running.
-        Checks variable types, cutoff placement, and obs counts on each side.
-        """
-        structure_info = data_summary.get('structure_info', {})
-        total_rows = data_summary.get('total_rows', 'unknown')
-        column_types = structure_info.get('column_types', {})
-
-        running_var = parameters.get('running_var', '')
-        outcome_var = parameters.get('outcome_var', '')
-        cutoff = parameters.get('cutoff')
-        running_min = structure_info.get('running_var_min')
-        running_max = structure_info.get('running_var_max')
-        missing_running = structure_info.get('missing_running_pct')
-        missing_outcome = structure_info.get('missing_outcome_pct')
-
-        running_type = column_types.get(running_var, 'unknown')
-        outcome_type = column_types.get(outcome_var, 'unknown')
-
-        # Determine if cutoff is within range
-        cutoff_in_range = (
-            running_min is not None
-            and running_max is not None
-            and cutoff is not None
-            and running_min < float(cutoff) < running_max
-        )
-
-        fuzzy_var = parameters.get('treatment_var')
-        fuzzy_type = column_types.get(fuzzy_var, 'unknown') if fuzzy_var else None
-
-        prompt = f"""You are a causal inference expert. Validate this Regression Discontinuity (RD) setup before running.
+_PROMPT_VALIDATE_RD = """You are a causal inference expert. Validate this Regression Discontinuity (RD) setup before running.
 Use plain language — no jargon.
 
 Selected variables and settings:
 - Running variable (the score that determines who gets treatment): {running_var}
 - Outcome (what we are measuring): {outcome_var}
 - Cutoff threshold: {cutoff}
-- Treatment side: {parameters.get('treatment_side')} (units on this side of the cutoff receive treatment)
-- Design type: {parameters.get('rd_type', 'sharp')}
-- Fuzzy treatment variable: {fuzzy_var if fuzzy_var else 'not used'}
-- Bandwidth: {parameters.get('bandwidth', 'auto')} (window of data around the cutoff used for estimation)
+- Treatment side: {treatment_side} (units on this side of the cutoff receive treatment)
+- Design type: {rd_type}
+- Fuzzy treatment variable: {fuzzy_var}
+- Bandwidth: {bandwidth} (window of data around the cutoff used for estimation)
 
 Data information:
 - Total rows in dataset: {total_rows}
 - Data type of running variable "{running_var}": {running_type} (must be "numeric")
 - Data type of outcome variable "{outcome_var}": {outcome_type} (must be "numeric")
 - Running variable range: {running_min} to {running_max}
-- Cutoff {cutoff} is {"inside" if cutoff_in_range else "OUTSIDE or at the edge of"} the running variable range
-- Missing data in running variable: {f"{missing_running:.1f}%" if missing_running is not None else "unknown"}
-- Missing data in outcome: {f"{missing_outcome:.1f}%" if missing_outcome is not None else "unknown"}
-{f'- Data type of fuzzy treatment variable "{fuzzy_var}": {fuzzy_type}' if fuzzy_var else ''}
+- Cutoff {cutoff} is {cutoff_position} the running variable range
+- Missing data in running variable: {missing_running}
+- Missing data in outcome: {missing_outcome}
+{fuzzy_type_line}
 
 Run these checks. Use simple everyday language — explain what you found:
 1. Variable types — are both the running variable and outcome variable "numeric"?
@@ -455,14 +381,7 @@ Respond with JSON only:
     "proceed_recommendation": "proceed|review|stop"
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-
-    def explain_concept(self, concept: str, user_level: str = "beginner") -> Dict[str, Any]:
-        """
-        Explain a causal inference concept at the user's level.
-        """
-        prompt = f"""Explain the concept of "{concept}" for a {user_level} audience.
+_PROMPT_EXPLAIN_CONCEPT = """Explain the concept of "{concept}" for a {user_level} audience.
 
 The user is working with a causal analysis platform and needs to understand this concept.
 
@@ -477,32 +396,13 @@ Respond with JSON only:
     "related_concepts": ["other concepts to learn about"]
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-    
-    def generate_next_steps(
-        self,
-        analysis_results: Dict[str, Any],
-        interpretation: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """
-        Generate actionable next steps based on analysis results.
-        """
-        # Sanitize data for prompt to avoid serialization issues
-        results_summary = {
-            'did_estimate': analysis_results.get('did_estimate'),
-            'p_value': analysis_results.get('p_value'),
-            'is_significant': analysis_results.get('is_significant'),
-            'parallel_trends_passed': analysis_results.get('parallel_trends_test', {}).get('passed') if analysis_results.get('parallel_trends_test') else None
-        }
-        
-        prompt = f"""Based on this causal analysis, what should the user do next?
+_PROMPT_NEXT_STEPS = """Based on this causal analysis, what should the user do next?
 
 Analysis Results:
-{json.dumps(results_summary, indent=2)}
+{results}
 
 AI Interpretation Summary:
-{interpretation.get('executive_summary', 'Not available')}
+{executive_summary}
 
 Provide actionable guidance.
 
@@ -529,145 +429,665 @@ Respond with JSON only:
     }}
 }}"""
 
-        response = self._call_gemini(prompt)
-        return self._parse_json_response(response)
-    
-    def chat(
-        self,
-        user_message: str,
-        conversation_history: List[Dict[str, str]] = None,
-        analysis_context: Dict[str, Any] = None,
-        dataset_info: Dict[str, Any] = None
-    ) -> Dict[str, Any]:
-        """
-        Chat with AI about the study, dataset, or causal inference concepts.
-        
-        Args:
-            user_message: The user's question/message
-            conversation_history: List of previous messages in format [{"role": "user|assistant", "content": "..."}]
-            analysis_context: Optional context about the current analysis (results, parameters, etc.)
-            dataset_info: Optional information about the dataset (columns, summary, etc.)
-        
-        Returns:
-            Dictionary with "response" (str) and "followup_questions" (list of 3 strings)
-        """
-        if not self._model_id:
-            raise Exception("AI service is not initialized (missing API key?)")
 
-        # Build context prompt
-        context_prompt = ""
-        if analysis_context:
-            context_parts = []
-            if analysis_context.get('method') == 'iv' or analysis_context.get('analysis_type') == 'instrumental_variable':
-                context_parts.append(
-                    "Analysis method: Instrumental Variables (2SLS). Do NOT discuss difference-in-differences or parallel trends. "
-                    "Focus on IV assumptions (relevance, exclusion restriction), instrument strength (first-stage F), and LATE/compliers."
-                )
-            if analysis_context.get('parameters'):
-                params = analysis_context['parameters']
-                context_parts.append(f"Current Analysis Parameters:")
-                # DiD parameters
-                if params.get('outcome'):
-                    context_parts.append(f"- Outcome: {params.get('outcome', 'N/A')}")
-                if params.get('treatment'):
-                    context_parts.append(f"- Treatment: {params.get('treatment', 'N/A')}")
-                if params.get('time'):
-                    context_parts.append(f"- Time variable: {params.get('time', 'N/A')}")
-                if params.get('treatment_start'):
-                    context_parts.append(f"- Treatment start: {params.get('treatment_start', 'N/A')}")
-                if params.get('unit'):
-                    context_parts.append(f"- Unit variable: {params.get('unit', 'N/A')}")
-                if params.get('controls'):
-                    context_parts.append(f"- Control variables: {', '.join(params.get('controls', []))}")
-                # RD parameters
-                if params.get('running_var'):
-                    context_parts.append(f"- Running variable: {params.get('running_var', 'N/A')}")
-                if params.get('outcome_var'):
-                    context_parts.append(f"- Outcome variable: {params.get('outcome_var', 'N/A')}")
-                if params.get('cutoff') is not None:
-                    context_parts.append(f"- Cutoff: {params.get('cutoff', 'N/A')}")
-                if params.get('treatment_side'):
-                    context_parts.append(f"- Treatment side: {params.get('treatment_side', 'N/A')}")
-                # IV parameters
-                if params.get('instruments'):
-                    inst = params.get('instruments')
-                    context_parts.append(f"- Instruments: {', '.join(inst) if isinstance(inst, list) else inst}")
-            
-            if analysis_context.get('results'):
-                results = analysis_context['results']
-                context_parts.append(f"\nAnalysis Results:")
-                # DiD results
-                if 'did_estimate' in results:
-                    context_parts.append(f"- DiD Estimate: {results.get('did_estimate', 'N/A')}")
-                if 'standard_error' in results:
-                    context_parts.append(f"- Standard Error: {results.get('standard_error', 'N/A')}")
-                # RD results
-                if 'treatment_effect' in results:
-                    context_parts.append(f"- RD Treatment Effect: {results.get('treatment_effect', 'N/A')}")
-                if 'se' in results:
-                    context_parts.append(f"- Standard Error: {results.get('se', 'N/A')}")
-                if 'ci_lower' in results and 'ci_upper' in results:
-                    context_parts.append(f"- 95% Confidence Interval: [{results.get('ci_lower', 'N/A')}, {results.get('ci_upper', 'N/A')}]")
-                elif 'confidence_interval' in results:
-                    ci = results.get('confidence_interval', {})
-                    context_parts.append(f"- 95% Confidence Interval: [{ci.get('lower', 'N/A')}, {ci.get('upper', 'N/A')}]")
-                if 'p_value' in results:
-                    context_parts.append(f"- P-value: {results.get('p_value', 'N/A')}")
-                if 'is_significant' in results:
-                    context_parts.append(f"- Significant: {results.get('is_significant', 'N/A')}")
-                if 'n_treated' in results:
-                    context_parts.append(f"- N treated: {results.get('n_treated', 'N/A')}")
-                if 'n_control' in results:
-                    context_parts.append(f"- N control: {results.get('n_control', 'N/A')}")
-                if 'bandwidth_used' in results:
-                    context_parts.append(f"- Bandwidth used: {results.get('bandwidth_used', 'N/A')}")
-                if 'polynomial_order' in results:
-                    context_parts.append(f"- Polynomial order: {results.get('polynomial_order', 'N/A')}")
-                if 'statistics' in results:
-                    stats = results.get('statistics', {})
-                    context_parts.append(f"\nStatistical Summary:")
-                    if 'total_observations' in stats:
-                        context_parts.append(f"- Total Observations: {stats.get('total_observations', 'N/A')}")
-                    if 'treated_units' in stats:
-                        context_parts.append(f"- Treated Units: {stats.get('treated_units', 'N/A')}")
-                    if 'control_units' in stats:
-                        context_parts.append(f"- Control Units: {stats.get('control_units', 'N/A')}")
-                    if 'pre_treatment_obs' in stats:
-                        context_parts.append(f"- Pre-treatment Observations: {stats.get('pre_treatment_obs', 'N/A')}")
-                    if 'post_treatment_obs' in stats:
-                        context_parts.append(f"- Post-treatment Observations: {stats.get('post_treatment_obs', 'N/A')}")
-                    if 'outcome_mean_treated_pre' in stats:
-                        context_parts.append(f"- Outcome Mean (Treated, Pre): {stats.get('outcome_mean_treated_pre', 'N/A')}")
-                    if 'outcome_mean_treated_post' in stats:
-                        context_parts.append(f"- Outcome Mean (Treated, Post): {stats.get('outcome_mean_treated_post', 'N/A')}")
-                    if 'outcome_mean_control_pre' in stats:
-                        context_parts.append(f"- Outcome Mean (Control, Pre): {stats.get('outcome_mean_control_pre', 'N/A')}")
-                    if 'outcome_mean_control_post' in stats:
-                        context_parts.append(f"- Outcome Mean (Control, Post): {stats.get('outcome_mean_control_post', 'N/A')}")
-                if 'parallel_trends' in results:
-                    pt = results.get('parallel_trends', {})
-                    context_parts.append(f"\nParallel Trends Test:")
-                    if 'passed' in pt:
-                        context_parts.append(f"- Test Passed: {pt.get('passed', 'N/A')}")
-                    if 'p_value' in pt:
-                        context_parts.append(f"- P-value: {pt.get('p_value', 'N/A')}")
-                    if 'confidence_level' in pt:
-                        context_parts.append(f"- Confidence Level: {pt.get('confidence_level', 'N/A')}")
-                    if 'message' in pt:
-                        context_parts.append(f"- Assessment: {pt.get('message', 'N/A')}")
-                    if 'warnings' in pt and pt.get('warnings'):
-                        context_parts.append(f"- Warnings: {', '.join(pt.get('warnings', []))}")
-                if 'interpretation' in results:
-                    interp = results.get('interpretation', {})
-                    context_parts.append(f"\nResult Interpretation:")
-                    if 'effect_size' in interp:
-                        context_parts.append(f"- Effect Size: {interp.get('effect_size', 'N/A')}")
-                    if 'effect_direction' in interp:
-                        context_parts.append(f"- Effect Direction: {interp.get('effect_direction', 'N/A')}")
-                    if 'significance' in interp:
-                        context_parts.append(f"- Significance: {interp.get('significance', 'N/A')}")
+def _dumps(obj: Any) -> str:
+    """Indented JSON for a prompt; non-JSON values fall back to str()."""
+    return orjson.dumps(
+        obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+# Dataset summary fields the validation prompt uses (the preview endpoint's
+# summary); structure_info is rendered separately, so it is not repeated here.
+_SUMMARY_KEYS = (
+    'total_rows', 'total_columns', 'numeric_columns', 'categorical_columns',
+    'missing_cells', 'missing_percentage',
+)
+_SUMMARY_MAX_ITEMS = 20
+
+
+def _trim_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only _SUMMARY_KEYS and cap list values at _SUMMARY_MAX_ITEMS."""
+    trimmed = {}
+    for key in _SUMMARY_KEYS:
+        if key not in summary:
+            continue
+        value = summary[key]
+        if isinstance(value, list) and len(value) > _SUMMARY_MAX_ITEMS:
+            value = value[:_SUMMARY_MAX_ITEMS] + [f"...(+{len(value) - _SUMMARY_MAX_ITEMS} more)"]
+        trimmed[key] = value
+    return trimmed
+
+
+# Labelled fields of the chat() analysis context, in prompt order. Parameters
+# and the previous interpretation are listed when they have a value; result
+# fields whenever the key is present (except empty lists).
+_PARAM_FIELDS = (
+    # DiD
+    ('outcome', 'Outcome'), ('treatment', 'Treatment'), ('time', 'Time variable'),
+    ('treatment_start', 'Treatment start'), ('unit', 'Unit variable'),
+    ('controls', 'Control variables'),
+    # RD
+    ('running_var', 'Running variable'), ('outcome_var', 'Outcome variable'),
+    ('cutoff', 'Cutoff'), ('treatment_side', 'Treatment side'),
+    # IV
+    ('instruments', 'Instruments'),
+)
+_RESULT_FIELDS_HEAD = (
+    ('did_estimate', 'DiD Estimate'), ('standard_error', 'Standard Error'),
+    ('treatment_effect', 'RD Treatment Effect'), ('se', 'Standard Error'),
+)
+# (after the confidence interval)
+_RESULT_FIELDS = (
+    ('p_value', 'P-value'), ('is_significant', 'Significant'),
+    ('n_treated', 'N treated'), ('n_control', 'N control'),
+    ('bandwidth_used', 'Bandwidth used'), ('polynomial_order', 'Polynomial order'),
+)
+_RESULT_SECTIONS = (
+    ('statistics', "\nStatistical Summary:", (
+        ('total_observations', 'Total Observations'), ('treated_units', 'Treated Units'),
+        ('control_units', 'Control Units'), ('pre_treatment_obs', 'Pre-treatment Observations'),
+        ('post_treatment_obs', 'Post-treatment Observations'),
+        ('outcome_mean_treated_pre', 'Outcome Mean (Treated, Pre)'),
+        ('outcome_mean_treated_post', 'Outcome Mean (Treated, Post)'),
+        ('outcome_mean_control_pre', 'Outcome Mean (Control, Pre)'),
+        ('outcome_mean_control_post', 'Outcome Mean (Control, Post)'),
+    )),
+    ('parallel_trends', "\nParallel Trends Test:", (
+        ('passed', 'Test Passed'), ('p_value', 'P-value'),
+        ('confidence_level', 'Confidence Level'), ('message', 'Assessment'),
+        ('warnings', 'Warnings'),
+    )),
+    ('interpretation', "\nResult Interpretation:", (
+        ('effect_size', 'Effect Size'), ('effect_direction', 'Effect Direction'),
+        ('significance', 'Significance'),
+    )),
+)
+_INTERPRETATION_FIELDS = (
+    ('executive_summary', 'Executive Summary'),
+    ('parallel_trends_interpretation', 'Parallel Trends'),
+    ('effect_size_interpretation', 'Effect Size'),
+    ('statistical_interpretation', 'Statistical Significance'),
+    ('limitations', 'Limitations'), ('implications', 'Implications'),
+    ('recommendation', 'Recommendation'), ('confidence_level', 'Confidence Level'),
+)
+
+
+def _recent_history(history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Newest messages of history that fit CHAT_HISTORY_TOKEN_BUDGET, oldest
+    first. The latest message is always kept.
+    """
+    budget = CHAT_HISTORY_TOKEN_BUDGET * _CHARS_PER_TOKEN
+    kept = []
+    for msg in reversed(history):
+        size = len(msg.get('content', '')) + len("Assistant: \n")
+        if kept and size > budget:
+            break
+        budget -= size
+        kept.append(msg)
+    kept.reverse()
+    return kept
+
+
+def _has_value(value: Any) -> bool:
+    # Like truthiness, but a numeric 0 (e.g. an RD cutoff) counts as set
+    return value is not None and value != '' and value != [] and value is not False
+
+
+def _field_text(value: Any) -> Any:
+    return ', '.join(map(str, value)) if isinstance(value, list) else value
+
+
+def _field_lines(
+    source: Dict[str, Any],
+    fields: tuple,
+    present: Callable[[Any], bool] = lambda value: value != [],
+) -> Iterator[str]:
+    """"- Label: value" for each (key, label) in fields that source has (and present() accepts)."""
+    for key, label in fields:
+        if key in source and present(source[key]):
+            yield f"- {label}: {_field_text(source[key])}"
+
+
+class _SemanticCache:
+    """
+    Past answers looked up by embedding similarity of their query.
+
+    Entries are grouped by scope (e.g. the chat's analysis context), so an
+    answer is only reused where it was given. Each scope is one matrix of
+    unit vectors; a lookup is a single matrix-vector product. The oldest
+    entries are dropped beyond max_entries per scope.
+    """
+
+    __slots__ = ("threshold", "max_entries", "_scopes", "_lock")
+
+    def __init__(self, threshold: float, max_entries: int = 256):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # scope -> (vectors (n, d), answers)
+        self._scopes: "OrderedDict[str, tuple[np.ndarray, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, scope: str, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._scopes.get(scope)
+        if entry is None:
+            return None
+        vectors, answers = entry
+        if vectors.shape[1] != vector.shape[0]:
+            return None
+        scores = vectors @ _unit(vector)
+        best = int(scores.argmax())
+        return answers[best] if scores[best] >= self.threshold else None
+
+    def add(self, scope: str, vector: np.ndarray, answer: Dict[str, Any]) -> None:
+        row = _unit(vector)[np.newaxis, :]
+        with self._lock:
+            entry = self._scopes.get(scope)
+            if entry is None or entry[0].shape[1] != row.shape[1]:
+                vectors, answers = row, [answer]
+            else:
+                vectors = np.vstack((entry[0], row))[-self.max_entries:]
+                answers = (entry[1] + [answer])[-self.max_entries:]
+            self._scopes[scope] = (vectors, answers)
+            self._scopes.move_to_end(scope)
+            while len(self._scopes) > SEMANTIC_CACHE_MAX_SCOPES:
+                self._scopes.popitem(last=False)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+_FOLLOWUP_TAG = "<FOLLOWUP_QUESTIONS>"
+_FOLLOWUP_RE = re.compile(r'<FOLLOWUP_QUESTIONS>(.*?)</FOLLOWUP_QUESTIONS>', re.DOTALL | re.IGNORECASE)
+_QUESTION_RE = re.compile(r'\d+\.\s*(.+?)(?=\d+\.|$)', re.DOTALL)
+
+
+def _before_followups(text: str, start: int, final: bool = False) -> int:
+    """
+    How much of a chat reply streamed so far can be shown: everything before
+    the follow-up tag, or (unless final) before a trailing fragment that may
+    still turn into it. Only text from just before start is scanned.
+    """
+    base = max(0, start - len(_FOLLOWUP_TAG))
+    tail = text[base:].upper()
+    at = tail.find(_FOLLOWUP_TAG)
+    if at != -1:
+        return base + at
+    if not final:
+        for k in range(min(len(_FOLLOWUP_TAG) - 1, len(tail)), 0, -1):
+            if tail.endswith(_FOLLOWUP_TAG[:k]):
+                return len(text) - k
+    return len(text)
+
+
+def _is_json(text: str) -> bool:
+    """Whether text parses as JSON; only such answers may be cached."""
+    try:
+        orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return False
+    return True
+
+
+class _JsonObjectScanner:
+    """
+    Finds the first complete top-level JSON object in text fed piece by piece.
+
+    Tracks brace depth outside string literals (honouring backslash escapes),
+    so braces inside values do not count. Each character is examined once
+    however the text is split.
+    """
+
+    __slots__ = ("text", "_pos", "_start", "_depth", "_in_string", "_escape")
+
+    def __init__(self):
+        self.text = ""  # everything fed so far
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Add chunk; return the object's text once its closing brace arrives."""
+        self.text += chunk
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._start >= 0:
+                    self._in_string = True
+            elif ch == "{":
+                if self._start < 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._start >= 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return text[self._start:i + 1]
+        self._pos = len(text)
+        return None
+
+
+class CausalAIAssistant:
+    """
+    AI assistant that helps users throughout the causal analysis workflow:
+    1. Data quality assessment
+    2. Variable role suggestions
+    3. Method recommendation
+    4. Assumption validation
+    5. Results interpretation
+    6. Next steps guidance
+    """
+    
+    def __init__(self):
+        self._cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Prompt cache key -> result of the call currently fetching it
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._semantic_cache = (
+            _SemanticCache(SEMANTIC_CACHE_THRESHOLD) if SEMANTIC_CACHE_ENABLED else None
+        )
+        self.api_key = os.getenv('GOOGLE_API_KEY')
+        if not self.api_key:
+            # Don't raise error on init, just warn, so app can start even if not configured
+            print("WARNING: GOOGLE_API_KEY not found in environment variables. AI features will be disabled.")
+            self._model_id = None
+            return
+
+        # Same model resolution as CausalAIService (no list_models() or probe calls).
+        self._model_id = resolve_model_id_from_env()
+        self._model_name = self._model_id
+    
+    def assess_data_quality(self, schema_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze dataset schema and provide quality assessment.
+        """
+        return self._call_gemini_json(self._assess_data_quality_prompt(schema_info))
+    
+    def _assess_data_quality_prompt(self, schema_info: Dict[str, Any]) -> str:
+        prompt = _PROMPT_ASSESS_QUALITY.format_map({'schema': _dumps(schema_info)})
+
+        return prompt
+    
+    def suggest_variable_roles(
+        self, 
+        schema_info: Dict[str, Any],
+        causal_question: Optional[str] = None,
+        treatment_variable: Optional[str] = None,
+        outcome_variable: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Suggest which variables should be used for outcome, treatment, time, etc.
+        """
+        question_context = f"\nUser's causal question: {causal_question}" if causal_question else ""
+        hints_context = ""
+        if treatment_variable or outcome_variable:
+            hints_context = "\nUser-provided hints from prior step:"
+            if treatment_variable:
+                hints_context += f"\n  - Treatment variable (user named it): \"{treatment_variable}\""
+            if outcome_variable:
+                hints_context += f"\n  - Outcome variable (user named it): \"{outcome_variable}\""
+            hints_context += "\nPrioritise matching these names or close variants when selecting roles."
+
+        prompt = _PROMPT_DID_VARIABLE_ROLES.format_map({
+            'question_context': question_context,
+            'hints_context': hints_context,
+            'columns': _dumps(schema_info.get('columns')),
+        })
+
+        return self._call_gemini_json(prompt)
+
+    def suggest_rd_variable_roles(
+        self,
+        schema_info: Dict[str, Any],
+        causal_question: Optional[str] = None,
+        treatment_variable: Optional[str] = None,
+        outcome_variable: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Suggest which variables should be used for RD analysis: running variable, outcome, cutoff, treatment side.
+        """
+        question_context = f"\nUser's causal question: {causal_question}" if causal_question else ""
+        hints_context = ""
+        if treatment_variable or outcome_variable:
+            hints_context = "\nUser-provided hints from prior step:"
+            if outcome_variable:
+                hints_context += f"\n  - Outcome variable (user named it): \"{outcome_variable}\" — match this for outcome_var_suggestions."
+            if treatment_variable:
+                hints_context += (
+                    f"\n  - The user called their treatment variable \"{treatment_variable}\". "
+                    "In RD there is no binary treatment column — use this as a hint for what the running variable might be "
+                    "(e.g. a continuous version of this concept), not as a direct column match."
+                )
+
+        prompt = _PROMPT_RD_VARIABLE_ROLES.format_map({
+            'question_context': question_context,
+            'hints_context': hints_context,
+            'columns': _dumps(schema_info.get('columns', [])),
+        })
+
+        return self._call_gemini_json(prompt)
+
+    def recommend_method(
+        self,
+        data_description: Dict[str, Any],
+        causal_question: str
+    ) -> Dict[str, Any]:
+        """
+        Recommend the best causal inference method based on the research question and data.
+        """
+        prompt = _PROMPT_RECOMMEND_METHOD.format_map({
+            'causal_question': causal_question,
+            'total_rows': data_description.get('total_rows', 'unknown'),
+            'has_time': data_description.get('has_time', False),
+            'has_treatment': data_description.get('has_treatment', False),
+            'is_panel': data_description.get('is_panel', False),
+            'natural_experiment': data_description.get('natural_experiment', 'unknown'),
+        })
+
+        return self._call_gemini_json(prompt)
+    
+    def validate_did_setup(
+        self,
+        parameters: Dict[str, Any],
+        data_summary: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Validate DiD analysis setup before running.
+        """
+        # Extract structure info if available
+        structure_info = data_summary.get('structure_info', {})
+        structure_context = ""
+        if structure_info:
+            structure_context = f"""
+Data Structure Analysis:
+- Total Rows: {data_summary.get('total_rows')}
+- Unique Units ({structure_info.get('unit_column')}): {structure_info.get('unit_count')}
+- Unique Time Periods ({structure_info.get('time_column')}): {structure_info.get('time_count')}
+- Expected Rows (Balanced Panel): {structure_info.get('expected_rows')}
+"""
+
+        prompt = _PROMPT_VALIDATE_DID.format_map({
+            'outcome': parameters.get('outcome'),
+            'treatment': parameters.get('treatment'),
+            'treatment_value': parameters.get('treatment_value'),
+            'time': parameters.get('time'),
+            'treatment_start': parameters.get('treatment_start'),
+            'unit': parameters.get('unit'),
+            'treatment_units': parameters.get('treatment_units', []),
+            'control_units': parameters.get('control_units', []),
+            'start_period': parameters.get('start_period'),
+            'end_period': parameters.get('end_period'),
+            'data_summary': _dumps(_trim_summary(data_summary)),
+            'structure_context': structure_context,
+        })
+
+        return self._call_gemini_json(prompt, service_tier=BACKGROUND_SERVICE_TIER)
+    
+    def validate_iv_setup(
+        self,
+        parameters: Dict[str, Any],
+        data_summary: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Validate IV (2SLS) analysis setup before running.
+        Checks variable types, data compatibility, and instrument requirements.
+        """
+        structure_info = data_summary.get('structure_info', {})
+        total_rows = data_summary.get('total_rows', 'unknown')
+        column_types = structure_info.get('column_types', {})
+        missing_by_col = structure_info.get('missing_pct_by_column', {})
+        selected_cols = structure_info.get('selected_columns', [])
+
+        # Build a concise type summary for ONLY the selected variables
+        outcome = parameters.get('outcome', '')
+        treatment = parameters.get('treatment', '')
+        instruments = parameters.get('instruments', [])
+        controls = parameters.get('controls', [])
+
+        all_selected = [v for v in [outcome, treatment] + instruments + controls if v]
+        selected_types = {c: column_types.get(c, 'unknown') for c in all_selected}
+        selected_missing = {c: missing_by_col.get(c) for c in all_selected if c in missing_by_col}
+
+        n_variables = len(all_selected)
+
+        prompt = _PROMPT_VALIDATE_IV.format_map({
+            'outcome': outcome,
+            'treatment': treatment,
+            'instruments': instruments,
+            'controls': controls,
+            'additional_endogenous': parameters.get('additional_endogenous', []),
+            'total_rows': total_rows,
+            'n_variables': n_variables,
+            'selected_types': _dumps(selected_types),
+            'selected_missing': _dumps(selected_missing),
+        })
+
+        return self._call_gemini_json(prompt)
+
+    def validate_rd_setup(
+        self,
+        parameters: Dict[str, Any],
+        data_summary: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Validate RD (Regression Discontinuity) setup before running.
+        Checks variable types, cutoff placement, and obs counts on each side.
+        """
+        structure_info = data_summary.get('structure_info', {})
+        total_rows = data_summary.get('total_rows', 'unknown')
+        column_types = structure_info.get('column_types', {})
+
+        running_var = parameters.get('running_var', '')
+        outcome_var = parameters.get('outcome_var', '')
+        cutoff = parameters.get('cutoff')
+        running_min = structure_info.get('running_var_min')
+        running_max = structure_info.get('running_var_max')
+        missing_running = structure_info.get('missing_running_pct')
+        missing_outcome = structure_info.get('missing_outcome_pct')
+
+        running_type = column_types.get(running_var, 'unknown')
+        outcome_type = column_types.get(outcome_var, 'unknown')
+
+        # Determine if cutoff is within range
+        cutoff_in_range = (
+            running_min is not None
+            and running_max is not None
+            and cutoff is not None
+            and running_min < float(cutoff) < running_max
+        )
+
+        fuzzy_var = parameters.get('treatment_var')
+        fuzzy_type = column_types.get(fuzzy_var, 'unknown') if fuzzy_var else None
+
+        prompt = _PROMPT_VALIDATE_RD.format_map({
+            'running_var': running_var,
+            'outcome_var': outcome_var,
+            'cutoff': cutoff,
+            'treatment_side': parameters.get('treatment_side'),
+            'rd_type': parameters.get('rd_type', 'sharp'),
+            'fuzzy_var': fuzzy_var if fuzzy_var else 'not used',
+            'bandwidth': parameters.get('bandwidth', 'auto'),
+            'total_rows': total_rows,
+            'running_type': running_type,
+            'outcome_type': outcome_type,
+            'running_min': running_min,
+            'running_max': running_max,
+            'cutoff_position': "inside" if cutoff_in_range else "OUTSIDE or at the edge of",
+            'missing_running': f"{missing_running:.1f}%" if missing_running is not None else "unknown",
+            'missing_outcome': f"{missing_outcome:.1f}%" if missing_outcome is not None else "unknown",
+            'fuzzy_type_line': (
+                f'- Data type of fuzzy treatment variable "{fuzzy_var}": {fuzzy_type}' if fuzzy_var else ''
+            ),
+        })
+
+        return self._call_gemini_json(prompt)
+
+    def explain_concept(self, concept: str, user_level: str = "beginner") -> Dict[str, Any]:
+        """
+        Explain a causal inference concept at the user's level.
+        """
+        prompt = _PROMPT_EXPLAIN_CONCEPT.format_map({'concept': concept, 'user_level': user_level})
+
+        return self._with_semantic_cache(
+            f"concept:{user_level}", concept, lambda: self._call_gemini_json(prompt)
+        )
+    
+    def generate_next_steps(
+        self,
+        analysis_results: Dict[str, Any],
+        interpretation: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Generate actionable next steps based on analysis results.
+        """
+        # Sanitize data for prompt to avoid serialization issues
+        results_summary = {
+            'did_estimate': analysis_results.get('did_estimate'),
+            'p_value': analysis_results.get('p_value'),
+            'is_significant': analysis_results.get('is_significant'),
+            'parallel_trends_passed': analysis_results.get('parallel_trends_test', {}).get('passed') if analysis_results.get('parallel_trends_test') else None
+        }
+        
+        prompt = _PROMPT_NEXT_STEPS.format_map({
+            'results': _dumps(results_summary),
+            'executive_summary': interpretation.get('executive_summary', 'Not available'),
+        })
+
+        return self._call_gemini_json(prompt, service_tier=BACKGROUND_SERVICE_TIER)
+    
+    def chat(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]] = None,
+        analysis_context: Dict[str, Any] = None,
+        dataset_info: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Chat with AI about the study, dataset, or causal inference concepts.
+        
+        Args:
+            user_message: The user's question/message
+            conversation_history: List of previous messages in format [{"role": "user|assistant", "content": "..."}]
+            analysis_context: Optional context about the current analysis (results, parameters, etc.)
+            dataset_info: Optional information about the dataset (columns, summary, etc.)
+        
+        Returns:
+            Dictionary with "response" (str) and "followup_questions" (list of 3 strings)
+        """
+        if not self._model_id:
+            raise Exception("AI service is not initialized (missing API key?)")
+
+        full_prompt, scope = self._chat_prompt(
+            user_message, conversation_history, analysis_context, dataset_info
+        )
+        # Near-duplicate questions reuse an earlier answer (with AI_SEMANTIC_CACHE=1)
+        return self._with_semantic_cache(
+            scope, user_message, lambda: self._chat_reply(full_prompt, analysis_context)
+        )
+
+    def chat_stream(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]] = None,
+        analysis_context: Dict[str, Any] = None,
+        dataset_info: Dict[str, Any] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        chat(), streamed as it is generated.
+
+        Yields {"type": "delta", "text": ...} events, then one
+        {"type": "done", "response": ..., "followup_questions": [...]} with the
+        same values chat() returns. The trailing <FOLLOWUP_QUESTIONS> block is
+        held back from the deltas; it only appears, parsed, in the last event.
+        """
+        if not self._model_id:
+            raise Exception("AI service is not initialized (missing API key?)")
+
+        full_prompt, _ = self._chat_prompt(
+            user_message, conversation_history, analysis_context, dataset_info
+        )
+        text = ""
+        sent = 0  # characters of text already yielded
+        try:
+            for chunk in stream_content_text(
+                full_prompt,
+                model_id=self._model_id,
+                max_output_tokens=2000,
+                temperature=0.7,
+                system_instruction=CHAT_SYSTEM_INSTRUCTION,
+            ):
+                text += chunk
+                safe = _before_followups(text, sent)
+                if safe > sent:
+                    yield {"type": "delta", "text": text[sent:safe]}
+                    sent = safe
+        except Exception as e:
+            raise Exception(f"Chat error: {str(e)}")
+
+        if not text.strip():
+            raise Exception("Chat error: Empty response from AI")
+        end = _before_followups(text, sent, final=True)
+        if end > sent:
+            yield {"type": "delta", "text": text[sent:end]}
+        yield {"type": "done", **self._split_followups(text, analysis_context)}
+
+    def _chat_prompt(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        analysis_context: Optional[Dict[str, Any]],
+        dataset_info: Optional[Dict[str, Any]],
+    ) -> Tuple[str, str]:
+        """Full chat prompt (context, history, question) and its semantic-cache scope."""
+        context = analysis_context or {}
+        params = context.get('parameters')
+        results = context.get('results')
+        ai_interp = context.get('ai_interpretation')
+        is_iv = context.get('method') == 'iv' or context.get('analysis_type') == 'instrumental_variable'
+
+        # Build context prompt
+        context_prompt = ""
+        if analysis_context:
+            context_parts = []
+            if is_iv:
+                context_parts.append(
+                    "Analysis method: Instrumental Variables (2SLS). Do NOT discuss difference-in-differences or parallel trends. "
+                    "Focus on IV assumptions (relevance, exclusion restriction), instrument strength (first-stage F), and LATE/compliers."
+                )
+            if params:
+                context_parts.append(f"Current Analysis Parameters:")
+                context_parts.extend(_field_lines(params, _PARAM_FIELDS, _has_value))
+            
+            if results:
+                context_parts.append(f"\nAnalysis Results:")
+                context_parts.extend(_field_lines(results, _RESULT_FIELDS_HEAD))
+                if 'ci_lower' in results and 'ci_upper' in results:
+                    context_parts.append(f"- 95% Confidence Interval: [{results['ci_lower']}, {results['ci_upper']}]")
+                elif 'confidence_interval' in results:
+                    ci = results.get('confidence_interval', {})
+                    context_parts.append(f"- 95% Confidence Interval: [{ci.get('lower', 'N/A')}, {ci.get('upper', 'N/A')}]")
+                context_parts.extend(_field_lines(results, _RESULT_FIELDS))
+                for key, heading, fields in _RESULT_SECTIONS:
+                    if key in results:
+                        context_parts.append(heading)
+                        context_parts.extend(_field_lines(results.get(key) or {}, fields))
                 # IV-specific results
-                if analysis_context.get('method') == 'iv' or analysis_context.get('analysis_type') == 'instrumental_variable':
+                if is_iv:
                     if 'first_stage' in results:
                         fs = results.get('first_stage', {})
                         context_parts.append(f"\nFirst-stage: F-statistic={fs.get('f_statistic', 'N/A')}")
@@ -678,34 +1098,22 @@ Respond with JSON only:
                         ols = results.get('ols_comparison', {})
                         context_parts.append(f"- OLS comparison: estimate={ols.get('estimate', 'N/A')}, se={ols.get('se', 'N/A')}")
             
-            if analysis_context.get('did_guidelines'):
-                context_parts.append(f"\n{analysis_context.get('did_guidelines')}")
+            did_guidelines = context.get('did_guidelines')
+            if did_guidelines:
+                context_parts.append(f"\n{did_guidelines}")
             
             if context_parts:
                 context_prompt = "\n".join(context_parts) + "\n\n"
         
         # Add AI interpretation if available (to avoid repetition)
         interpretation_prompt = ""
-        if analysis_context and analysis_context.get('ai_interpretation'):
-            ai_interp = analysis_context.get('ai_interpretation', {})
+        if ai_interp:
             interp_parts = []
             interp_parts.append("\nPrevious AI Interpretation (DO NOT REPEAT THIS INFORMATION):")
-            if ai_interp.get('executive_summary'):
-                interp_parts.append(f"Executive Summary: {ai_interp.get('executive_summary')}")
-            if ai_interp.get('parallel_trends_interpretation'):
-                interp_parts.append(f"Parallel Trends: {ai_interp.get('parallel_trends_interpretation')}")
-            if ai_interp.get('effect_size_interpretation'):
-                interp_parts.append(f"Effect Size: {ai_interp.get('effect_size_interpretation')}")
-            if ai_interp.get('statistical_interpretation'):
-                interp_parts.append(f"Statistical Significance: {ai_interp.get('statistical_interpretation')}")
-            if ai_interp.get('limitations'):
-                interp_parts.append(f"Limitations: {', '.join(ai_interp.get('limitations', []))}")
-            if ai_interp.get('implications'):
-                interp_parts.append(f"Implications: {', '.join(ai_interp.get('implications', []))}")
-            if ai_interp.get('recommendation'):
-                interp_parts.append(f"Recommendation: {ai_interp.get('recommendation')}")
-            if ai_interp.get('confidence_level'):
-                interp_parts.append(f"Confidence Level: {ai_interp.get('confidence_level')}")
+            interp_parts.extend(
+                f"{label}: {_field_text(ai_interp[key])}"
+                for key, label in _INTERPRETATION_FIELDS if ai_interp.get(key)
+            )
             
             if interp_parts:
                 interpretation_prompt = "\n".join(interp_parts) + "\n\n"
@@ -730,65 +1138,9 @@ Respond with JSON only:
             if dataset_parts:
                 dataset_prompt = "\nDataset Information:\n" + "\n".join(dataset_parts) + "\n\n"
         
-        # Build system prompt
-        system_prompt = """You are a helpful AI assistant specializing in causal inference and econometrics. 
-You help users understand their analysis results, datasets, and causal inference concepts.
-
-Guidelines:
-- Provide clear, concise, and accurate explanations
-- Use appropriate technical language but remain accessible
-- Reference the user's specific analysis when relevant
-- If asked about concepts, provide practical examples when possible
-- Keep responses focused and under 2000 words unless the user asks for more detail
-- DO NOT use markdown formatting like **bold** or *italic* - use plain text only
-- After your response, suggest 3 relevant follow-up questions the user might want to ask
-- IMPORTANT: The user has already received an AI interpretation of their results. Do not repeat information that has already been provided. Instead, provide nuanced, context-specific responses that build upon or clarify what they already know.
-
-IMPORTANT GUIDANCE FOR DiD ANALYSIS:
-ℹ️ What DiD Already Handles:
-- Time-invariant differences (geography, baseline characteristics) are absorbed by group fixed effects.
-- Common time shocks (macroeconomic fluctuations, seasonal patterns) are absorbed by time fixed effects.
-- DO NOT advise controlling for these.
-
-⚠️ What Users Should Control:
-- Time-varying confounders that differentially affect treatment and control groups.
-- Variables that change over time differently across groups AND correlate with both treatment status and outcome.
-
-🚫 Avoid "Bad Controls":
-- NEVER control for variables affected by the treatment itself.
-- Example: If studying a job training program's effect on wages, don't control for employment status.
-
-IMPORTANT: At the end of your response, include exactly 3 follow-up questions in this format:
-<FOLLOWUP_QUESTIONS>
-1. [First question]
-2. [Second question]
-3. [Third question]
-</FOLLOWUP_QUESTIONS>
-
-"""
-        
-        # Build conversation
-        messages = []
-        
-        # Add system message (if supported) or as first user message
-        messages.append({
-            "role": "user",
-            "content": system_prompt + context_prompt + "User question: " + user_message
-        })
-        
-        # Add conversation history if provided
-        if conversation_history:
-            # Prepend history (oldest first)
-            for msg in conversation_history[-10:]:  # Limit to last 10 messages for context
-                if msg.get('role') in ['user', 'assistant'] and msg.get('content'):
-                    messages.insert(-1, {
-                        "role": msg['role'],
-                        "content": msg['content']
-                    })
-        
         # For Gemini, we need to format as a single prompt with history
         # Build full prompt with history
-        full_prompt_parts = [system_prompt]
+        full_prompt_parts = []
         if dataset_prompt:
             full_prompt_parts.append(dataset_prompt)
         if context_prompt:
@@ -796,111 +1148,315 @@ IMPORTANT: At the end of your response, include exactly 3 follow-up questions in
         if interpretation_prompt:
             full_prompt_parts.append(interpretation_prompt)
         
+        history_lines = []
         if conversation_history:
-            full_prompt_parts.append("Previous conversation:")
-            for msg in conversation_history[-10:]:
+            for msg in _recent_history(conversation_history):
                 role = msg.get('role', 'user')
                 content = msg.get('content', '')
                 if role == 'user':
-                    full_prompt_parts.append(f"User: {content}")
+                    history_lines.append(f"User: {content}")
                 elif role == 'assistant':
-                    full_prompt_parts.append(f"Assistant: {content}")
+                    history_lines.append(f"Assistant: {content}")
+            full_prompt_parts.append("Previous conversation:")
+            full_prompt_parts.extend(history_lines)
             full_prompt_parts.append("")
         
         full_prompt_parts.append(f"Current user question: {user_message}")
         full_prompt_parts.append("\nPlease provide a helpful response:")
         
         full_prompt = "\n".join(full_prompt_parts)
-        
-        # Call Gemini
+
+        # Semantic-cache scope: answers are only shared between questions about
+        # the same dataset/analysis context and the same (trimmed) conversation,
+        # so follow-ups like "explain that more simply" never match another chat
+        scope = "chat:" + hashlib.blake2b(
+            "\0".join((dataset_prompt, context_prompt, interpretation_prompt, *history_lines)).encode(),
+            digest_size=16,
+        ).hexdigest()
+        return full_prompt, scope
+
+    def _chat_reply(
+        self, full_prompt: str, analysis_context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Send a built chat prompt and split the reply from its follow-up questions."""
         try:
             response_text = generate_content_text(
                 full_prompt,
                 model_id=self._model_id,
                 max_output_tokens=2000,
                 temperature=0.7,
+                system_instruction=CHAT_SYSTEM_INSTRUCTION,
             )
 
             if response_text and response_text.strip():
-                # Extract follow-up questions
-                followup_questions = []
-                response_without_followups = response_text.strip()
-                
-                # Look for follow-up questions section
-                import re
-                followup_match = re.search(
-                    r'<FOLLOWUP_QUESTIONS>(.*?)</FOLLOWUP_QUESTIONS>',
-                    response_text,
-                    re.DOTALL | re.IGNORECASE
-                )
-                
-                if followup_match:
-                    followup_text = followup_match.group(1).strip()
-                    # Extract numbered questions
-                    question_matches = re.findall(r'\d+\.\s*(.+?)(?=\d+\.|$)', followup_text, re.DOTALL)
-                    followup_questions = [q.strip() for q in question_matches[:3]]  # Limit to 3
-                    
-                    # Remove follow-up section from response
-                    response_without_followups = re.sub(
-                        r'<FOLLOWUP_QUESTIONS>.*?</FOLLOWUP_QUESTIONS>',
-                        '',
-                        response_text,
-                        flags=re.DOTALL | re.IGNORECASE
-                    ).strip()
-                
-                # If no follow-ups found, generate default ones
-                if not followup_questions or len(followup_questions) < 3:
-                    # Generate default follow-up questions based on context
-                    default_questions = [
-                        "Can you explain this result in simpler terms?",
-                        "What are the limitations of this analysis?",
-                        "What should I check next in my data?"
-                    ]
-                    # Try to customize based on conversation
-                    if analysis_context and analysis_context.get('parameters'):
-                        params = analysis_context['parameters']
-                        if params.get('running_var'):
-                            default_questions = [
-                                f"What does the {params.get('outcome_var', 'outcome')} variable represent?",
-                                f"How does the cutoff at {params.get('cutoff', '?')} affect the design?",
-                                "What assumptions should I verify for this RD analysis?"
-                            ]
-                        else:
-                            default_questions = [
-                                f"What does the {params.get('outcome', 'outcome')} variable represent?",
-                                f"How does the {params.get('treatment', 'treatment')} variable work?",
-                                "What assumptions should I verify for this analysis?"
-                            ]
-                    followup_questions = default_questions[:3]
-                
-                return {
-                    "response": response_without_followups,
-                    "followup_questions": followup_questions[:3]
-                }
+                return self._split_followups(response_text, analysis_context)
             else:
                 raise Exception("Empty response from AI")
                 
         except Exception as e:
             raise Exception(f"Chat error: {str(e)}")
+
+    def _split_followups(
+        self, response_text: str, analysis_context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """{"response", "followup_questions"} from a chat reply (defaults if it has none)."""
+        # Extract follow-up questions
+        followup_questions = []
+        response_without_followups = response_text.strip()
+        
+        # Look for follow-up questions section
+        followup_match = _FOLLOWUP_RE.search(response_text)
+        
+        if followup_match:
+            followup_text = followup_match.group(1).strip()
+            # Extract numbered questions
+            question_matches = _QUESTION_RE.findall(followup_text)
+            followup_questions = [q.strip() for q in question_matches[:3]]  # Limit to 3
+            
+            # Remove follow-up section from response
+            response_without_followups = _FOLLOWUP_RE.sub('', response_text).strip()
+        
+        # If no follow-ups found, generate default ones
+        if not followup_questions or len(followup_questions) < 3:
+            # Generate default follow-up questions based on context
+            default_questions = [
+                "Can you explain this result in simpler terms?",
+                "What are the limitations of this analysis?",
+                "What should I check next in my data?"
+            ]
+            # Try to customize based on conversation
+            params = (analysis_context or {}).get('parameters')
+            if params:
+                if params.get('running_var'):
+                    default_questions = [
+                        f"What does the {params.get('outcome_var', 'outcome')} variable represent?",
+                        f"How does the cutoff at {params.get('cutoff', '?')} affect the design?",
+                        "What assumptions should I verify for this RD analysis?"
+                    ]
+                else:
+                    default_questions = [
+                        f"What does the {params.get('outcome', 'outcome')} variable represent?",
+                        f"How does the {params.get('treatment', 'treatment')} variable work?",
+                        "What assumptions should I verify for this analysis?"
+                    ]
+            followup_questions = default_questions[:3]
+        
+        return {
+            "response": response_without_followups,
+            "followup_questions": followup_questions[:3]
+        }
     
-    def _call_gemini(self, prompt: str) -> str:
+    def _with_semantic_cache(
+        self, scope: str, query: str, compute: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        compute(), unless an earlier answer in scope was for a query whose
+        embedding is within SEMANTIC_CACHE_THRESHOLD cosine similarity; that
+        answer is returned with "cached": True. Error results are not stored.
+        """
+        if self._semantic_cache is None:
+            return compute()
+        vector = self._embed(query)
+        if vector is not None:
+            hit = self._semantic_cache.lookup(scope, vector)
+            if hit is not None:
+                return {**hit, "cached": True}
+        result = compute()
+        if vector is not None and "error" not in result:
+            self._semantic_cache.add(scope, vector, result)
+        return result
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        # The cache is an optimization: an embedding failure only skips it
+        try:
+            return np.asarray(embed_text(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning("Embedding for the semantic cache failed: %s", e)
+            return None
+
+    def _call_gemini_json(self, prompt: str, service_tier: Optional[str] = None) -> Dict[str, Any]:
         """
-        Simple wrapper for Gemini API calls.
-        Matches robust error handling from CausalAIService.
+        Gemini call for prompts that answer with a JSON object.
+
+        The response is streamed and scanned as it arrives; reading stops as
+        soon as the object's closing brace is in, so trailing prose is never
+        waited for. If the stream ends first (e.g. the token limit cut it
+        off), the text received so far goes through _parse_json_response.
         """
         if not self._model_id:
             raise Exception("AI service is not initialized (missing API key?)")
 
+        key = self._cache_key(prompt)
+        cached = self._cache_get(key)
+        if cached is None:
+            cached = self._single_flight(
+                key, lambda: self._fetch_json_text(prompt, key, service_tier)
+            )
+        return self._parse_json_response(cached)
+
+    def _fetch_json_text(self, prompt: str, key: str, service_tier: Optional[str] = None) -> str:
+        """Streamed text up to the first complete JSON object (cached), else all of it."""
+        scanner = _JsonObjectScanner()
+        obj_text = None
         try:
-            return generate_content_text(
+            chunks = stream_content_text(
                 prompt,
                 model_id=self._model_id,
                 max_output_tokens=8192,
-                temperature=0.3,
+                temperature=STRUCTURED_TEMPERATURE,
+                service_tier=service_tier,
             )
+            for chunk in chunks:
+                obj_text = scanner.feed(chunk)
+                if obj_text is not None:
+                    chunks.close()
+                    break
         except Exception as e:
             raise Exception(f"AI service error: {str(e)}")
+
+        if obj_text is None:
+            return scanner.text
+        # Balanced braces are not enough (e.g. a trailing comma); a parse
+        # failure must not be cached and then served for CACHE_TTL
+        if _is_json(obj_text):
+            self._cache_put(key, obj_text)
+        return obj_text
     
+    def _single_flight(self, key: str, fetch: Callable[[], str]) -> str:
+        """
+        Run fetch() unless an identical prompt is already in flight (from any
+        thread); then wait for that call and share its result
+        or error instead of sending a duplicate request.
+        """
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+        if not leader:
+            return flight.result()
+
+        try:
+            flight.set_result(fetch())
+        except Exception as e:
+            flight.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return flight.result()
+
+    def _cache_key(self, prompt: str, temperature: float = STRUCTURED_TEMPERATURE) -> str:
+        # Only low-temperature (near-deterministic) calls are cached; chat()
+        # samples at 0.7 and never goes through here
+        return hashlib.blake2b(
+            f"{CACHE_VERSION}\0{self._model_id}\0{temperature}\0{prompt}".encode(), digest_size=16
+        ).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        """
+        Cached response text for key if younger than CACHE_TTL (LRU-refreshed).
+
+        Misses fall through to the shared Redis response cache (when
+        REDIS_URL is set), so other workers' and earlier processes' answers
+        are reused too.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if time.time() - entry[0] < CACHE_TTL:
+                    self._cache.move_to_end(key)
+                    return entry[1]
+                del self._cache[key]
+
+        text = response_cache.get(self._shared_cache_key(key))
+        if text is not None:
+            self._cache_local_put(key, text)
+        return text
+
+    def _cache_put(self, key: str, text: str, ttl: int = CACHE_TTL) -> None:
+        # Only successful responses get here; errors are never cached
+        self._cache_local_put(key, text)
+        response_cache.put(self._shared_cache_key(key), text, ttl=ttl)
+
+    def _cache_local_put(self, key: str, text: str) -> None:
+        with self._cache_lock:
+            self._cache[key] = (time.time(), text)
+            self._cache.move_to_end(key)
+            while len(self._cache) > CACHE_MAX:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _shared_cache_key(key: str) -> Optional[str]:
+        # None (disabled) when the response cache has no Redis behind it
+        return f"ai:{key}" if response_cache.enabled() else None
+
+    def prewarm_concepts(
+        self,
+        concepts: Iterable[str] = COMMON_CONCEPTS,
+        user_level: str = "beginner",
+    ) -> int:
+        """
+        Cache explain_concept answers for concepts through the Batch API.
+        Returns how many concepts now have a cached answer. Blocks until the
+        batch finishes; only concepts not already cached are sent.
+        """
+        prompts = [
+            _PROMPT_EXPLAIN_CONCEPT.format_map({'concept': c, 'user_level': user_level})
+            for c in concepts
+        ]
+        results = self._batch_json(prompts)
+        return sum(1 for r in results if r is not None and "error" not in r)
+
+    def batch_assess(self, schemas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        assess_data_quality for many schemas as one Batch API job (half
+        price, not interactive). Results are cached like live calls.
+        """
+        return self._batch_json([self._assess_data_quality_prompt(s) for s in schemas])
+
+    def _batch_json(self, prompts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Parsed JSON answers for prompts: cached ones directly, the rest from
+        one Batch API job. Objects that parse are cached for later live calls
+        with BATCH_CACHE_TTL, and valid cached hits get their TTL extended to
+        it; an unparseable cached entry is fetched again.
+        """
+        if not self._model_id:
+            raise Exception("AI service is not initialized (missing API key?)")
+
+        keys = [self._cache_key(p) for p in prompts]
+        texts = [self._cache_get(k) for k in keys]
+        for i, text in enumerate(texts):
+            if text is None:
+                continue
+            if _is_json(text):
+                self._cache_put(keys[i], text, ttl=BATCH_CACHE_TTL)
+            else:
+                texts[i] = None  # refetch a bad entry instead of extending it
+        missing = [i for i, t in enumerate(texts) if t is None]
+        if missing:
+            try:
+                fetched = batch_generate_content_text(
+                    [prompts[i] for i in missing],
+                    model_id=self._model_id,
+                    max_output_tokens=8192,
+                    temperature=STRUCTURED_TEMPERATURE,
+                )
+            except Exception as e:
+                raise Exception(f"AI service error: {str(e)}")
+            for i, text in zip(missing, fetched):
+                if text is None:
+                    continue
+                obj_text = _JsonObjectScanner().feed(text)
+                if obj_text is not None and _is_json(obj_text):
+                    self._cache_put(keys[i], obj_text, ttl=BATCH_CACHE_TTL)
+                texts[i] = obj_text or text
+        return [
+            self._parse_json_response(t) if t is not None
+            else {"error": "No response from AI batch job"}
+            for t in texts
+        ]
+
     def _parse_json_response(self, response: str) -> Dict[str, Any]:
         """Parse JSON from response, handling markdown code blocks."""
         # Clean up response
@@ -913,25 +1469,24 @@ IMPORTANT: At the end of your response, include exactly 3 follow-up questions in
             response = response[:-3]
         response = response.strip()
         
+        # One forward scan finds the (first) embedded object, so prose before
+        # or after it costs nothing extra and orjson.loads runs exactly once
+        obj_text = _JsonObjectScanner().feed(response)
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Try to find JSON object if it's embedded
-            try:
-                import re
-                match = re.search(r'\{.*\}', response, re.DOTALL)
-                if match:
-                    return json.loads(match.group(0))
-            except:
-                pass
+            return orjson.loads(obj_text if obj_text is not None else response)
+        except orjson.JSONDecodeError:
             return {"error": "Failed to parse AI response", "raw_response": response[:500]}
 
 
 # Singleton
 _assistant_instance = None
+_assistant_lock = threading.Lock()
 
 def get_ai_assistant() -> CausalAIAssistant:
     global _assistant_instance
     if _assistant_instance is None:
-        _assistant_instance = CausalAIAssistant()
+        # Threaded workers can race on the first request; build it once
+        with _assistant_lock:
+            if _assistant_instance is None:
+                _assistant_instance = CausalAIAssistant()
     return _assistant_instance
@@ -5,14 +5,19 @@ Shared Gemini client using the ``google-genai`` SDK
 
 from __future__ import annotations
 
+import functools
+import logging
 import os
 import re
-from typing import Any, Optional, Tuple
+import time
+from typing import Any, Iterator, Optional, Tuple
 
 from google import genai
 from google.genai import types
 from google.genai.types import GenerateContentResponse
 
+logger = logging.getLogger(__name__)
+
 _client: Optional[genai.Client] = None
 
 
@@ -67,13 +72,22 @@ def _default_safety_settings() -> list[types.SafetySetting]:
 def _extract_text_and_finish(
     response: GenerateContentResponse,
 ) -> Tuple[Optional[str], Any]:
+    # Common case: the SDK's own join of the first candidate's text parts
     try:
         t = response.text
-        if t and str(t).strip():
-            return str(t).strip(), None
+        if t:
+            t = str(t).strip()
+            if t:
+                return t, None
     except Exception:
         pass
+    return _extract_text_slow(response)
+
 
+def _extract_text_slow(
+    response: GenerateContentResponse,
+) -> Tuple[Optional[str], Any]:
+    """Fallbacks for responses without plain .text (walks candidates/parts)."""
     finish_reason = None
     candidates = getattr(response, "candidates", None)
     if candidates and len(candidates) > 0:
@@ -113,6 +127,107 @@ def _extract_text_and_finish(
     return None, finish_reason
 
 
+def _generation_config(
+    max_output_tokens: int,
+    temperature: float,
+    safety_settings: Optional[list[types.SafetySetting]],
+    system_instruction: Optional[str] = None,
+    service_tier: Optional[str] = None,
+) -> types.GenerateContentConfig:
+    if safety_settings is None:
+        return _shared_generation_config(
+            int(max_output_tokens), float(temperature), system_instruction, service_tier,
+        )
+    return _build_generation_config(
+        max_output_tokens, temperature, safety_settings, system_instruction, service_tier,
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _shared_generation_config(
+    max_output_tokens: int,
+    temperature: float,
+    system_instruction: Optional[str],
+    service_tier: Optional[str],
+) -> types.GenerateContentConfig:
+    # Callers use a handful of fixed settings; build each config once and
+    # reuse it (the SDK only reads it)
+    return _build_generation_config(
+        max_output_tokens, temperature, None, system_instruction, service_tier
+    )
+
+
+def _build_generation_config(
+    max_output_tokens: int,
+    temperature: float,
+    safety_settings: Optional[list[types.SafetySetting]],
+    system_instruction: Optional[str],
+    service_tier: Optional[str] = None,
+) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        temperature=float(temperature),
+        max_output_tokens=int(max_output_tokens),
+        safety_settings=safety_settings or _default_safety_settings(),
+        system_instruction=system_instruction,
+        # Accept short names ("flex") as well as SERVICE_TIER_FLEX
+        service_tier=(
+            service_tier if not service_tier or service_tier.upper().startswith("SERVICE_TIER_")
+            else f"SERVICE_TIER_{service_tier.upper()}"
+        ),
+    )
+
+
+def _quota_error(api_error: Exception) -> Optional[ValueError]:
+    """User-facing ValueError for a 429/quota API error, else None."""
+    error_str = str(api_error)
+    if not (
+        "429" in error_str
+        or "quota" in error_str.lower()
+        or "rate.limit" in error_str.lower()
+    ):
+        return None
+    retry_delay = None
+    if "retry_delay" in error_str or "retry in" in error_str.lower():
+        delay_match = re.search(
+            r"retry.*?(\d+\.?\d*)\s*s", error_str, re.IGNORECASE
+        )
+        if delay_match:
+            retry_delay = float(delay_match.group(1))
+    if retry_delay:
+        error_msg = (
+            f"API quota exceeded. Please wait {int(retry_delay)} "
+            "seconds before trying again. "
+            "You can check your usage at https://ai.dev/usage"
+        )
+    else:
+        error_msg = (
+            "API quota exceeded. Please check your Google Cloud billing "
+            "and quota limits at https://ai.dev/usage"
+        )
+    quota_error = ValueError(error_msg)
+    quota_error.retry_delay = retry_delay  # type: ignore[attr-defined]
+    quota_error.is_quota_error = True  # type: ignore[attr-defined]
+    return quota_error
+
+
+def _checked_text(response: GenerateContentResponse) -> str:
+    """Usable text of a response; raises on blocked, truncated-empty or empty output."""
+    response_text, finish_reason = _extract_text_and_finish(response)
+
+    if finish_reason == types.FinishReason.MAX_TOKENS and not response_text:
+        raise Exception("Response hit token limit before generating content.")
+    if finish_reason == types.FinishReason.SAFETY:
+        raise Exception("Content was blocked by safety filters.")
+    if finish_reason == types.FinishReason.RECITATION:
+        raise Exception("Content was blocked due to recitation detection.")
+
+    if response_text:
+        return response_text
+
+    msg = f"Gemini API returned empty response. finish_reason={finish_reason!r}"
+    raise Exception(msg)
+
+
 def generate_content_text(
     prompt: str,
     *,
@@ -120,67 +235,164 @@ def generate_content_text(
     max_output_tokens: int,
     temperature: float,
     safety_settings: Optional[list[types.SafetySetting]] = None,
+    system_instruction: Optional[str] = None,
 ) -> str:
     """
     Run generateContent and return plain text.
     Raises on API errors or empty usable text.
     """
     client = get_gemini_client()
-    mid = normalize_model_id(model_id)
-    cfg = types.GenerateContentConfig(
-        temperature=float(temperature),
-        max_output_tokens=int(max_output_tokens),
-        safety_settings=safety_settings or _default_safety_settings(),
-    )
-
     try:
         response = client.models.generate_content(
-            model=mid,
+            model=normalize_model_id(model_id),
             contents=prompt,
-            config=cfg,
+            config=_generation_config(
+                max_output_tokens, temperature, safety_settings, system_instruction,
+            ),
         )
     except Exception as api_error:
-        error_str = str(api_error)
-        if (
-            "429" in error_str
-            or "quota" in error_str.lower()
-            or "rate.limit" in error_str.lower()
-        ):
-            retry_delay = None
-            if "retry_delay" in error_str or "retry in" in error_str.lower():
-                delay_match = re.search(
-                    r"retry.*?(\d+\.?\d*)\s*s", error_str, re.IGNORECASE
-                )
-                if delay_match:
-                    retry_delay = float(delay_match.group(1))
-            if retry_delay:
-                error_msg = (
-                    f"API quota exceeded. Please wait {int(retry_delay)} "
-                    "seconds before trying again. "
-                    "You can check your usage at https://ai.dev/usage"
-                )
-            else:
-                error_msg = (
-                    "API quota exceeded. Please check your Google Cloud billing "
-                    "and quota limits at https://ai.dev/usage"
-                )
-            quota_error = ValueError(error_msg)
-            quota_error.retry_delay = retry_delay  # type: ignore[attr-defined]
-            quota_error.is_quota_error = True  # type: ignore[attr-defined]
+        quota_error = _quota_error(api_error)
+        if quota_error is not None:
             raise quota_error
         raise
+    return _checked_text(response)
 
-    response_text, finish_reason = _extract_text_and_finish(response)
 
-    if finish_reason == types.FinishReason.MAX_TOKENS and not response_text:
-        raise Exception("Response hit token limit before generating content.")
+def stream_content_text(
+    prompt: str,
+    *,
+    model_id: str,
+    max_output_tokens: int,
+    temperature: float,
+    safety_settings: Optional[list[types.SafetySetting]] = None,
+    system_instruction: Optional[str] = None,
+    service_tier: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Streaming generate_content_text: yield text chunks as they are generated.
+
+    The caller may stop iterating early (e.g. once it has what it needs).
+    Errors are mapped as in generate_content_text; a safety/recitation block
+    raises after the chunks received so far, and a stream with no text raises.
+
+    service_tier="flex" asks for the discounted, slower tier; if flex
+    capacity is refused (429) before any text arrives, the call is retried
+    once on the standard tier.
+    """
+    client = get_gemini_client()
+    finish_reason = None
+    received = False
+    try:
+        stream = client.models.generate_content_stream(
+            model=normalize_model_id(model_id),
+            contents=prompt,
+            config=_generation_config(
+                max_output_tokens, temperature, safety_settings,
+                system_instruction, service_tier,
+            ),
+        )
+        for chunk in stream:
+            candidates = getattr(chunk, "candidates", None)
+            if candidates:
+                finish_reason = getattr(candidates[0], "finish_reason", None) or finish_reason
+            try:
+                text = chunk.text
+            except Exception:
+                text = None
+            if text:
+                received = True
+                yield text
+    except Exception as api_error:
+        quota_error = _quota_error(api_error)
+        if quota_error is None:
+            raise
+        if service_tier is None or received:
+            raise quota_error
+        logger.info("Gemini %s tier unavailable, retrying on standard", service_tier)
+        yield from stream_content_text(
+            prompt,
+            model_id=model_id,
+            max_output_tokens=max_output_tokens,
+            temperature=temperature,
+            safety_settings=safety_settings,
+            system_instruction=system_instruction,
+        )
+        return
+
     if finish_reason == types.FinishReason.SAFETY:
         raise Exception("Content was blocked by safety filters.")
     if finish_reason == types.FinishReason.RECITATION:
         raise Exception("Content was blocked due to recitation detection.")
+    if not received:
+        if finish_reason == types.FinishReason.MAX_TOKENS:
+            raise Exception("Response hit token limit before generating content.")
+        raise Exception(f"Gemini API returned empty response. finish_reason={finish_reason!r}")
 
-    if response_text:
-        return response_text
 
-    msg = f"Gemini API returned empty response. finish_reason={finish_reason!r}"
-    raise Exception(msg)
+EMBEDDING_MODEL = "gemini-embedding-001"
+
+
+def embed_text(text: str, model_id: str = EMBEDDING_MODEL) -> list[float]:
+    """Embedding vector of text (for similarity lookups)."""
+    response = get_gemini_client().models.embed_content(
+        model=normalize_model_id(model_id),
+        contents=text,
+    )
+    if not response.embeddings or not response.embeddings[0].values:
+        raise Exception("Gemini API returned no embedding")
+    return response.embeddings[0].values
+
+
+_BATCH_DONE_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
+
+def batch_generate_content_text(
+    prompts: list[str],
+    *,
+    model_id: str,
+    max_output_tokens: int,
+    temperature: float,
+    system_instruction: Optional[str] = None,
+    poll_seconds: float = 30.0,
+    timeout_seconds: float = 24 * 3600,
+) -> list[Optional[str]]:
+    """
+    Run prompts through the Gemini Batch API (half the per-token price, higher
+    rate limits, results within 24h) and return their texts in prompt order;
+    None for a prompt whose response failed or had no usable text.
+
+    Blocks while polling the job, so it is meant for scripts and scheduled
+    jobs (see prewarm_ai_cache.py), not request handlers.
+    """
+    if not prompts:
+        return []
+    client = get_gemini_client()
+    config = _generation_config(max_output_tokens, temperature, None, system_instruction)
+    job = client.batches.create(
+        model=normalize_model_id(model_id),
+        src=[types.InlinedRequest(contents=p, config=config) for p in prompts],
+    )
+    deadline = time.monotonic() + timeout_seconds
+    while job.state not in _BATCH_DONE_STATES:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Gemini batch {job.name} still {job.state} after {timeout_seconds}s")
+        time.sleep(poll_seconds)
+        job = client.batches.get(name=job.name)
+    if job.state != types.JobState.JOB_STATE_SUCCEEDED:
+        raise Exception(f"Gemini batch {job.name} ended in {job.state}: {job.error}")
+
+    texts: list[Optional[str]] = []
+    for item in (job.dest.inlined_responses if job.dest else None) or []:
+        text = None
+        if item.response is not None:
+            try:
+                text = _checked_text(item.response)
+            except Exception as e:
+                logger.warning("Gemini batch %s: unusable response: %s", job.name, e)
+        texts.append(text)
+    return texts + [None] * (len(prompts) - len(texts))
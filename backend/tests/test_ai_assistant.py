@@ -0,0 +1,346 @@
+"""Unit tests for the pure helpers and call paths of services/ai_assistant.py."""
+
+import threading
+
+import numpy as np
+import pytest
+
+import services.ai_assistant as ai
+from services.ai_assistant import (
+    CausalAIAssistant,
+    _before_followups,
+    _JsonObjectScanner,
+    _recent_history,
+    _SemanticCache,
+    _trim_summary,
+)
+
+
+def _feed_all(chunks):
+    scanner = _JsonObjectScanner()
+    for chunk in chunks:
+        found = scanner.feed(chunk)
+        if found is not None:
+            return found
+    return None
+
+
+def _every_split(text):
+    for i in range(len(text) + 1):
+        yield [text[:i], text[i:]]
+    yield list(text)
+
+
+@pytest.fixture()
+def assistant(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    return CausalAIAssistant()
+
+
+def _stub_stream(monkeypatch, chunks, calls=None):
+    """Replace stream_content_text with a generator over chunks; records each call."""
+    state = {"read": 0, "closed": False}
+
+    def stream(prompt, **kwargs):
+        if calls is not None:
+            calls.append(prompt)
+        try:
+            for chunk in chunks:
+                state["read"] += 1
+                yield chunk
+        finally:
+            state["closed"] = True
+
+    monkeypatch.setattr(ai, "stream_content_text", stream)
+    return state
+
+
+class TestJsonObjectScanner:
+    def test_returns_none_until_object_closes(self):
+        scanner = _JsonObjectScanner()
+        assert scanner.feed('{"a": ') is None
+        assert scanner.feed('1}') == '{"a": 1}'
+
+    def test_skips_leading_prose_and_fence(self):
+        assert _feed_all(['Sure!\n```json\n{"a": 1}\n```']) == '{"a": 1}'
+
+    def test_nested_objects(self):
+        assert _feed_all(['{"a": {"b": {}}, "c": 2} trailing']) == '{"a": {"b": {}}, "c": 2}'
+
+    def test_braces_inside_strings_do_not_count(self):
+        text = '{"a": "}{", "b": "{"}'
+        assert _feed_all([text]) == text
+
+    def test_escaped_quote_and_backslash_in_string(self):
+        text = r'{"a": "say \"}\" here", "b": "c:\\"}'
+        assert _feed_all([text + " more"]) == text
+
+    def test_any_split_gives_the_same_object(self):
+        text = r'x {"a": "q\"}", "b": [1, {"c": "\\"}], "d": "{"} y'
+        expected = r'{"a": "q\"}", "b": [1, {"c": "\\"}], "d": "{"}'
+        for chunks in _every_split(text):
+            assert _feed_all(chunks) == expected
+
+    def test_incomplete_object_keeps_text(self):
+        scanner = _JsonObjectScanner()
+        assert scanner.feed('{"a": [1, 2') is None
+        assert scanner.text == '{"a": [1, 2'
+
+
+class TestBeforeFollowups:
+    def _stream(self, chunks):
+        """Replay chat_stream's delta logic; return all the text shown to the user."""
+        text, sent, shown = "", 0, ""
+        for chunk in chunks:
+            text += chunk
+            safe = _before_followups(text, sent)
+            shown += text[sent:safe]
+            sent = max(sent, safe)
+        end = _before_followups(text, sent, final=True)
+        shown += text[sent:end]
+        return shown
+
+    def test_no_tag_shows_everything(self):
+        assert self._stream(["Hello ", "world"]) == "Hello world"
+
+    def test_tag_is_held_back(self):
+        reply = "Answer.\n<FOLLOWUP_QUESTIONS>1. a?</FOLLOWUP_QUESTIONS>"
+        assert self._stream([reply]) == "Answer.\n"
+
+    def test_tag_split_across_every_boundary(self):
+        reply = "Answer text.\n<FOLLOWUP_QUESTIONS>\n1. Why?\n</FOLLOWUP_QUESTIONS>"
+        for chunks in _every_split(reply):
+            assert self._stream(chunks) == "Answer text.\n"
+
+    def test_tag_is_case_insensitive(self):
+        assert self._stream(["Hi <followup_", "questions>1. x"]) == "Hi "
+
+    def test_partial_tag_prefix_is_withheld_until_resolved(self):
+        assert _before_followups("Answer <FOLLOW", 0) == len("Answer ")
+        assert _before_followups("Answer <FOLLOW", 0, final=True) == len("Answer <FOLLOW")
+
+    def test_lone_angle_bracket_is_released_once_disproved(self):
+        assert self._stream(["a <", "b"]) == "a <b"
+
+
+class TestRecentHistory:
+    def _msg(self, n, role="user"):
+        return {"role": role, "content": "x" * n}
+
+    def test_short_history_is_kept_whole(self):
+        history = [self._msg(10), self._msg(10, "assistant")]
+        assert _recent_history(history) == history
+
+    def test_keeps_newest_within_budget(self, monkeypatch):
+        monkeypatch.setattr(ai, "CHAT_HISTORY_TOKEN_BUDGET", 100)  # 400 chars
+        history = [self._msg(300), self._msg(200), self._msg(100)]
+        assert _recent_history(history) == history[1:]
+
+    def test_latest_message_kept_even_over_budget(self, monkeypatch):
+        monkeypatch.setattr(ai, "CHAT_HISTORY_TOKEN_BUDGET", 10)
+        history = [self._msg(5), self._msg(1000)]
+        assert _recent_history(history) == history[1:]
+
+    def test_stops_at_first_message_that_does_not_fit(self, monkeypatch):
+        monkeypatch.setattr(ai, "CHAT_HISTORY_TOKEN_BUDGET", 100)
+        history = [self._msg(10), self._msg(500), self._msg(10)]
+        assert _recent_history(history) == history[2:]
+
+    def test_empty_history(self):
+        assert _recent_history([]) == []
+
+
+class TestTrimSummary:
+    def test_keeps_only_summary_keys(self):
+        summary = {"total_rows": 10, "columns": ["a"], "sample": [[1]]}
+        assert _trim_summary(summary) == {"total_rows": 10}
+
+    def test_caps_long_lists(self):
+        cols = [f"c{i}" for i in range(25)]
+        trimmed = _trim_summary({"numeric_columns": cols})["numeric_columns"]
+        assert trimmed[:20] == cols[:20]
+        assert trimmed[20] == "...(+5 more)"
+        assert len(trimmed) == 21
+
+    def test_list_at_the_cap_is_unchanged(self):
+        cols = [f"c{i}" for i in range(20)]
+        assert _trim_summary({"numeric_columns": cols}) == {"numeric_columns": cols}
+
+
+class TestSemanticCache:
+    def test_similar_vector_hits(self):
+        cache = _SemanticCache(threshold=0.9)
+        cache.add("s", np.array([1.0, 0.0]), {"answer": 1})
+        assert cache.lookup("s", np.array([0.99, 0.05])) == {"answer": 1}
+
+    def test_dissimilar_vector_misses(self):
+        cache = _SemanticCache(threshold=0.9)
+        cache.add("s", np.array([1.0, 0.0]), {"answer": 1})
+        assert cache.lookup("s", np.array([0.0, 1.0])) is None
+
+    def test_scopes_are_separate(self):
+        cache = _SemanticCache(threshold=0.9)
+        cache.add("a", np.array([1.0, 0.0]), {"answer": 1})
+        assert cache.lookup("b", np.array([1.0, 0.0])) is None
+
+    def test_best_match_wins(self):
+        cache = _SemanticCache(threshold=0.5)
+        cache.add("s", np.array([1.0, 0.0]), {"answer": "x"})
+        cache.add("s", np.array([0.0, 1.0]), {"answer": "y"})
+        assert cache.lookup("s", np.array([0.2, 0.9])) == {"answer": "y"}
+
+    def test_oldest_entries_dropped(self):
+        cache = _SemanticCache(threshold=0.99, max_entries=2)
+        for i, vec in enumerate(([1.0, 0.0], [0.0, 1.0], [1.0, 1.0])):
+            cache.add("s", np.array(vec), {"answer": i})
+        assert cache.lookup("s", np.array([1.0, 0.0])) is None
+        assert cache.lookup("s", np.array([0.0, 1.0])) == {"answer": 1}
+
+    def test_dimension_change_misses(self):
+        cache = _SemanticCache(threshold=0.9)
+        cache.add("s", np.array([1.0, 0.0]), {"answer": 1})
+        assert cache.lookup("s", np.array([1.0, 0.0, 0.0])) is None
+
+    def test_zero_vector_does_not_divide_by_zero(self):
+        cache = _SemanticCache(threshold=0.9)
+        cache.add("s", np.array([1.0, 0.0]), {"answer": 1})
+        assert cache.lookup("s", np.zeros(2)) is None
+
+
+class TestSingleFlight:
+    def test_concurrent_identical_calls_share_one_fetch(self, assistant):
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "text"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(assistant._single_flight("k", fetch)))
+        leader.start()
+        assert started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(assistant._single_flight("k", fetch)))
+        follower.start()
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        assert results == ["text", "text"]
+        assert len(calls) == 1
+        assert assistant._inflight == {}
+
+    def test_error_is_shared_and_not_remembered(self, assistant):
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            assistant._single_flight("k", fail)
+        assert assistant._single_flight("k", lambda: "ok") == "ok"
+
+
+class TestCallGeminiJson:
+    def test_stops_reading_after_the_object(self, assistant, monkeypatch):
+        state = _stub_stream(monkeypatch, ['Here: {"a"', ': 1}', " and more", " prose"])
+        assert assistant._call_gemini_json("prompt") == {"a": 1}
+        assert state["read"] == 2
+        assert state["closed"]
+
+    def test_second_call_is_served_from_cache(self, assistant, monkeypatch):
+        calls = []
+        _stub_stream(monkeypatch, ['{"a": 1}'], calls)
+        assistant._call_gemini_json("prompt")
+        assert assistant._call_gemini_json("prompt") == {"a": 1}
+        assert len(calls) == 1
+
+    def test_truncated_object_is_not_cached(self, assistant, monkeypatch):
+        calls = []
+        _stub_stream(monkeypatch, ['{"a": [1, 2'], calls)
+        assistant._call_gemini_json("prompt")
+        assistant._call_gemini_json("prompt")
+        assert len(calls) == 2
+
+    def test_unparseable_object_is_not_cached(self, assistant, monkeypatch):
+        calls = []
+        _stub_stream(monkeypatch, ['{"a": 1,}'], calls)
+        assert "error" in assistant._call_gemini_json("prompt")
+        assistant._call_gemini_json("prompt")
+        assert len(calls) == 2
+
+    def test_stream_error_is_wrapped(self, assistant, monkeypatch):
+        def stream(prompt, **kwargs):
+            raise RuntimeError("network")
+            yield  # pragma: no cover
+
+        monkeypatch.setattr(ai, "stream_content_text", stream)
+        with pytest.raises(Exception, match="AI service error: network"):
+            assistant._call_gemini_json("prompt")
+
+
+class TestChatStream:
+    def test_deltas_exclude_followups(self, assistant, monkeypatch):
+        _stub_stream(monkeypatch, [
+            "The effect is ", "positive.\n<FOLLOW", "UP_QUESTIONS>\n1. Why?\n2. How?\n",
+            "3. What next?\n</FOLLOWUP_QUESTIONS>",
+        ])
+        events = list(assistant.chat_stream("question"))
+
+        deltas = "".join(e["text"] for e in events if e["type"] == "delta")
+        done = events[-1]
+        assert deltas == "The effect is positive.\n"
+        assert done["type"] == "done"
+        assert done["followup_questions"] == ["Why?", "How?", "What next?"]
+
+    def test_empty_reply_raises(self, assistant, monkeypatch):
+        _stub_stream(monkeypatch, ["  "])
+        with pytest.raises(Exception, match="Empty response"):
+            list(assistant.chat_stream("question"))
+
+
+class TestChatPromptScope:
+    def test_history_changes_the_scope(self, assistant):
+        context = {"parameters": {"outcome": "y", "treatment": "d"}}
+        _, fresh = assistant._chat_prompt("explain that more simply", [], context, None)
+        _, other = assistant._chat_prompt(
+            "explain that more simply",
+            [{"role": "assistant", "content": "Parallel trends means..."}],
+            context,
+            None,
+        )
+        assert fresh != other
+
+    def test_same_context_and_history_share_a_scope(self, assistant):
+        history = [{"role": "user", "content": "hi"}]
+        _, a = assistant._chat_prompt("q1", history, {"method": "iv"}, None)
+        _, b = assistant._chat_prompt("q2", history, {"method": "iv"}, None)
+        assert a == b
+
+
+class TestBatchJson:
+    def _stub_batch(self, monkeypatch, texts, calls):
+        def batch(prompts, **kwargs):
+            calls.append(list(prompts))
+            return [texts[p] for p in prompts]
+
+        monkeypatch.setattr(ai, "batch_generate_content_text", batch)
+
+    def test_only_parseable_objects_are_cached(self, assistant, monkeypatch):
+        calls = []
+        self._stub_batch(monkeypatch, {"good": '{"a": 1}', "bad": '{"a": 1,}'}, calls)
+
+        first = assistant._batch_json(["good", "bad"])
+        assistant._batch_json(["good", "bad"])
+
+        assert first[0] == {"a": 1}
+        assert "error" in first[1]
+        assert calls == [["good", "bad"], ["bad"]]
+
+    def test_bad_cached_entry_is_refetched(self, assistant, monkeypatch):
+        calls = []
+        self._stub_batch(monkeypatch, {"p": '{"a": 2}'}, calls)
+        assistant._cache_local_put(assistant._cache_key("p"), '{"a": 1,}')
+
+        assert assistant._batch_json(["p"]) == [{"a": 2}]
+        assert calls == [["p"]]
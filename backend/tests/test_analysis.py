@@ -771,6 +771,65 @@ class TestRDEstimatorAdditional:
         with pytest.raises(ValueError, match="nonexistent"):
             rd.estimate_fuzzy(treatment_var="nonexistent", bandwidth=1.0)
 
+    def test_parallel_sensitivity_matches_sequential(self, rdd_data):
+        """The process-pool sweep should return the same grid as the in-process one."""
+        rd = RDEstimator(
+            data=rdd_data,
+            running_var="score",
+            outcome_var="outcome",
+            cutoff=0.0,
+        )
+        sequential = rd.sensitivity_analysis(n_bandwidths=6)
+        parallel = rd.sensitivity_analysis(n_bandwidths=6, parallel=True)
+        assert parallel["results"] == sequential["results"]
+
+    def test_sensitivity_grid_matches_estimate(self, rdd_data):
+        """Sorted-window sweep fits should agree with estimate() at each bandwidth."""
+        rd = RDEstimator(
+            data=rdd_data,
+            running_var="score",
+            outcome_var="outcome",
+            cutoff=0.0,
+        )
+        sens = rd.sensitivity_analysis(n_bandwidths=5)
+        for row in sens["results"]:
+            est = rd.estimate(bandwidth=row["bandwidth"], polynomial_order=1)
+            assert row["treatment_effect"] == pytest.approx(est["treatment_effect"], rel=1e-9)
+            assert row["se"] == pytest.approx(est["se"], rel=1e-9)
+            assert row["n_total"] == est["n_total"]
+
+    def test_iter_sensitivity_matches_batch(self, rdd_data):
+        """Streamed rows, once sorted, should equal the batch sweep and summary."""
+        rd = RDEstimator(
+            data=rdd_data,
+            running_var="score",
+            outcome_var="outcome",
+            cutoff=0.0,
+        )
+        opt = rd.calculate_optimal_bandwidth()
+        batch = rd.sensitivity_analysis(n_bandwidths=6, optimal_bandwidth=opt)
+        rows = sorted(
+            rd.iter_sensitivity(n_bandwidths=6, optimal_bandwidth=opt),
+            key=lambda r: r["bandwidth"],
+        )
+        assert rows == batch["results"]
+        assert RDEstimator.summarize_sensitivity(rows, opt) == batch
+
+    def test_wls_kernel_matches_statsmodels_hc2(self):
+        """rd_kernels.wls_hc2 should reproduce statsmodels WLS HC2 output."""
+        import statsmodels.api as sm
+        from analysis.rd_kernels import local_polynomial_design, wls_hc2
+
+        x = RNG.uniform(0, 1, 300)
+        y = 1.0 + 2.0 * x - x ** 2 + RNG.normal(0, 0.3, 300)
+        w = np.maximum(1.0 - x, 0.0)
+        X = local_polynomial_design(x, 2)
+
+        params, bse = wls_hc2(X, y, w)
+        ref = sm.WLS(y, X, weights=w).fit(cov_type="HC2")
+        np.testing.assert_allclose(params, ref.params, rtol=1e-8)
+        np.testing.assert_allclose(bse, ref.bse, rtol=1e-8)
+
 
 # =============================================================================
 # Additional IV tests — controls, overidentification, endogeneity test
@@ -0,0 +1,56 @@
+"""Unit tests for utils/dataset_cache.py :: DataFrameCache."""
+
+import pandas as pd
+
+from utils.dataset_cache import DataFrameCache
+
+
+def _frame(n: int = 100) -> pd.DataFrame:
+    return pd.DataFrame({"x": range(n), "y": [float(i) for i in range(n)]})
+
+
+def _size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+class TestDataFrameCache:
+    def test_miss_returns_none(self):
+        cache = DataFrameCache(max_bytes=1_000_000)
+        assert cache.get(("key", "etag")) is None
+
+    def test_hit_returns_equal_frame(self):
+        cache = DataFrameCache(max_bytes=1_000_000)
+        df = _frame()
+        cache.put(("key", "etag"), df)
+        pd.testing.assert_frame_equal(cache.get(("key", "etag")), df)
+
+    def test_new_etag_is_a_miss(self):
+        cache = DataFrameCache(max_bytes=1_000_000)
+        cache.put(("key", "etag-1"), _frame())
+        assert cache.get(("key", "etag-2")) is None
+
+    def test_added_columns_do_not_leak_into_cache(self):
+        cache = DataFrameCache(max_bytes=1_000_000)
+        cache.put("k", _frame())
+        df = cache.get("k")
+        df["extra"] = 1
+        assert "extra" not in cache.get("k").columns
+
+    def test_evicts_least_recently_used(self):
+        df = _frame()
+        cache = DataFrameCache(max_bytes=_size(df) * 2)
+        cache.put("a", df)
+        cache.put("b", df)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", df)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.total_bytes <= cache.max_bytes
+
+    def test_oversized_frame_is_not_cached(self):
+        df = _frame()
+        cache = DataFrameCache(max_bytes=_size(df) - 1)
+        cache.put("k", df)
+        assert len(cache) == 0
@@ -0,0 +1,57 @@
+"""Unit tests for utils/json_provider.py."""
+
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from flask import jsonify
+
+
+class TestORJSONProvider:
+    def test_serializes_datetime_numpy_and_nan(self, app):
+        with app.app_context():
+            resp = jsonify({
+                "at": datetime(2024, 1, 2, 3, 4, 5, 6),
+                "n": np.int64(3),
+                "arr": np.array([1.5, 2.5]),
+                "nan": float("nan"),
+                "dec": Decimal("1.10"),
+            })
+
+        assert resp.mimetype == "application/json"
+        assert resp.get_json() == {
+            "at": "2024-01-02T03:04:05.000006",
+            "n": 3,
+            "arr": [1.5, 2.5],
+            "nan": None,
+            "dec": "1.10",
+        }
+
+    def test_serializes_pandas_timestamps(self, app):
+        with app.app_context():
+            resp = jsonify({
+                "ts": pd.Timestamp("2024-01-02 03:04:05"),
+                "tz": pd.Timestamp("2024-01-02", tz="UTC"),
+                "nat": pd.NaT,
+            })
+
+        assert resp.get_json() == {
+            "ts": "2024-01-02T03:04:05",
+            "tz": "2024-01-02T00:00:00+00:00",
+            "nat": None,
+        }
+
+    def test_parses_request_bodies(self, client, auth_headers):
+        ok = client.post(
+            "/api/projects", data=b'{"name": "P"}', content_type="application/json",
+            headers=auth_headers,
+        )
+        bad = client.post(
+            "/api/projects", data=b'{"name": ', content_type="application/json",
+            headers=auth_headers,
+        )
+
+        assert ok.status_code == 201
+        # Malformed JSON is still a client error, not a 500
+        assert bad.status_code == 400
@@ -0,0 +1,51 @@
+"""Unit tests for utils/jwt_cache.py :: CachingJWTManager."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from flask_jwt_extended import JWTManager
+
+from utils.jwt_cache import CachingJWTManager
+
+
+class TestCachingJWTManager:
+    def test_repeat_token_is_decoded_once(self):
+        manager = CachingJWTManager()
+        claims = {"sub": "1", "exp": time.time() + 3600}
+
+        with patch.object(JWTManager, "_decode_jwt_from_config", return_value=claims) as decode:
+            first = manager._decode_jwt_from_config("token-a")
+            second = manager._decode_jwt_from_config("token-a")
+            manager._decode_jwt_from_config("token-b")
+
+        assert first == second == claims
+        assert decode.call_count == 2
+
+    def test_failures_are_not_cached(self):
+        manager = CachingJWTManager()
+
+        with patch.object(JWTManager, "_decode_jwt_from_config", side_effect=ValueError) as decode:
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    manager._decode_jwt_from_config("bad-token")
+
+        assert decode.call_count == 2
+
+    def test_entry_does_not_outlive_token(self):
+        manager = CachingJWTManager()
+        claims = {"sub": "1", "exp": time.time() - 1}
+
+        with patch.object(JWTManager, "_decode_jwt_from_config", return_value=claims) as decode:
+            manager._decode_jwt_from_config("token-a")
+            manager._decode_jwt_from_config("token-a")
+
+        assert decode.call_count == 2
+
+    def test_authenticated_requests_still_work(self, client, auth_headers):
+        first = client.get("/api/projects", headers=auth_headers)
+        second = client.get("/api/projects", headers=auth_headers)
+        bad = client.get("/api/projects", headers={"Authorization": "Bearer not-a-token"})
+
+        assert first.status_code == second.status_code == 200
+        assert bad.status_code in (401, 422)
@@ -5,7 +5,7 @@ from datetime import date
 import pytest
 from werkzeug.security import generate_password_hash
 
-from models import AIUsageLog, Dataset, Project, User, db
+from models import AIUsageLog, Analysis, Dataset, Project, User, db
 
 
 # ---------------------------------------------------------------------------
@@ -86,6 +86,31 @@ class TestProjectModel:
             assert "datasets_count" in d
             assert "analyses_count" in d
 
+    def test_counts_dedupe_linked_and_legacy_datasets(self, app):
+        with app.app_context():
+            user = User(username="erin", email="erin@example.com", password_hash="x")
+            db.session.add(user)
+            db.session.commit()
+
+            project = Project(user_id=user.id, name="Counted")
+            db.session.add(project)
+            db.session.flush()
+            both = Dataset(
+                user_id=user.id, project_id=project.id,
+                name="a", file_name="a.csv", s3_key="uploads/count-a.csv",
+            )
+            legacy = Dataset(
+                user_id=user.id, project_id=project.id,
+                name="b", file_name="b.csv", s3_key="uploads/count-b.csv",
+            )
+            db.session.add_all([both, legacy])
+            db.session.flush()
+            project.datasets.append(both)
+            db.session.add(Analysis(project_id=project.id, dataset_id=both.id, method="did"))
+            db.session.commit()
+
+            assert project.counts() == (2, 1)
+
 
 # ---------------------------------------------------------------------------
 # Dataset model
@@ -119,6 +144,8 @@ class TestDatasetModel:
             assert d["user_id"] == user.id
             assert "created_at" in d
 
+            assert ds.to_summary_dict().keys() == d.keys()
+
 
 # ---------------------------------------------------------------------------
 # AIUsageLog model
@@ -1,10 +1,12 @@
 """Integration tests for /api/projects/* endpoints."""
 
+import gzip
 import io
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
+from botocore.exceptions import ClientError
 
 PROJECTS_URL = "/api/projects"
 
@@ -102,6 +104,75 @@ class TestListProjects:
         assert resp2.status_code == 200
         assert resp2.get_json()["count"] == 0
 
+    def test_counts_dedupe_legacy_and_linked_datasets(self, client, auth_headers, app):
+        project = create_project(client, auth_headers).get_json()["project"]
+
+        from models import Analysis, Dataset, Project, db
+
+        with app.app_context():
+            linked_both = Dataset(
+                user_id=project["user_id"], project_id=project["id"],
+                name="a", file_name="a.csv", s3_key="uploads/a.csv",
+            )
+            legacy_only = Dataset(
+                user_id=project["user_id"], project_id=project["id"],
+                name="b", file_name="b.csv", s3_key="uploads/b.csv",
+            )
+            db.session.add_all([linked_both, legacy_only])
+            db.session.flush()
+            owned_project = db.session.get(Project, project["id"])
+            owned_project.datasets.append(linked_both)
+            db.session.add(Analysis(
+                project_id=project["id"], dataset_id=linked_both.id, method="rdd"
+            ))
+            db.session.commit()
+
+        resp = client.get(PROJECTS_URL, headers=auth_headers)
+        listed = resp.get_json()["projects"][0]
+
+        assert listed["datasets_count"] == 2
+        assert listed["analyses_count"] == 1
+
+    def test_limit_pages_with_next_link(self, client, auth_headers):
+        for name in ("A", "B", "C"):
+            create_project(client, auth_headers, name)
+
+        first = client.get(f"{PROJECTS_URL}?limit=2", headers=auth_headers)
+        cursor = first.get_json()["next_cursor"]
+        second = client.get(f"{PROJECTS_URL}?limit=2&after={cursor}", headers=auth_headers)
+
+        assert first.status_code == 200
+        assert first.get_json()["count"] == 2
+        assert first.get_json()["has_more"] is True
+        assert f"after={cursor}" in first.headers["Link"] and 'rel="next"' in first.headers["Link"]
+        assert second.get_json()["count"] == 1
+        assert second.get_json()["has_more"] is False
+        assert second.get_json()["next_cursor"] is None
+        assert "Link" not in second.headers
+        names = {p["name"] for p in first.get_json()["projects"] + second.get_json()["projects"]}
+        assert names == {"A", "B", "C"}
+
+    def test_pages_do_not_shift_when_projects_are_added(self, client, auth_headers):
+        for name in ("A", "B", "C"):
+            create_project(client, auth_headers, name)
+
+        first = client.get(f"{PROJECTS_URL}?limit=2", headers=auth_headers).get_json()
+        create_project(client, auth_headers, "D")  # newest, sorts before page one
+        second = client.get(
+            f"{PROJECTS_URL}?limit=2&after={first['next_cursor']}", headers=auth_headers
+        ).get_json()
+
+        names = [p["name"] for p in first["projects"] + second["projects"]]
+        assert sorted(names) == ["A", "B", "C"]
+
+    def test_invalid_cursor_returns_400(self, client, auth_headers):
+        resp = client.get(f"{PROJECTS_URL}?limit=2&after=not-a-cursor", headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_invalid_limit_returns_400(self, client, auth_headers):
+        resp = client.get(f"{PROJECTS_URL}?limit=abc", headers=auth_headers)
+        assert resp.status_code == 400
+
 
 # ---------------------------------------------------------------------------
 # Get single project
@@ -119,6 +190,30 @@ class TestGetProject:
         assert body["project"]["id"] == pid
         assert "datasets" in body["project"]
 
+    def test_full_returns_project_datasets_and_analyses(self, client, auth_headers, app):
+        project = create_project(client, auth_headers).get_json()["project"]
+
+        from models import Analysis, Dataset, db
+
+        with app.app_context():
+            dataset = Dataset(
+                user_id=project["user_id"], project_id=project["id"],
+                name="a", file_name="a.csv", s3_key="uploads/full-a.csv",
+            )
+            db.session.add(dataset)
+            db.session.flush()
+            db.session.add(Analysis(project_id=project["id"], dataset_id=dataset.id, method="did"))
+            db.session.commit()
+
+        resp = client.get(f"{PROJECTS_URL}/{project['id']}/full", headers=auth_headers)
+        body = resp.get_json()
+
+        assert resp.status_code == 200
+        assert body["project"]["id"] == project["id"]
+        assert body["project"]["datasets_count"] == 1
+        assert [d["name"] for d in body["datasets"]] == ["a"]
+        assert [a["method"] for a in body["analyses"]] == ["did"]
+
     def test_not_found_returns_404(self, client, auth_headers):
         resp = client.get(f"{PROJECTS_URL}/99999", headers=auth_headers)
         assert resp.status_code == 404
@@ -178,6 +273,37 @@ class TestUpdateProject:
         assert resp.status_code == 200
         assert body["project"]["selected_method"] == "did"
 
+    def test_update_dataset_replaces_existing_links(self, client, auth_headers, app):
+        project = create_project(client, auth_headers).get_json()["project"]
+
+        from models import Dataset, db
+
+        with app.app_context():
+            old = Dataset(
+                user_id=project["user_id"], project_id=project["id"],
+                name="old", file_name="old.csv", s3_key="uploads/relink-old.csv",
+            )
+            new = Dataset(
+                user_id=project["user_id"], name="new", file_name="new.csv",
+                s3_key="uploads/relink-new.csv",
+            )
+            db.session.add_all([old, new])
+            db.session.commit()
+            new_id = new.id
+
+        resp = client.put(
+            f"{PROJECTS_URL}/{project['id']}",
+            json={"dataset_id": new_id},
+            headers=auth_headers,
+        )
+        datasets = client.get(
+            f"{PROJECTS_URL}/{project['id']}/datasets", headers=auth_headers
+        ).get_json()["datasets"]
+
+        assert resp.status_code == 200
+        assert resp.get_json()["project"]["datasets_count"] == 1
+        assert [d["id"] for d in datasets] == [new_id]
+
     def test_empty_name_returns_400(self, client, auth_headers):
         pid = create_project(client, auth_headers).get_json()["project"]["id"]
 
@@ -267,6 +393,397 @@ class TestSaveProjectState:
         assert body["project"]["selected_method"] == "rdd"
         assert body["project"]["analysis_config"]["outcome"] == "y"
 
+    def test_unchanged_state_is_not_rewritten(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+        url = f"{PROJECTS_URL}/{pid}/state"
+
+        client.put(url, json={"analysis_config": {"a": 1, "b": 2}}, headers=auth_headers)
+        first = client.get(f"{PROJECTS_URL}/{pid}", headers=auth_headers).get_json()["project"]
+
+        # Same config, different key order
+        resp = client.put(url, json={"analysis_config": {"b": 2, "a": 1}}, headers=auth_headers)
+        second = client.get(f"{PROJECTS_URL}/{pid}", headers=auth_headers).get_json()["project"]
+
+        assert resp.status_code == 200
+        assert resp.get_json()["project"]["analysis_config"] == {"a": 1, "b": 2}
+        assert second["updated_at"] == first["updated_at"]
+
+        client.put(url, json={"analysis_config": {"a": 3}}, headers=auth_headers)
+        third = client.get(f"{PROJECTS_URL}/{pid}", headers=auth_headers).get_json()["project"]
+        assert third["analysis_config"] == {"a": 3}
+
+
+# ---------------------------------------------------------------------------
+# Direct-to-S3 uploads (presigned POST)
+# ---------------------------------------------------------------------------
+
+
+class TestDirectUpload:
+    def test_upload_url_returns_presigned_post(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.generate_presigned_post.return_value = {"url": "https://s3/bucket", "fields": {"key": "k"}}
+            resp = client.post(
+                f"{PROJECTS_URL}/{pid}/upload-url",
+                json={"file_name": "data.csv"},
+                headers=auth_headers,
+            )
+        body = resp.get_json()
+
+        assert resp.status_code == 200
+        assert body["url"] == "https://s3/bucket"
+        assert body["s3_key"].startswith("uploads/user_")
+        assert body["s3_key"].endswith(".csv")
+
+    def test_upload_url_rejects_non_csv(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+        resp = client.post(
+            f"{PROJECTS_URL}/{pid}/upload-url",
+            json={"file_name": "data.xlsx"},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+
+    def test_confirm_creates_dataset(self, client, auth_headers):
+        project = create_project(client, auth_headers).get_json()["project"]
+        s3_key = f"uploads/user_{project['user_id']}/abc.csv"
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.head_object.return_value = {"ContentLength": 1234, "ContentType": "text/csv"}
+            resp = client.post(
+                f"{PROJECTS_URL}/{project['id']}/confirm-upload",
+                json={"s3_key": s3_key, "file_name": "abc.csv"},
+                headers=auth_headers,
+            )
+        body = resp.get_json()
+
+        assert resp.status_code == 201
+        assert body["dataset"]["s3_key"] == s3_key
+        assert body["dataset"]["name"] == "abc"
+        assert body["file_size"] == 1234
+
+    def test_confirm_rejects_other_users_key(self, client, auth_headers):
+        project = create_project(client, auth_headers).get_json()["project"]
+        other_key = f"uploads/user_{project['user_id'] + 1}/abc.csv"
+
+        with patch("routes.projects.s3_client") as s3:
+            resp = client.post(
+                f"{PROJECTS_URL}/{project['id']}/confirm-upload",
+                json={"s3_key": other_key, "file_name": "abc.csv"},
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 403
+        s3.head_object.assert_not_called()
+
+    def test_confirm_rejects_oversize_object(self, client, auth_headers):
+        project = create_project(client, auth_headers).get_json()["project"]
+        s3_key = f"uploads/user_{project['user_id']}/big.csv"
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.head_object.return_value = {"ContentLength": 11 * 1024 * 1024, "ContentType": "text/csv"}
+            resp = client.post(
+                f"{PROJECTS_URL}/{project['id']}/confirm-upload",
+                json={"s3_key": s3_key, "file_name": "big.csv"},
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 400
+
+
+class TestUploadFile:
+    def test_uploads_gzipped_csv_and_reports_raw_size(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+        uploaded = {}
+
+        def fake_put(Bucket, Key, Body, **extra):
+            uploaded["body"] = Body.read()
+            uploaded["extra"] = extra
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.put_object.side_effect = fake_put
+            resp = client.post(
+                f"{PROJECTS_URL}/{pid}/upload",
+                data={"file": (io.BytesIO(b"x,y\n1,2\n"), "data.csv")},
+                content_type="multipart/form-data",
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 201
+        assert resp.get_json()["file_size"] == 8
+        assert gzip.decompress(uploaded["body"]) == b"x,y\n1,2\n"
+        assert uploaded["extra"]["ContentEncoding"] == "gzip"
+        # Small bodies skip the multipart transfer manager
+        s3.upload_fileobj.assert_not_called()
+
+    def test_oversize_upload_rejected_with_413(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+
+        with patch("routes.projects.s3_client") as s3:
+            resp = client.post(
+                f"{PROJECTS_URL}/{pid}/upload",
+                data={"file": (io.BytesIO(b"x" * (11 * 1024 * 1024)), "big.csv")},
+                content_type="multipart/form-data",
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 413
+        s3.put_object.assert_not_called()
+        s3.upload_fileobj.assert_not_called()
+
+    def test_binary_file_named_csv_rejected(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+
+        with patch("routes.projects.s3_client") as s3:
+            resp = client.post(
+                f"{PROJECTS_URL}/{pid}/upload",
+                data={"file": (io.BytesIO(b"PK\x03\x04\x00\x00binary"), "sheet.csv")},
+                content_type="multipart/form-data",
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 400
+        s3.put_object.assert_not_called()
+        s3.upload_fileobj.assert_not_called()
+
+
+class TestListUserDatasets:
+    def test_keyset_paging_with_samples_on_first_page(self, client, auth_headers, app):
+        from models import Dataset, db
+
+        user_id = create_project(client, auth_headers).get_json()["project"]["user_id"]
+        with app.app_context():
+            db.session.add_all([
+                Dataset(user_id=user_id, name=n, file_name=f"{n}.csv", s3_key=f"uploads/page-{n}.csv")
+                for n in ("a", "b", "c")
+            ])
+            db.session.commit()
+
+        first = client.get(f"{PROJECTS_URL}/user/datasets?limit=2", headers=auth_headers).get_json()
+        second = client.get(
+            f"{PROJECTS_URL}/user/datasets?limit=2&after={first['next_cursor']}", headers=auth_headers
+        ).get_json()
+
+        assert any(d["id"] < 0 for d in first["datasets"])
+        assert all(d["id"] > 0 for d in second["datasets"])
+        own = [d["name"] for d in first["datasets"] + second["datasets"] if d["id"] > 0]
+        assert sorted(own) == ["a", "b", "c"]
+        assert second["has_more"] is False
+
+
+class TestDeleteUserDatasets:
+    def test_bulk_delete_removes_only_owned_datasets(self, client, auth_headers, app):
+        project = create_project(client, auth_headers).get_json()["project"]
+
+        from models import Dataset, Project, User, db
+
+        with app.app_context():
+            other = User(username="other", email="o@e.com", password_hash="x")
+            db.session.add(other)
+            db.session.flush()
+            mine = Dataset(
+                user_id=project["user_id"], name="a", file_name="a.csv", s3_key="uploads/bulk-a.csv",
+            )
+            theirs = Dataset(
+                user_id=other.id, name="b", file_name="b.csv", s3_key="uploads/bulk-b.csv",
+            )
+            db.session.add_all([mine, theirs])
+            db.session.flush()
+            owned_project = db.session.get(Project, project["id"])
+            owned_project.datasets.append(mine)
+            db.session.commit()
+            mine_id, theirs_id = mine.id, theirs.id
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.delete_objects.return_value = {}
+            resp = client.delete(
+                f"{PROJECTS_URL}/user/datasets",
+                json={"dataset_ids": [mine_id, theirs_id]},
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 200
+        assert resp.get_json()["deleted_ids"] == [mine_id]
+        keys = s3.delete_objects.call_args.kwargs["Delete"]["Objects"]
+        assert keys == [{"Key": "uploads/bulk-a.csv"}]
+
+        with app.app_context():
+            assert db.session.get(Dataset, mine_id) is None
+            assert db.session.get(Dataset, theirs_id) is not None
+
+    def test_delete_removes_persisted_results(self, client, auth_headers, app):
+        from models import Dataset, db
+
+        user_id = create_project(client, auth_headers).get_json()["project"]["user_id"]
+        with app.app_context():
+            dataset = Dataset(user_id=user_id, name="a", file_name="a.csv", s3_key="uploads/res-a.csv")
+            db.session.add(dataset)
+            db.session.commit()
+            dataset_id = dataset.id
+
+        result_key = "results/rd_sens/uploads/res-a.csv/etag_abc.json"
+        with patch("routes.projects.s3_client") as s3:
+            s3.get_paginator.return_value.paginate.return_value = [{"Contents": [{"Key": result_key}]}]
+            s3.delete_objects.return_value = {}
+            resp = client.delete(f"{PROJECTS_URL}/user/datasets/{dataset_id}", headers=auth_headers)
+
+        assert resp.status_code == 200
+        s3.delete_object.assert_called_once_with(Bucket=ANY, Key="uploads/res-a.csv")
+        prefix = s3.get_paginator.return_value.paginate.call_args.kwargs["Prefix"]
+        assert prefix == "results/rd_sens/uploads/res-a.csv/"
+        keys = s3.delete_objects.call_args.kwargs["Delete"]["Objects"]
+        assert keys == [{"Key": result_key}]
+
+    def test_bulk_delete_includes_persisted_results(self, client, auth_headers, app):
+        from models import Dataset, db
+
+        user_id = create_project(client, auth_headers).get_json()["project"]["user_id"]
+        with app.app_context():
+            dataset = Dataset(user_id=user_id, name="a", file_name="a.csv", s3_key="uploads/res-b.csv")
+            db.session.add(dataset)
+            db.session.commit()
+            dataset_id = dataset.id
+
+        result_key = "results/rd_sens/uploads/res-b.csv/etag_abc.json"
+        with patch("routes.projects.s3_client") as s3:
+            s3.get_paginator.return_value.paginate.return_value = [{"Contents": [{"Key": result_key}]}]
+            s3.delete_objects.return_value = {}
+            resp = client.delete(
+                f"{PROJECTS_URL}/user/datasets",
+                json={"dataset_ids": [dataset_id]},
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 200
+        keys = s3.delete_objects.call_args.kwargs["Delete"]["Objects"]
+        assert keys == [{"Key": "uploads/res-b.csv"}, {"Key": result_key}]
+
+    def test_post_bulk_delete_alias(self, client, auth_headers, app):
+        from models import Dataset, db
+
+        user_id = create_project(client, auth_headers).get_json()["project"]["user_id"]
+        with app.app_context():
+            dataset = Dataset(user_id=user_id, name="a", file_name="a.csv", s3_key="uploads/alias-a.csv")
+            db.session.add(dataset)
+            db.session.commit()
+            dataset_id = dataset.id
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.delete_objects.return_value = {}
+            resp = client.post(
+                f"{PROJECTS_URL}/user/datasets/bulk-delete",
+                json={"dataset_ids": [dataset_id]},
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 200
+        assert resp.get_json()["deleted_ids"] == [dataset_id]
+        s3.delete_objects.assert_called_once()
+
+    def test_bulk_delete_rejects_sample_ids(self, client, auth_headers):
+        resp = client.delete(
+            f"{PROJECTS_URL}/user/datasets",
+            json={"dataset_ids": [-1]},
+            headers=auth_headers,
+        )
+        assert resp.status_code == 400
+
+
+class TestUpdateUserDataset:
+    def test_other_users_dataset_is_403_and_missing_is_404(self, client, auth_headers, app):
+        from models import Dataset, User, db
+
+        with app.app_context():
+            other = User(username="owner2", email="owner2@e.com", password_hash="x")
+            db.session.add(other)
+            db.session.flush()
+            theirs = Dataset(
+                user_id=other.id, name="b", file_name="b.csv", s3_key="uploads/rename-b.csv",
+            )
+            db.session.add(theirs)
+            db.session.commit()
+            theirs_id = theirs.id
+
+        denied = client.patch(
+            f"{PROJECTS_URL}/user/datasets/{theirs_id}", json={"name": "x"}, headers=auth_headers,
+        )
+        missing = client.patch(
+            f"{PROJECTS_URL}/user/datasets/99999", json={"name": "x"}, headers=auth_headers,
+        )
+
+        assert denied.status_code == 403
+        assert missing.status_code == 404
+
+
+class TestLinkDataset:
+    def test_linking_twice_keeps_one_link(self, client, auth_headers, app):
+        project = create_project(client, auth_headers).get_json()["project"]
+
+        from models import Dataset, db
+
+        with app.app_context():
+            dataset = Dataset(
+                user_id=project["user_id"], name="a", file_name="a.csv", s3_key="uploads/link-a.csv",
+            )
+            db.session.add(dataset)
+            db.session.commit()
+            dataset_id = dataset.id
+
+        url = f"{PROJECTS_URL}/{project['id']}/link-dataset"
+        first = client.post(url, json={"dataset_id": dataset_id}, headers=auth_headers)
+        second = client.post(url, json={"dataset_id": dataset_id}, headers=auth_headers)
+
+        assert first.status_code == second.status_code == 200
+        assert second.get_json()["message"] == "Dataset already linked to this project"
+        detail = client.get(f"{PROJECTS_URL}/{project['id']}", headers=auth_headers).get_json()
+        assert detail["project"]["datasets_count"] == 1
+
+
+class TestBackgroundUpload:
+    def test_async_upload_returns_202_and_reports_pending(self, client, auth_headers):
+        pid = create_project(client, auth_headers).get_json()["project"]["id"]
+
+        with patch("routes.projects.background_uploads.submit_upload") as submit:
+            resp = client.post(
+                f"{PROJECTS_URL}/{pid}/upload?async=true",
+                data={"file": (io.BytesIO(b"x,y\n1,2\n"), "data.csv")},
+                content_type="multipart/form-data",
+                headers=auth_headers,
+            )
+        body = resp.get_json()
+
+        assert resp.status_code == 202
+        submit.assert_called_once()
+        assert body["status_url"] == f"{PROJECTS_URL}/uploads/{body['dataset']['id']}"
+
+        with patch("routes.projects.s3_client") as s3:
+            s3.head_object.side_effect = ClientError(
+                {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
+            )
+            status = client.get(body["status_url"], headers=auth_headers)
+
+        assert status.status_code == 200
+        assert status.get_json()["status"] == "pending"
+
+    def test_async_user_dataset_upload_returns_202(self, client, auth_headers):
+        with patch("routes.projects.background_uploads.submit_upload") as submit:
+            resp = client.post(
+                f"{PROJECTS_URL}/user/datasets/upload?async=true",
+                data={"file": (io.BytesIO(b"x,y\n1,2\n"), "data.csv")},
+                content_type="multipart/form-data",
+                headers=auth_headers,
+            )
+
+        assert resp.status_code == 202
+        assert resp.get_json()["dataset"]["project_id"] is None
+        submit.assert_called_once()
+
+    def test_status_of_unknown_upload_is_failed(self, client, auth_headers):
+        resp = client.get(f"{PROJECTS_URL}/uploads/9999", headers=auth_headers)
+        assert resp.status_code == 404
+        assert resp.get_json()["status"] == "failed"
+
 
 # ---------------------------------------------------------------------------
 # Health / root endpoints
@@ -0,0 +1,78 @@
+"""Unit tests for utils/request_schemas.py."""
+
+from utils.request_schemas import (
+    ProjectCreateParams,
+    RDParams,
+    RDSensitivityParams,
+    parse_body,
+)
+
+
+class TestRDParams:
+    def test_coerces_numeric_strings(self):
+        params, error = parse_body(
+            RDParams,
+            {"running_var": "x", "outcome_var": "y", "cutoff": "0.5", "polynomial_order": "2"},
+        )
+        assert error is None
+        assert params.cutoff == 0.5
+        assert params.polynomial_order == 2
+        assert params.bandwidth is None
+
+    def test_missing_running_var(self):
+        _, error = parse_body(RDParams, {"outcome_var": "y", "cutoff": 0})
+        assert error == "Missing required parameter: running_var"
+
+    def test_rejects_non_positive_bandwidth(self):
+        _, error = parse_body(
+            RDParams, {"running_var": "x", "outcome_var": "y", "cutoff": 0, "bandwidth": 0}
+        )
+        assert error is not None and error.startswith("bandwidth")
+
+    def test_baseline_error_messages(self):
+        base = {"running_var": "x", "outcome_var": "y", "cutoff": 0}
+        cases = [
+            ({"running_var": "x", "outcome_var": "y"}, "Missing required parameter: cutoff"),
+            ({**base, "cutoff": None}, "Missing required parameter: cutoff"),
+            ({**base, "cutoff": "abc"}, "cutoff must be a number"),
+            ({**base, "bandwidth": -1}, "bandwidth must be positive"),
+            ({**base, "bandwidth": "wide"}, "bandwidth must be a number"),
+            ({**base, "polynomial_order": 3}, "polynomial_order must be 1 or 2"),
+            ({**base, "rd_type": "kinked"}, "rd_type must be 'sharp' or 'fuzzy'"),
+        ]
+        for body, message in cases:
+            assert parse_body(RDParams, body) == (None, message)
+
+    def test_empty_body_message(self):
+        _, error = parse_body(RDParams, {}, empty_error="No analysis parameters provided")
+        assert error == "No analysis parameters provided"
+
+    def test_fuzzy_requires_treatment_var(self):
+        _, error = parse_body(
+            RDParams, {"running_var": "x", "outcome_var": "y", "cutoff": 0, "rd_type": "fuzzy"}
+        )
+        assert error.startswith("treatment_var is required")
+
+
+class TestRDSensitivityParams:
+    def test_clamps_and_defaults_n_bandwidths(self):
+        base = {"running_var": "x", "outcome_var": "y", "cutoff": 0}
+        assert parse_body(RDSensitivityParams, {**base, "n_bandwidths": 2})[0].n_bandwidths == 5
+        assert parse_body(RDSensitivityParams, {**base, "n_bandwidths": 99})[0].n_bandwidths == 50
+        assert parse_body(RDSensitivityParams, {**base, "n_bandwidths": "abc"})[0].n_bandwidths == 20
+
+    def test_cutoff_messages(self):
+        base = {"running_var": "x", "outcome_var": "y"}
+        assert parse_body(RDSensitivityParams, {**base, "cutoff": None})[1] == (
+            "Missing required parameter: cutoff"
+        )
+        assert parse_body(RDSensitivityParams, {**base, "cutoff": "abc"})[1] == "cutoff must be a number"
+
+
+class TestProjectCreateParams:
+    def test_blank_name_is_missing(self):
+        _, error = parse_body(ProjectCreateParams, {"name": "   "})
+        assert error == "Missing required parameter: name"
+
+    def test_empty_body(self):
+        assert parse_body(ProjectCreateParams, {}) == (None, "No data provided")
@@ -18,9 +18,24 @@ import logging
 from flask import jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 
+from models import Project, User
+
 logger = logging.getLogger(__name__)
 
 
+def current_uid():
+    """
+    Integer user ID of the JWT identity for the current request.
+
+    flask_jwt_extended already keeps the decoded token per request, so this
+    is just the int conversion. Nothing is stored on ``flask.g``: that lives
+    on the app context, which can outlive a request and would leak one
+    user's id into the next. Raises ValueError for a non-integer identity,
+    which route handlers map to 401.
+    """
+    return int(get_jwt_identity())
+
+
 def get_current_user():
     """
     Get the current authenticated user from JWT token
@@ -29,8 +44,6 @@ def get_current_user():
     Note: JWT identity is stored as a string, so we convert to int for DB query
     """
     try:
-        from models import User
-
         jwt_identity = get_jwt_identity()
         if not jwt_identity:
             return None
@@ -105,8 +118,6 @@ def project_access_required(project_id_param='project_id'):
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            from models import Project
-
             user = get_current_user()
             if not user:
                 return jsonify({"error": "User not found"}), 404
@@ -116,12 +127,17 @@ def project_access_required(project_id_param='project_id'):
             if not project_id:
                 return jsonify({"error": "Project ID not provided"}), 400
 
-            # Check if project exists and user has access
-            project = Project.query.get(project_id)
-            if not project:
-                return jsonify({"error": "Project not found"}), 404
-
-            if project.user_id != user.id:
+            # Ownership is part of the WHERE clause; only a miss needs a
+            # second, id-only probe to tell 404 from 403
+            owned = Project.query.with_entities(Project.id).filter_by(
+                id=project_id, user_id=user.id
+            ).first()
+            if owned is None:
+                exists = Project.query.with_entities(Project.id).filter_by(
+                    id=project_id
+                ).first()
+                if exists is None:
+                    return jsonify({"error": "Project not found"}), 404
                 msg = "Access denied. You don't own this project"
                 return jsonify({"error": msg}), 403
 
@@ -140,7 +156,6 @@ def get_user_projects(user_id):
     Returns:
         List of Project objects
     """
-    from models import Project
     return Project.query.filter_by(user_id=user_id).all()
 
 
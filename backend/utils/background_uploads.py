@@ -0,0 +1,67 @@
+"""
+Background S3 uploads for the multipart upload routes.
+
+With ``?async=true`` the upload route spools the (gzipped) file to local disk, records
+the Dataset row, hands the S3 transfer to this module's thread pool and
+returns 202 right away, so the request thread no longer waits for S3.
+
+Status is derived from shared state rather than kept in memory, so any
+gunicorn worker can answer a poll:
+  - Dataset row exists and the S3 object exists  -> complete
+  - Dataset row exists, S3 object not there yet  -> pending
+  - Dataset row gone (removed when the transfer failed) -> failed
+
+Transfers are not durable: if the process dies mid-upload the row stays
+"pending" until it is deleted.  Set UPLOAD_WORKERS to size the pool
+(default 4).
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from models import Dataset, db
+from utils import response_cache
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("UPLOAD_WORKERS", "4")),
+    thread_name_prefix="s3-upload",
+)
+
+
+def submit_upload(app, s3_client, bucket, local_path, s3_key, dataset_id, extra_args=None, config=None):
+    """
+    Upload ``local_path`` to ``s3_key`` in the background, then delete the file.
+
+    ``app`` is the real Flask app object (``current_app._get_current_object()``)
+    so the worker can open an app context to remove the Dataset row if the
+    transfer fails.
+    """
+    _executor.submit(
+        _run_upload, app, s3_client, bucket, local_path, s3_key, dataset_id, extra_args, config
+    )
+
+
+def _run_upload(app, s3_client, bucket, local_path, s3_key, dataset_id, extra_args, config):
+    try:
+        s3_client.upload_file(local_path, bucket, s3_key, ExtraArgs=extra_args, Config=config)
+        logger.info("Background upload finished: %s", s3_key)
+    except Exception:
+        logger.exception("Background upload failed: %s", s3_key)
+        try:
+            with app.app_context():
+                dataset = db.session.get(Dataset, dataset_id)
+                if dataset is not None:
+                    user_id = dataset.user_id
+                    db.session.delete(dataset)
+                    db.session.commit()
+                    response_cache.invalidate_user(user_id)
+        except Exception:
+            logger.exception("Could not remove dataset %s after failed upload", dataset_id)
+    finally:
+        try:
+            os.remove(local_path)
+        except OSError:
+            pass
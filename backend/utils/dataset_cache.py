@@ -0,0 +1,81 @@
+"""
+Process-wide LRU cache for parsed dataset CSVs.
+
+Analysis endpoints are typically re-run on the same dataset many times with
+different parameters.  Caching the parsed DataFrame (keyed by S3 key + ETag)
+lets repeat requests skip both the S3 download and the CSV parse.
+
+Sizing:
+  - Entries are accounted by ``DataFrame.memory_usage(deep=True)``.
+  - Least-recently-used entries are evicted once the byte cap is exceeded.
+  - Set DATASET_CACHE_MAX_MB to change the cap (default 500 MB, 0 disables).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class DataFrameCache:
+    """Thread-safe LRU of DataFrames bounded by total in-memory size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """
+        Return a shallow copy of the cached frame, or None on a miss.
+
+        The shallow copy means callers may add/replace columns without
+        touching the cached entry; they must not mutate values in place.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0].copy(deep=False)
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        """Insert a frame, evicting least-recently-used entries as needed."""
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            # Never cache a frame that would evict everything else.
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._entries[key] = (df, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and self._entries:
+                evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                logger.debug("Dataset cache evicted %s (%d bytes)", evicted_key, evicted_size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+# Global cache instance shared by all request threads in this process
+dataset_cache = DataFrameCache(
+    max_bytes=int(os.environ.get("DATASET_CACHE_MAX_MB", "500")) * 1024 * 1024
+)
@@ -0,0 +1,74 @@
+"""
+Process-local cache of verified JWT claims.
+
+The frontend sends the same bearer token on every request of a session, and
+each ``@jwt_required()`` call would otherwise re-check its HMAC signature and
+re-parse its JSON payload. ``CachingJWTManager`` remembers the decoded claims
+of tokens it has already verified for a short time.
+
+Safety:
+  - Only successful decodes are cached; a bad or expired token is re-checked
+    (and rejected) on every request.
+  - An entry never outlives the token: its TTL is min(JWT_CACHE_TTL_SECONDS,
+    exp - now).
+  - flask_jwt_extended still runs the token-type, blocklist and custom claim
+    checks after the decode, so revocation is unaffected.
+  - Set JWT_CACHE_TTL_SECONDS=0 to disable (default 30).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask_jwt_extended import JWTManager
+
+logger = logging.getLogger(__name__)
+
+JWT_CACHE_TTL_SECONDS = int(os.environ.get('JWT_CACHE_TTL_SECONDS', '30'))
+JWT_CACHE_MAX_ENTRIES = 10000
+
+
+class CachingJWTManager(JWTManager):
+    """JWTManager that reuses the claims of recently verified tokens."""
+
+    def __init__(self, app=None, add_context_processor=False):
+        self._claims_cache: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+        self._claims_lock = threading.Lock()
+        super().__init__(app, add_context_processor=add_context_processor)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # Cookie (CSRF) and allow_expired decodes are rare; always verify them
+        if JWT_CACHE_TTL_SECONDS <= 0 or csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        key = hashlib.sha256(encoded_token.encode()).digest()[:16]
+        now = time.time()
+        with self._claims_lock:
+            entry = self._claims_cache.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._claims_cache.move_to_end(key)
+                    return dict(entry[0])
+                del self._claims_cache[key]
+
+        # Raises on a bad signature, expiry, etc.; nothing is cached then
+        claims = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+
+        expires_at = now + JWT_CACHE_TTL_SECONDS
+        if 'exp' in claims:
+            expires_at = min(expires_at, claims['exp'])
+        if expires_at > now:
+            with self._claims_lock:
+                self._claims_cache[key] = (dict(claims), expires_at)
+                self._claims_cache.move_to_end(key)
+                while len(self._claims_cache) > JWT_CACHE_MAX_ENTRIES:
+                    self._claims_cache.popitem(last=False)
+        return claims
+
+    def clear_claims_cache(self):
+        """Drop every cached entry (e.g. after rotating JWT_SECRET_KEY)."""
+        with self._claims_lock:
+            self._claims_cache.clear()
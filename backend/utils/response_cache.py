@@ -0,0 +1,102 @@
+"""
+Redis aside-cache for per-user JSON responses of hot read endpoints.
+
+The project list, project detail and dataset list endpoints are polled by
+the frontend (autosave, navigation) but change only when the user mutates
+something, so their serialized responses are cached for a short TTL.
+
+Storage:
+  - Uses Redis when REDIS_URL is set and the ``redis`` package is installed
+    (shared by every worker, so an invalidation is seen everywhere).
+  - Otherwise caching is disabled: a per-process cache would keep serving a
+    project's old state from other gunicorn workers after an update.
+
+Invalidation:
+  - Every cached key embeds a per-user version number. Any mutation calls
+    ``invalidate_user(user_id)``, which bumps the version and thereby orphans
+    all of that user's cached responses at once (they expire via TTL).
+  - Redis errors are logged and treated as cache misses; they never fail a
+    request.
+
+get()/put() also take unversioned keys: the AI assistant stores Gemini
+responses under ``ai:<prompt hash>`` (see services/ai_assistant.py) and the
+RD routes store optimal bandwidths under ``rd_bw:<spec hash>`` (see
+routes/datasets.py), so workers share them and a restart does not start cold.
+"""
+
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 60
+
+_client = None
+_redis_url = os.environ.get("REDIS_URL")
+if _redis_url:
+    try:
+        import redis
+
+        _client = redis.Redis.from_url(_redis_url, decode_responses=True)
+        logger.info("Response cache: using Redis")
+    except ImportError:
+        logger.warning("Response cache: REDIS_URL is set but redis is not installed; caching disabled")
+
+
+def enabled() -> bool:
+    """Whether a Redis backend is configured."""
+    return _client is not None
+
+
+def _version_key(user_id: int) -> str:
+    return f"respver:{user_id}"
+
+
+def cache_key(user_id: int, name: str) -> Optional[str]:
+    """
+    Versioned key for this user's ``name`` response, or None when disabled.
+
+    Resolve the key once, before reading the database, and pass it to both
+    get() and put(): a mutation that lands in between then leaves the fresh
+    response stored under the superseded version instead of the current one.
+    """
+    if _client is None:
+        return None
+    try:
+        version = _client.get(_version_key(user_id)) or "0"
+    except Exception as e:
+        logger.warning("Response cache read failed: %s", e)
+        return None
+    return f"resp:{user_id}:v{version}:{name}"
+
+
+def get(key: Optional[str]) -> Optional[str]:
+    """Return the cached JSON string for ``key``, or None."""
+    if key is None:
+        return None
+    try:
+        return _client.get(key)
+    except Exception as e:
+        logger.warning("Response cache read failed: %s", e)
+        return None
+
+
+def put(key: Optional[str], body: str, ttl: int = DEFAULT_TTL_SECONDS) -> None:
+    """Store a serialized JSON response under ``key``."""
+    if key is None:
+        return
+    try:
+        _client.setex(key, ttl, body)
+    except Exception as e:
+        logger.warning("Response cache write failed: %s", e)
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop every cached response of this user (call after a successful commit)."""
+    if _client is None:
+        return
+    try:
+        _client.incr(_version_key(user_id))
+    except Exception as e:
+        logger.warning("Response cache invalidation failed: %s", e)
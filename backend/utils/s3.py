@@ -0,0 +1,50 @@
+"""
+Shared S3 client for the route modules.
+
+One client per process: botocore clients are thread-safe, and sharing one
+means sharing its connection pool. The pool is sized for gunicorn's gthread
+workers (8 threads) each running multipart transfers with several parallel
+parts (S3_UPLOAD_CONCURRENCY, see routes/projects.py), which the default
+pool of 10 connections could not serve without churning connections.
+"""
+
+import os
+
+import boto3
+from botocore.config import Config
+
+AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+S3_BUCKET_NAME = os.environ.get('AWS_S3_BUCKET_NAME')
+
+# Total attempts per call (first try included); lower it to bound worst-case latency
+S3_MAX_ATTEMPTS = int(os.environ.get('S3_MAX_ATTEMPTS', '10'))
+
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    retries={'max_attempts': S3_MAX_ATTEMPTS, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    # Pin SigV4 (presigned URLs/POSTs included) rather than per-region defaults
+    signature_version='s3v4',
+)
+
+# An explicit session: boto3.client() would go through the lazily created
+# module-level default session, which is shared mutable state across threads
+_session = boto3.session.Session(
+    aws_access_key_id=AWS_ACCESS_KEY_ID,
+    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    region_name=AWS_REGION,
+)
+
+s3_client = _session.client('s3', config=S3_CLIENT_CONFIG)
+
+
+def dataset_results_prefix(s3_key):
+    """
+    S3 prefix for analysis results persisted for one dataset object.
+
+    Results live under the dataset's own key so deleting the dataset can find
+    and remove them with a single prefix listing.
+    """
+    return f"results/rd_sens/{s3_key}/"